@@ -1,3 +1,9 @@
-from .wallet_app import StellarWalletApp
+__all__ = ["StellarWalletApp"]
 
-__all__ = ["StellarWalletApp"]
\ No newline at end of file
+
+def __getattr__(name: str):
+    # A interface é carregada sob demanda para que o núcleo e a CLI rodem sem o flet
+    if name == "StellarWalletApp":
+        from .wallet_app import StellarWalletApp
+        return StellarWalletApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
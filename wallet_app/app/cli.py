@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import getpass
+import inspect
+import json
+import os
+import sys
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.balances import AssetInfo, BalanceSheet, format_amount
+from app.core.history import HISTORY_KINDS, QUERY_LIMIT, HistoryStore, HistorySync
+from app.core.horizon import HorizonClient
+from app.core.models import KeyType, OperationType, TransactionData
+from app.core.services import BalanceProcessor, TransactionProcessor, generate_wallet
+from app.core.strkey import secret_scope
+from app.core.valuation import PortfolioValuator, parse_asset
+
+SERVE_CONCURRENCY = 64
+SECRET_ENV = "NEBULOSA_SOURCE_SECRET"
+
+
+def to_json(value: Any) -> Any:
+    if isinstance(value, BalanceSheet):
+        return value.to_dicts()
+    if is_dataclass(value) and not isinstance(value, type):
+        return {item.name: to_json(getattr(value, item.name)) for item in fields(value)}
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    return value
+
+
+class WalletService:
+    # Mesmas operações da interface gráfica, sem depender do flet
+    def __init__(self, horizon: HorizonClient) -> None:
+        self.horizon = horizon
+        self.transactions = TransactionProcessor(horizon)
+        self.balances = BalanceProcessor(horizon)
+        self._history: Optional[HistorySync] = None
+        self.methods: Dict[str, Callable[..., Awaitable[Any]]] = {
+            "balance": self.balance,
+            "balances": self.balances_for,
+            "transfer": self.transfer,
+            "generate_wallet": self.generate_wallet,
+            "validate_keys": self.validate_keys,
+            "value": self.value,
+            "history": self.history,
+            "metrics": self.metrics,
+        }
+
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = request.get("id")
+        method = self.methods.get(request.get("method", ""))
+        if method is None:
+            return {"id": request_id, "error": f"Método desconhecido: {request.get('method')}"}
+        params = request.get("params", {})
+        try:
+            inspect.signature(method).bind(**params)
+        except TypeError as ex:
+            return {"id": request_id, "error": f"Parâmetros inválidos: {str(ex)}"}
+        try:
+            result = await method(**params)
+        except Exception as ex:
+            return {"id": request_id, "error": str(ex)}
+        return {"id": request_id, "result": to_json(result)}
+
+    async def handle_line(self, line: str) -> Optional[str]:
+        if not line.strip():
+            return None
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            return json.dumps({"id": None, "error": "JSON inválido"})
+        if not isinstance(request, dict):
+            return json.dumps({"id": None, "error": "A requisição deve ser um objeto JSON"})
+        return json.dumps(await self.handle(request))
+
+    async def balance(self, key: str) -> Any:
+        return await self.balances.fetch_balances(key)
+
+    async def balances_for(self, keys: List[str]) -> Any:
+        return [result async for result in self.balances.fetch_many(keys)]
+
+    async def transfer(
+        self,
+        source_secret: str,
+        destination_id: str,
+        amount: str,
+        operation_type: str = OperationType.TRANSFER.value,
+        memo: Optional[str] = None,
+        asset_type: str = "XLM (Nativo)"
+    ) -> Any:
+        data = TransactionData(
+            source_secret=source_secret,
+            destination_id=destination_id,
+            amount=amount,
+            operation_type=OperationType(operation_type),
+            memo=memo,
+            asset_type=asset_type,
+        )
+        with secret_scope():
+            return await self.transactions.process_transaction(data)
+
+    async def value(self, keys: List[str], quote: str = "native") -> Any:
+        sheets = {}
+        async for result in self.balances.fetch_many(keys):
+            if not result.success:
+                raise ValueError(f"{result.public_key}: {result.error_message}")
+            sheets[result.public_key] = result.balances
+        return await PortfolioValuator(self.horizon, parse_asset(quote)).value(sheets)
+
+    async def history(
+        self,
+        key: str,
+        kind: str = "payments",
+        limit: int = QUERY_LIMIT,
+        before: Optional[int] = None,
+        sync: bool = True
+    ) -> Any:
+        # Consulta o banco local; com sync, antes baixa só o que chegou desde o último cursor
+        if kind not in HISTORY_KINDS:
+            raise ValueError(f"Tipo de histórico inválido: {kind}")
+        validation_result = self.balances.validate_key(key)
+        if validation_result.type == KeyType.INVALID:
+            raise ValueError(validation_result.error_message)
+        if self._history is None:
+            self._history = HistorySync(self.horizon, await asyncio.to_thread(HistoryStore.shared))
+        if sync:
+            await self._history.sync_kind(validation_result.public_key, kind)
+        return await asyncio.to_thread(
+            self._history.store.records, self.horizon.horizon_url, validation_result.public_key, kind, limit, before
+        )
+
+    async def generate_wallet(self) -> Any:
+        return await generate_wallet()
+
+    async def validate_keys(self, keys: List[str]) -> Any:
+        return self.balances.validate_keys(keys)
+
+    async def metrics(self) -> Any:
+        return self.horizon.metrics.snapshot()
+
+
+async def _run_lines(
+    service: WalletService,
+    reader: asyncio.StreamReader,
+    write: Callable[[str], None],
+    concurrency: int
+) -> None:
+    # Cada linha vira uma tarefa; as respostas saem na ordem em que terminam, identificadas pelo id
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = set()
+
+    async def respond(line: str) -> None:
+        try:
+            response = await service.handle_line(line)
+            if response is not None:
+                write(response)
+        finally:
+            semaphore.release()
+
+    while line := await reader.readline():
+        await semaphore.acquire()
+        task = asyncio.create_task(respond(line.decode()))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+
+
+async def serve_stdio(service: WalletService, concurrency: int = SERVE_CONCURRENCY) -> None:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=2 ** 24)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+
+    def write(response: str) -> None:
+        sys.stdout.write(response + "\n")
+        sys.stdout.flush()
+
+    await _run_lines(service, reader, write, concurrency)
+
+
+async def serve_tcp(service: WalletService, host: str, port: int, concurrency: int = SERVE_CONCURRENCY) -> None:
+    async def client(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await _run_lines(service, reader, lambda response: writer.write(response.encode() + b"\n"), concurrency)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(client, host, port, limit=2 ** 24)
+    address = server.sockets[0].getsockname()
+    print(f"Ouvindo em {address[0]}:{address[1]}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def _read_secret() -> str:
+    return os.environ.get(SECRET_ENV) or getpass.getpass("Chave privada: ")
+
+
+def _asset_label(asset: AssetInfo) -> str:
+    if asset.asset_type == "native":
+        return "native"
+    if asset.asset_type == "liquidity_pool_shares":
+        return f"pool:{asset.liquidity_pool_id}"
+    return f"{asset.asset_code}:{asset.asset_issuer}"
+
+
+async def _watch(service: WalletService, keys: List[str]) -> None:
+    # Uma linha JSON por mudança de saldo, até o processo ser interrompido
+    async with service.balances.watch(keys) as subscription:
+        async for delta in subscription:
+            print(json.dumps({
+                "public_key": delta.public_key,
+                "changes": {_asset_label(asset): format_amount(amount) for asset, amount in delta.changes.items()},
+                "balances": delta.balances.to_dicts(),
+            }), flush=True)
+
+
+async def _run(args: argparse.Namespace) -> int:
+    service = WalletService(HorizonClient(args.horizon_url))
+    try:
+        if args.command == "serve":
+            if args.listen:
+                host, _, port = args.listen.rpartition(":")
+                await serve_tcp(service, host or "127.0.0.1", int(port), args.concurrency)
+            else:
+                await serve_stdio(service, args.concurrency)
+            return 0
+        if args.command == "watch":
+            await _watch(service, args.keys)
+            return 0
+        if args.command == "balance":
+            result = await service.balances_for(args.keys)
+            ok = all(item.success for item in result)
+        elif args.command == "history":
+            result = await service.history(args.key, args.kind, args.limit, sync=not args.offline)
+            ok = True
+        elif args.command == "value":
+            result = await service.value(args.keys, args.quote)
+            ok = True
+        elif args.command == "transfer":
+            result = await service.transfer(
+                _read_secret(), args.destination, args.amount,
+                OperationType.CREATE_ACCOUNT.value if args.create_account else OperationType.TRANSFER.value,
+                args.memo,
+            )
+            ok = result.success
+        else:
+            result = await service.generate_wallet()
+            ok = True
+        print(json.dumps(to_json(result), indent=2))
+        return 0 if ok else 1
+    finally:
+        await service.horizon.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Carteira Nebulosa sem interface gráfica")
+    parser.add_argument("--horizon-url", default=None, help="servidor Horizon (padrão: NEBULOSA_HORIZON_URL)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    balance = commands.add_parser("balance", help="consulta saldos")
+    balance.add_argument("keys", nargs="+", help="chaves públicas ou privadas")
+
+    value = commands.add_parser("value", help="soma o valor das carteiras em um ativo de cotação")
+    value.add_argument("keys", nargs="+", help="chaves públicas ou privadas")
+    value.add_argument("--quote", default="native", help="ativo de cotação: native ou CODIGO:EMISSOR")
+
+    watch = commands.add_parser("watch", help="acompanha os saldos ao vivo, uma linha JSON por mudança")
+    watch.add_argument("keys", nargs="+", help="chaves públicas ou privadas")
+
+    history = commands.add_parser("history", help="histórico local, sincronizado de forma incremental")
+    history.add_argument("key", help="chave pública ou privada")
+    history.add_argument("--kind", choices=HISTORY_KINDS, default="payments")
+    history.add_argument("--limit", type=int, default=QUERY_LIMIT)
+    history.add_argument("--offline", action="store_true", help="só lê o banco local, sem consultar o Horizon")
+
+    transfer = commands.add_parser("transfer", help=f"envia XLM; a chave privada vem de {SECRET_ENV}")
+    transfer.add_argument("destination", help="chave pública do destinatário")
+    transfer.add_argument("amount", help="quantidade em XLM")
+    transfer.add_argument("--memo", default=None)
+    transfer.add_argument("--create-account", action="store_true", help="cria a conta de destino")
+
+    commands.add_parser("generate", help="gera uma nova carteira")
+
+    serve = commands.add_parser("serve", help="atende requisições JSONL pela entrada padrão ou TCP")
+    serve.add_argument("--listen", default=None, metavar="HOST:PORTA", help="escuta em TCP em vez de stdin/stdout")
+    serve.add_argument("--concurrency", type=int, default=SERVE_CONCURRENCY)
+
+    args = parser.parse_args(argv)
+    try:
+        raise SystemExit(asyncio.run(_run(args)))
+    except KeyboardInterrupt:
+        raise SystemExit(130)
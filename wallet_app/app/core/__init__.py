@@ -1,5 +1,36 @@
-from .models import OperationType, TransactionData, TransactionResult, KeyType, KeyValidationResult
-from .services import TransactionProcessor, BalanceProcessor, generate_wallet
+import importlib
+from typing import Any
 
+# Os módulos só são importados no primeiro acesso; o stellar_sdk sozinho leva meio segundo
+_EXPORTS = {
+    ".models": ["OperationType", "TransactionData", "TransactionResult", "KeyType", "KeyValidationResult", "AccountBalances", "PayoutRow", "PayoutResult"],
+    ".services": ["TransactionProcessor", "BalanceProcessor", "generate_wallet"],
+    ".balances": ["AssetInfo", "AssetTable", "BalanceEntry", "BalanceSheet", "aggregate", "parse_amount", "format_amount"],
+    ".horizon": ["HorizonClient"],
+    ".fees": ["FeeOracle", "FeePolicy"],
+    ".payouts": ["PayoutEngine", "read_payout_rows"],
+    ".channels": ["ChannelPool"],
+    ".keygen": ["generate_wallets", "write_wallets", "read_encrypted_wallets"],
+    ".vanity": ["VanitySearch", "VanityProgress", "generate_vanity_wallet"],
+    ".derivation": ["HDWallet", "DerivedAccount", "scan_used_accounts"],
+    ".strkey": ["KeyValidator", "secret_scope"],
+    ".metrics": ["Metrics", "MetricsSink", "LoggingSink", "JsonLinesSink", "PrometheusSink"],
+    ".valuation": ["PriceOracle", "PriceCache", "PortfolioValuator", "Valuation", "AssetValuation", "parse_asset"],
+    ".history": ["HistoryStore", "HistorySync"],
+    ".submission": ["TransactionSubmitter", "SubmissionPending", "classify_error"],
+    ".streams": ["StreamManager", "BalanceSubscription", "BalanceDelta"],
+    ".emulator": ["HorizonEmulator"],
+}
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
 
-__all__ = ["OperationType", "TransactionData", "TransactionResult", "KeyType", "KeyValidationResult", "TransactionProcessor", "BalanceProcessor", "generate_wallet"]
\ No newline at end of file
+
+def __getattr__(name: str) -> Any:
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = list(_MODULES)
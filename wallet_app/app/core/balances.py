@@ -0,0 +1,196 @@
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+STROOPS_PER_UNIT = 10_000_000
+AMOUNT_DECIMALS = 7
+MAX_AMOUNT = 2 ** 63 - 1
+# Ordem de exibição: nativo, ativos emitidos, cotas de pool e o que mais vier
+TYPE_ORDER = {
+    "native": 0,
+    "credit_alphanum4": 1,
+    "credit_alphanum12": 1,
+    "liquidity_pool_shares": 2,
+}
+
+
+def parse_amount(amount: str) -> int:
+    # O Horizon sempre manda sete casas; o caminho rápido só junta os dígitos, sem passar por float
+    if len(amount) > AMOUNT_DECIMALS and amount[-AMOUNT_DECIMALS - 1] == ".":
+        whole, fraction = amount[:-AMOUNT_DECIMALS - 1], amount[-AMOUNT_DECIMALS:]
+    else:
+        whole, _, fraction = amount.partition(".")
+        if len(fraction) > AMOUNT_DECIMALS:
+            raise ValueError(f"Valor inválido: {amount!r}")
+        fraction = fraction.ljust(AMOUNT_DECIMALS, "0")
+    # int() sozinho aceitaria "_", espaços, "+" e dígitos de outros alfabetos, que o Horizon nunca manda
+    negative = whole.startswith("-")
+    digits = (whole[1:] if negative else whole) + fraction
+    if len(digits) == len(fraction) or not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"Valor inválido: {amount!r}")
+    stroops = -int(digits) if negative else int(digits)
+    if not -MAX_AMOUNT <= stroops <= MAX_AMOUNT:
+        raise ValueError(f"Valor fora do intervalo de 64 bits: {amount!r}")
+    return stroops
+
+
+def format_amount(stroops: int) -> str:
+    sign = "-" if stroops < 0 else ""
+    whole, fraction = divmod(abs(stroops), STROOPS_PER_UNIT)
+    return f"{sign}{whole}.{fraction:07d}"
+
+
+def _optional_amount(amount: str | None, default: int) -> int:
+    return default if amount is None else parse_amount(amount)
+
+
+@dataclass(frozen=True)
+class AssetInfo:
+    asset_type: str
+    asset_code: str
+    asset_issuer: str = ""
+    liquidity_pool_id: str = ""
+
+    @property
+    def sort_key(self) -> Tuple[int, str]:
+        return TYPE_ORDER.get(self.asset_type, 3), self.asset_code
+
+    @classmethod
+    def from_horizon(cls, balance: Dict[str, Any]) -> "AssetInfo":
+        asset_type = balance.get("asset_type", "native")
+        if asset_type == "native":
+            return cls("native", "XLM")
+        if asset_type == "liquidity_pool_shares":
+            return cls(asset_type, "Pool Shares", liquidity_pool_id=balance.get("liquidity_pool_id", ""))
+        return cls(asset_type, balance.get("asset_code", ""), balance.get("asset_issuer", ""))
+
+
+class AssetTable:
+    # Cada ativo aparece uma vez; as planilhas guardam só o índice
+    def __init__(self) -> None:
+        self.assets: List[AssetInfo] = []
+        self.sort_keys: List[Tuple[int, str]] = []
+        self._index: Dict[Tuple[str, str, str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.assets)
+
+    def __getitem__(self, index: int) -> AssetInfo:
+        return self.assets[index]
+
+    def intern(self, balance: Dict[str, Any]) -> int:
+        key = (
+            balance.get("asset_type", "native"),
+            balance.get("asset_code", ""),
+            balance.get("asset_issuer", ""),
+            balance.get("liquidity_pool_id", ""),
+        )
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.assets)
+            asset = AssetInfo.from_horizon(balance)
+            self.assets.append(asset)
+            self.sort_keys.append(asset.sort_key)
+        return index
+
+
+@dataclass
+class BalanceEntry:
+    asset: AssetInfo
+    balance: int
+    limit: int = MAX_AMOUNT
+    buying_liabilities: int = 0
+    selling_liabilities: int = 0
+
+    @property
+    def available(self) -> int:
+        return self.balance - self.selling_liabilities
+
+    def to_dict(self) -> Dict[str, str]:
+        entry = {
+            "balance": format_amount(self.balance),
+            "asset_type": self.asset.asset_type,
+            "asset_code": self.asset.asset_code,
+            "asset_issuer": self.asset.asset_issuer,
+            "liquidity_pool_id": self.asset.liquidity_pool_id,
+            "buying_liabilities": format_amount(self.buying_liabilities),
+            "selling_liabilities": format_amount(self.selling_liabilities),
+        }
+        if self.asset.asset_type != "native":
+            entry["limit"] = format_amount(self.limit)
+        return entry
+
+
+@dataclass
+class BalanceSheet:
+    # Colunas em array de int64 (stroops): exatas, compactas e legíveis por numpy.frombuffer sem cópia
+    assets: AssetTable = field(default_factory=AssetTable)
+    asset_index: array = field(default_factory=lambda: array("I"))
+    amounts: array = field(default_factory=lambda: array("q"))
+    limits: array = field(default_factory=lambda: array("q"))
+    buying_liabilities: array = field(default_factory=lambda: array("q"))
+    selling_liabilities: array = field(default_factory=lambda: array("q"))
+
+    @classmethod
+    def from_horizon(cls, balances: Iterable[Dict[str, Any]], assets: AssetTable | None = None) -> "BalanceSheet":
+        sheet = cls(assets if assets is not None else AssetTable())
+        intern = sheet.assets.intern
+        rows = [
+            (
+                intern(balance),
+                parse_amount(balance.get("balance", "0")),
+                _optional_amount(balance.get("limit"), MAX_AMOUNT),
+                _optional_amount(balance.get("buying_liabilities"), 0),
+                _optional_amount(balance.get("selling_liabilities"), 0),
+            )
+            for balance in balances
+        ]
+        for column, values in zip(sheet._columns(), zip(*rows)):
+            column.extend(values)
+        return sheet
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+    def __iter__(self) -> Iterator[BalanceEntry]:
+        assets = self.assets.assets
+        for index, amount, limit, buying, selling in zip(
+            self.asset_index, self.amounts, self.limits, self.buying_liabilities, self.selling_liabilities
+        ):
+            yield BalanceEntry(assets[index], amount, limit, buying, selling)
+
+    def sorted(self) -> "BalanceSheet":
+        sort_keys = self.assets.sort_keys
+        order = sorted(range(len(self)), key=list(map(sort_keys.__getitem__, self.asset_index)).__getitem__)
+        return BalanceSheet(
+            self.assets,
+            *(array(column.typecode, map(column.__getitem__, order)) for column in self._columns()),
+        )
+
+    def totals(self) -> Dict[AssetInfo, int]:
+        return aggregate([self])
+
+    def to_dicts(self) -> List[Dict[str, str]]:
+        return [entry.to_dict() for entry in self]
+
+    def _columns(self) -> Tuple[array, ...]:
+        return self.asset_index, self.amounts, self.limits, self.buying_liabilities, self.selling_liabilities
+
+
+def aggregate(sheets: Iterable[BalanceSheet]) -> Dict[AssetInfo, int]:
+    # Soma em int do Python para não estourar 64 bits; agrupa por índice e só no fim troca pelo ativo
+    sums: Dict[int, Tuple[AssetTable, Dict[int, int]]] = {}
+    for sheet in sheets:
+        table = sums.get(id(sheet.assets))
+        if table is None:
+            table = sums[id(sheet.assets)] = (sheet.assets, {})
+        by_index = table[1]
+        for index, amount in zip(sheet.asset_index, sheet.amounts):
+            by_index[index] = by_index.get(index, 0) + amount
+
+    totals: Dict[AssetInfo, int] = {}
+    for assets, by_index in sums.values():
+        for index, amount in by_index.items():
+            asset = assets[index]
+            totals[asset] = totals.get(asset, 0) + amount
+    return totals
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Set
+from stellar_sdk import Account
+from app.core.scheduler import background
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+ACCOUNT_TTL = 30.0
+ACCOUNT_CACHE_SIZE = 1024
+RECONNECT_DELAY = 0.5
+MAX_RECONNECT_DELAY = 30.0
+
+AccountListener = Callable[[Dict[str, Any]], None]
+
+logger = logging.getLogger(__name__)
+
+
+class AccountCache:
+    # Consultas avulsas só vivem pelo TTL; stream aberto apenas para contas com assinante explícito
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        ttl: float = ACCOUNT_TTL,
+        max_size: int = ACCOUNT_CACHE_SIZE
+    ) -> None:
+        self.horizon = horizon
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, List[Any]] = OrderedDict()
+        self._listeners: Dict[str, Set[AccountListener]] = {}
+        self._streams: Dict[str, asyncio.Task] = {}
+        # Contas cujo stream está conectado agora; só elas dispensam o TTL
+        self._live: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def streamed(self) -> Set[str]:
+        return set(self._streams)
+
+    def peek(self, public_key: str) -> Dict[str, Any] | None:
+        entry = self._entries.get(public_key)
+        if entry is None:
+            return None
+        data, expires_at = entry
+        if public_key not in self._live and expires_at <= time.monotonic():
+            self._entries.pop(public_key, None)
+            return None
+        self._entries.move_to_end(public_key)
+        return data
+
+    async def get(self, public_key: str) -> Dict[str, Any]:
+        data = self.peek(public_key)
+        if data is not None:
+            return data
+        data = await self.horizon.server.accounts().account_id(public_key).call()
+        self._store(public_key, data)
+        return data
+
+    async def load_account(self, public_key: str) -> Account:
+        data = await self.get(public_key)
+        return Account(public_key, int(data["sequence"]), raw_data=data)
+
+    def subscribe(self, public_key: str, listener: AccountListener) -> None:
+        # Enquanto o stream estiver conectado a entrada não expira: ele a mantém atualizada
+        self._listeners.setdefault(public_key, set()).add(listener)
+        if public_key not in self._streams:
+            with background("streams"):
+                self._streams[public_key] = asyncio.create_task(self._follow(public_key))
+
+    def unsubscribe(self, public_key: str, listener: AccountListener) -> None:
+        listeners = self._listeners.get(public_key)
+        if listeners is None:
+            return
+        listeners.discard(listener)
+        if not listeners:
+            del self._listeners[public_key]
+            self._live.discard(public_key)
+            stream = self._streams.pop(public_key, None)
+            if stream is not None:
+                stream.cancel()
+
+    def invalidate(self, public_key: str) -> None:
+        # O stream continua aberto: a próxima leitura ou mensagem dele repõe a entrada
+        self._entries.pop(public_key, None)
+        self.horizon.client.forget(f"/accounts/{public_key}")
+
+    def clear(self) -> None:
+        for stream in self._streams.values():
+            stream.cancel()
+        self._streams.clear()
+        self._live.clear()
+        self._listeners.clear()
+        for public_key in list(self._entries):
+            self.invalidate(public_key)
+
+    def _store(self, public_key: str, data: Dict[str, Any]) -> None:
+        self._entries[public_key] = [data, time.monotonic() + self.ttl]
+        self._entries.move_to_end(public_key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _follow(self, public_key: str) -> None:
+        # O Horizon manda o estado atual ao conectar, então reconectar basta para não perder mudanças
+        delay = RECONNECT_DELAY
+        while True:
+            try:
+                async for data in self.horizon.server.accounts().account_id(public_key).stream():
+                    delay = RECONNECT_DELAY
+                    self._live.add(public_key)
+                    self._store(public_key, data)
+                    for listener in list(self._listeners.get(public_key, ())):
+                        listener(data)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.debug("Stream da conta %s caiu: %s", public_key, ex)
+            # Desconectado, o valor guardado pode estar velho: volta a valer o TTL até reconectar
+            self._live.discard(public_key)
+            self._entries.pop(public_key, None)
+            self.horizon.metrics.increment("streams.reconnects")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
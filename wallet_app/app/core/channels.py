@@ -0,0 +1,221 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from decimal import Decimal
+from enum import Enum
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, List, Optional
+from stellar_sdk import Keypair
+from app.core.models import OperationType, PayoutRow
+from app.core.submission import SubmissionPending, SubmitErrorKind, classify_error
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+CHANNEL_MIN_BALANCE = Decimal("2")
+CHANNEL_STARTING_BALANCE = "5"
+LEASE_TIMEOUT = 60.0
+RECLAIM_DELAY = 30.0
+
+
+class ChannelState(Enum):
+    IDLE = "idle"
+    LEASED = "leased"
+    RECLAIMING = "reclaiming"
+    RETIRED = "retired"
+
+
+@dataclass
+class Channel:
+    keypair: Keypair
+    state: ChannelState = ChannelState.IDLE
+    lease_id: int = 0
+    leased_at: Optional[float] = None
+    failures: int = 0
+    holder: Optional[asyncio.Task] = None
+
+    @property
+    def public_key(self) -> str:
+        return self.keypair.public_key
+
+
+class ChannelPool:
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        channel_secrets: Iterable[str] = (),
+        lease_timeout: float = LEASE_TIMEOUT,
+        reclaim_delay: float = RECLAIM_DELAY
+    ) -> None:
+        self.horizon = horizon
+        self.lease_timeout = lease_timeout
+        self.reclaim_delay = reclaim_delay
+        self._channels: Dict[str, Channel] = {}
+        self._idle: asyncio.Queue[Channel] = asyncio.Queue()
+        self._reclaims: Dict[str, asyncio.Task] = {}
+        for secret in channel_secrets:
+            self.add_channel(secret)
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def count(self, state: ChannelState) -> int:
+        return sum(channel.state == state for channel in self._channels.values())
+
+    def add_channel(self, secret: str) -> Channel:
+        keypair = Keypair.from_secret(secret)
+        if keypair.public_key not in self._channels:
+            channel = Channel(keypair)
+            self._channels[keypair.public_key] = channel
+            self._idle.put_nowait(channel)
+        return self._channels[keypair.public_key]
+
+    def remove_channel(self, public_key: str) -> None:
+        channel = self._channels.pop(public_key, None)
+        if channel is not None:
+            channel.state = ChannelState.RETIRED
+        reclaim = self._reclaims.pop(public_key, None)
+        if reclaim is not None:
+            reclaim.cancel()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Channel]:
+        channel = await self._acquire()
+        lease_id = channel.lease_id
+        try:
+            yield channel
+        except BaseException as ex:
+            if channel.lease_id == lease_id:
+                if self._outcome_unknown(ex):
+                    # A transação pode entrar até o fim do timeout: o canal espera antes de voltar
+                    channel.failures += 1
+                    self._reclaim(channel)
+                else:
+                    # Horizon respondeu ou nada foi enviado: basta ressincronizar e devolver o canal
+                    self.horizon.sequences.resync(channel.public_key)
+                    self._release(channel, lease_id)
+            raise
+        else:
+            channel.failures = 0
+            self._release(channel, lease_id)
+
+    async def check_health(self, min_balance: Decimal = CHANNEL_MIN_BALANCE) -> Dict[str, bool]:
+        channels = list(self._channels.values())
+        results = await asyncio.gather(
+            *(self._check_balance(channel, min_balance) for channel in channels)
+        )
+        for channel, healthy in zip(channels, results):
+            if channel.state == ChannelState.IDLE and not healthy:
+                channel.state = ChannelState.RETIRED
+            elif channel.state == ChannelState.RETIRED and healthy:
+                self._make_idle(channel)
+        return {channel.public_key: healthy for channel, healthy in zip(channels, results)}
+
+    async def create_channels(
+        self,
+        funding_secret: str,
+        count: int,
+        starting_balance: str = CHANNEL_STARTING_BALANCE
+    ) -> List[Keypair]:
+        from app.core.services import TransactionProcessor
+
+        processor = TransactionProcessor(self.horizon)
+        funding_keypair = Keypair.from_secret(funding_secret)
+        keypairs = [Keypair.random() for _ in range(count)]
+        for start in range(0, count, 100):
+            rows = [
+                PayoutRow(keypair.public_key, starting_balance, OperationType.CREATE_ACCOUNT)
+                for keypair in keypairs[start:start + 100]
+            ]
+            await processor.submit_batch(funding_keypair, rows)
+        for keypair in keypairs:
+            self.add_channel(keypair.secret)
+        return keypairs
+
+    def close(self) -> None:
+        for reclaim in self._reclaims.values():
+            reclaim.cancel()
+        self._reclaims.clear()
+
+    async def _acquire(self) -> Channel:
+        while True:
+            if not self._channels:
+                raise ValueError("Nenhum canal disponível")
+            if all(channel.state == ChannelState.RETIRED for channel in self._channels.values()):
+                # Nenhum canal volta sozinho para a fila: esperar aqui seria para sempre
+                raise ValueError("Todos os canais foram aposentados; verifique o saldo deles")
+            self._reclaim_expired_leases()
+            try:
+                channel = await asyncio.wait_for(self._idle.get(), self.lease_timeout)
+            except asyncio.TimeoutError:
+                continue
+            if channel.state == ChannelState.IDLE and channel.public_key in self._channels:
+                channel.state = ChannelState.LEASED
+                channel.lease_id += 1
+                channel.leased_at = time.monotonic()
+                channel.holder = asyncio.current_task()
+                return channel
+
+    def _release(self, channel: Channel, lease_id: int) -> None:
+        if channel.state == ChannelState.LEASED and channel.lease_id == lease_id:
+            self._make_idle(channel)
+
+    def _make_idle(self, channel: Channel) -> None:
+        channel.leased_at = None
+        channel.holder = None
+        if channel.public_key in self._channels:
+            channel.state = ChannelState.IDLE
+            self._idle.put_nowait(channel)
+
+    @staticmethod
+    def _outcome_unknown(ex: BaseException) -> bool:
+        if isinstance(ex, (SubmissionPending, asyncio.CancelledError)):
+            return True
+        return isinstance(ex, Exception) and classify_error(ex) is SubmitErrorKind.UNKNOWN
+
+    def _reclaim(self, channel: Channel) -> None:
+        channel.state = ChannelState.RECLAIMING
+        channel.lease_id += 1
+        channel.leased_at = None
+        channel.holder = None
+        if channel.public_key not in self._reclaims:
+            self._reclaims[channel.public_key] = asyncio.create_task(self._resync_later(channel))
+
+    def _reclaim_expired_leases(self) -> None:
+        # Só recupera concessões abandonadas: enquanto quem segura o canal estiver vivo, o envio
+        # dele ainda pode usar a sequência, e entregá-la a outro geraria duas transações no mesmo número
+        now = time.monotonic()
+        for channel in self._channels.values():
+            if channel.holder is not None and not channel.holder.done():
+                continue
+            if channel.leased_at is not None and now - channel.leased_at > self.lease_timeout:
+                channel.failures += 1
+                self._reclaim(channel)
+
+    async def _resync_later(self, channel: Channel) -> None:
+        # Sem resposta do Horizon a transação pode entrar até o fim do timeout,
+        # então só reaproveitamos o canal depois que ela com certeza expirou
+        try:
+            await asyncio.sleep(self.reclaim_delay)
+            self.horizon.sequences.resync(channel.public_key)
+            if await self._check_balance(channel, CHANNEL_MIN_BALANCE):
+                self._make_idle(channel)
+            else:
+                channel.state = ChannelState.RETIRED
+                # Acorda quem espera na fila para que perceba se não sobrou canal nenhum
+                self._idle.put_nowait(channel)
+        finally:
+            self._reclaims.pop(channel.public_key, None)
+
+    async def _check_balance(self, channel: Channel, min_balance: Decimal) -> bool:
+        self.horizon.accounts.invalidate(channel.public_key)
+        try:
+            account = await self.horizon.accounts.get(channel.public_key)
+        except Exception:
+            return False
+        native = next(
+            (balance["balance"] for balance in account.get("balances", [])
+             if balance.get("asset_type") == "native"),
+            "0"
+        )
+        return Decimal(native) >= min_balance
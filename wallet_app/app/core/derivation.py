@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import struct
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Deque, Iterator, List, Optional, Tuple
+from mnemonic.mnemonic import PBKDF2_ROUNDS
+from stellar_sdk import Keypair, exceptions
+from stellar_sdk.sep.mnemonic import Language, StellarMnemonic
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+DERIVATION_CHUNK_SIZE = 5000
+GAP_LIMIT = 20
+SCAN_CONCURRENCY = 20
+
+
+@dataclass
+class DerivedAccount:
+    index: int
+    public_key: str
+    secret: str = field(default="", repr=False)
+
+
+def _child_node(key: bytes, chain_code: bytes, index: int) -> Tuple[bytes, bytes]:
+    data = b"\x00" + key + struct.pack(">I", StellarMnemonic.FIRST_HARDENED_INDEX + index)
+    digest = hmac.new(chain_code, data, hashlib.sha512).digest()
+    return digest[:32], digest[32:]
+
+
+def _derive_chunk(key: bytes, chain_code: bytes, start: int, stop: int, include_secret: bool) -> List[DerivedAccount]:
+    accounts = []
+    for index in range(start, stop):
+        seed, _ = _child_node(key, chain_code, index)
+        keypair = Keypair.from_raw_ed25519_seed(seed)
+        accounts.append(DerivedAccount(index, keypair.public_key, keypair.secret if include_secret else ""))
+    return accounts
+
+
+class HDWallet:
+    def __init__(
+        self,
+        mnemonic_phrase: str,
+        passphrase: str = "",
+        language: str | Language = Language.ENGLISH
+    ) -> None:
+        mnemonic = StellarMnemonic(language)
+        if not mnemonic.check(mnemonic_phrase):
+            raise ValueError("Frase mnemônica inválida")
+        # O PBKDF2 roda uma única vez; guardamos só o nó m/44'/148' para derivar os índices
+        seed = hashlib.pbkdf2_hmac(
+            "sha512",
+            mnemonic.normalize_string(mnemonic_phrase).encode("utf-8"),
+            ("mnemonic" + mnemonic.normalize_string(passphrase)).encode("utf-8"),
+            PBKDF2_ROUNDS,
+        )
+        digest = hmac.new(StellarMnemonic.SEED_MODIFIER, seed, hashlib.sha512).digest()
+        key, chain_code = digest[:32], digest[32:]
+        for index in (44, 148):
+            key, chain_code = _child_node(key, chain_code, index)
+        self._key = bytearray(key)
+        self._chain_code = bytearray(chain_code)
+
+    def __enter__(self) -> "HDWallet":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.wipe()
+
+    def __del__(self) -> None:
+        self.wipe()
+
+    def __repr__(self) -> str:
+        return "<HDWallet>"
+
+    def wipe(self) -> None:
+        for buffer in (getattr(self, "_key", None), getattr(self, "_chain_code", None)):
+            if buffer is not None:
+                buffer[:] = bytes(len(buffer))
+
+    def derive(self, index: int) -> Keypair:
+        key, chain_code = self._node()
+        seed, _ = _child_node(key, chain_code, index)
+        return Keypair.from_raw_ed25519_seed(seed)
+
+    def derive_range(
+        self,
+        start: int,
+        stop: int,
+        include_secret: bool = False,
+        workers: Optional[int] = None,
+        chunk_size: int = DERIVATION_CHUNK_SIZE
+    ) -> Iterator[List[DerivedAccount]]:
+        key, chain_code = self._node()
+        if stop - start <= chunk_size:
+            yield _derive_chunk(key, chain_code, start, stop, include_secret)
+            return
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: Deque[Future] = deque()
+            for chunk_start in range(start, stop, chunk_size):
+                chunk_stop = min(chunk_start + chunk_size, stop)
+                pending.append(
+                    executor.submit(_derive_chunk, key, chain_code, chunk_start, chunk_stop, include_secret)
+                )
+                if len(pending) >= workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _node(self) -> Tuple[bytes, bytes]:
+        if not any(self._chain_code):
+            raise ValueError("Carteira HD já foi apagada da memória")
+        return bytes(self._key), bytes(self._chain_code)
+
+
+async def scan_used_accounts(
+    wallet: HDWallet,
+    horizon: "HorizonClient",
+    gap_limit: int = GAP_LIMIT,
+    concurrency: int = SCAN_CONCURRENCY
+) -> AsyncIterator[DerivedAccount]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def exists(account: DerivedAccount) -> bool:
+        async with semaphore:
+            try:
+                await horizon.server.accounts().account_id(account.public_key).call()
+                return True
+            except exceptions.NotFoundError:
+                return False
+
+    # Para quando encontrar gap_limit índices seguidos sem conta na rede
+    last_used = -1
+    start = 0
+    while start <= last_used + gap_limit:
+        stop = last_used + gap_limit + 1
+        window = next(wallet.derive_range(start, stop, chunk_size=stop - start))
+        found = await asyncio.gather(*(exists(account) for account in window))
+        for account, used in zip(window, found):
+            if used:
+                last_used = account.index
+                yield account
+        start = stop
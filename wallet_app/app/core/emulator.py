@@ -0,0 +1,733 @@
+import asyncio
+import base64
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from fractions import Fraction
+from typing import Any, Dict, List, Optional, Tuple
+from aiohttp import web
+from stellar_sdk import Keypair, Network, TransactionEnvelope, exceptions
+from stellar_sdk.operation import CreateAccount, ManageData, Payment
+
+EMULATOR_HOST = "127.0.0.1"
+EMULATOR_PORT = 8000
+BASE_FEE = 100
+BASE_RESERVE = 5_000_000
+STROOPS_PER_XLM = 10_000_000
+FEE_STATS_LEDGERS = 5
+PAGE_LIMIT = 10
+MAX_PAGE_LIMIT = 200
+PERCENTILES = (10, 20, 30, 40, 50, 60, 70, 80, 90, 95, 99)
+PAYMENT_TYPES = ("create_account", "payment")
+ORDER_BOOK_SPREAD = Fraction(1, 100)
+RATE_LIMIT_WINDOW = 3600
+
+
+def _token_key(token: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in token.split("-"))
+
+
+def to_stroops(amount: str | Decimal) -> int:
+    return int(Decimal(amount) * STROOPS_PER_XLM)
+
+
+def to_amount(stroops: int) -> str:
+    return f"{stroops // STROOPS_PER_XLM}.{stroops % STROOPS_PER_XLM:07d}"
+
+
+@dataclass
+class EmulatedAccount:
+    account_id: str
+    balance: int
+    sequence: int
+    data: Dict[str, str] = field(default_factory=dict)
+    last_modified_ledger: int = 0
+    trustlines: Dict[str, int] = field(default_factory=dict)
+    pool_shares: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def min_balance(self) -> int:
+        return (2 + len(self.data) + len(self.trustlines) + 2 * len(self.pool_shares)) * BASE_RESERVE
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "id": self.account_id,
+            "account_id": self.account_id,
+            "sequence": str(self.sequence),
+            "subentry_count": len(self.data) + len(self.trustlines) + 2 * len(self.pool_shares),
+            "last_modified_ledger": self.last_modified_ledger,
+            "thresholds": {"low_threshold": 0, "med_threshold": 0, "high_threshold": 0},
+            "flags": {"auth_required": False, "auth_revocable": False, "auth_immutable": False},
+            "balances": [*self._trustline_balances(), {
+                "balance": to_amount(self.balance),
+                "buying_liabilities": "0.0000000",
+                "selling_liabilities": "0.0000000",
+                "asset_type": "native",
+            }],
+            "signers": [{"weight": 1, "key": self.account_id, "type": "ed25519_public_key"}],
+            "data": dict(self.data),
+            "paging_token": self.account_id,
+        }
+
+    def _trustline_balances(self) -> List[Dict[str, Any]]:
+        balances: List[Dict[str, Any]] = []
+        for pool_id, shares in self.pool_shares.items():
+            balances.append({
+                "balance": to_amount(shares),
+                "limit": "922337203685.4775807",
+                "asset_type": "liquidity_pool_shares",
+                "liquidity_pool_id": pool_id,
+            })
+        for asset, balance in self.trustlines.items():
+            code, _, issuer = asset.partition(":")
+            balances.append({
+                "balance": to_amount(balance),
+                "limit": "922337203685.4775807",
+                "buying_liabilities": "0.0000000",
+                "selling_liabilities": "0.0000000",
+                "asset_type": "credit_alphanum4" if len(code) <= 4 else "credit_alphanum12",
+                "asset_code": code,
+                "asset_issuer": issuer,
+            })
+        return balances
+
+
+class HorizonEmulator:
+    # Ledger em memória que aplica create_account, payment e manage_data de verdade,
+    # com latência e falhas injetáveis para testes de carga sem rede
+    def __init__(
+        self,
+        network_passphrase: str = Network.PUBLIC_NETWORK_PASSPHRASE,
+        base_fee: int = BASE_FEE,
+        capacity_usage: float = 0.5,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        submit_timeout_rate: float = 0.0,
+        rate_limit: int = 0,
+        rate_limit_burst: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> None:
+        self.network_passphrase = network_passphrase
+        self.base_fee = base_fee
+        self.capacity_usage = capacity_usage
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.submit_timeout_rate = submit_timeout_rate
+        # Como o Horizon público: rate_limit pedidos por hora, com rajada de até rate_limit_burst
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst or rate_limit
+        self._rate_tokens = float(self.rate_limit_burst)
+        self._rate_updated = time.monotonic()
+        self.ledger = 1
+        self.accounts: Dict[str, EmulatedAccount] = {}
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self.payments: List[Dict[str, Any]] = []
+        self.operations: List[Dict[str, Any]] = []
+        self.effects: List[Dict[str, Any]] = []
+        self.prices: Dict[Tuple[str, str], Tuple[Fraction, bool]] = {}
+        self.pools: Dict[str, Dict[str, Any]] = {}
+        self._fees: List[Tuple[int, int]] = []
+        self._random = random.Random(seed)
+        self._closed: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._runner: Optional[web.AppRunner] = None
+        self.app = web.Application(middlewares=[self._inject_faults])
+        self.app.add_routes([
+            web.get("/accounts/{account_id}", self._get_account),
+            web.get("/payments", self._get_payments),
+            web.get("/accounts/{account_id}/payments", self._get_payments),
+            web.get("/accounts/{account_id}/operations", self._get_operations),
+            web.get("/effects", self._get_effects),
+            web.get("/accounts/{account_id}/effects", self._get_effects),
+            web.get("/fee_stats", self._get_fee_stats),
+            web.get("/order_book", self._get_order_book),
+            web.get("/paths/strict-send", self._get_strict_send_paths),
+            web.get("/liquidity_pools/{pool_id}", self._get_liquidity_pool),
+            web.get("/transactions/{hash}", self._get_transaction),
+            web.post("/transactions", self._post_transaction),
+        ])
+
+    async def __aenter__(self) -> "HorizonEmulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    @property
+    def url(self) -> str:
+        if self._runner is None or not self._runner.addresses:
+            raise ValueError("Emulador não iniciado")
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}"
+
+    def fund(self, public_key: str, balance: str = "10000") -> EmulatedAccount:
+        account = EmulatedAccount(public_key, to_stroops(balance), self.ledger << 32, {}, self.ledger)
+        self.accounts[public_key] = account
+        return account
+
+    def trust(self, public_key: str, asset: str, balance: str = "0") -> None:
+        # Ativos no formato do Horizon, "CODIGO:EMISSOR"
+        self.accounts[public_key].trustlines[asset] = to_stroops(balance)
+
+    def set_price(self, asset: str, price: str, quote: str = "native", order_book: bool = True) -> None:
+        # Sem livro de ofertas, o preço só aparece pela busca de caminhos
+        self.prices[(asset, quote)] = (Fraction(price), order_book)
+
+    def add_pool(self, pool_id: str, reserves: Dict[str, str], total_shares: str) -> None:
+        self.pools[pool_id] = {
+            "id": pool_id,
+            "paging_token": pool_id,
+            "fee_bp": 30,
+            "type": "constant_product",
+            "total_trustlines": "0",
+            "total_shares": to_amount(to_stroops(total_shares)),
+            "reserves": [
+                {"asset": asset, "amount": to_amount(to_stroops(amount))} for asset, amount in reserves.items()
+            ],
+            "last_modified_ledger": self.ledger,
+        }
+
+    def deposit(self, public_key: str, pool_id: str, shares: str) -> None:
+        self.accounts[public_key].pool_shares[pool_id] = to_stroops(shares)
+
+    async def start(self, host: str = EMULATOR_HOST, port: int = 0) -> str:
+        self._stopping = False
+        self._runner = web.AppRunner(self.app, handle_signals=False)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return self.url
+
+    async def close(self) -> None:
+        # Acorda os streams abertos para que o servidor possa encerrar
+        self._stopping = True
+        self._close_ledger()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def submit(self, envelope_xdr: str) -> Tuple[int, Dict[str, Any]]:
+        try:
+            envelope = TransactionEnvelope.from_xdr(envelope_xdr, self.network_passphrase)
+        except Exception:
+            return 400, self._problem(
+                "transaction_malformed", "Transaction Malformed", 400,
+                "Horizon could not decode the transaction envelope.",
+                {"envelope_xdr": envelope_xdr}
+            )
+        tx_hash = envelope.hash_hex()
+        existing = self.transactions.get(tx_hash)
+        if existing is not None and existing["successful"]:
+            return 200, existing
+
+        transaction = envelope.transaction
+        source = self.accounts.get(transaction.source.account_id)
+        codes = self._check_transaction(envelope, source)
+        if codes is not None:
+            return 400, self._failed(envelope_xdr, codes)
+        assert source is not None
+
+        fee = self.base_fee * len(transaction.operations)
+        source.sequence = transaction.sequence
+        source.balance -= fee
+        source.last_modified_ledger = self.ledger + 1
+
+        staged: Dict[str, EmulatedAccount] = {}
+        payments: List[Dict[str, Any]] = []
+        operation_codes = [
+            self._apply(operation, transaction.source.account_id, staged, payments)
+            for operation in transaction.operations
+        ]
+        self.ledger += 1
+        self._fees.append((self.ledger, self.base_fee))
+        successful = all(code == "op_success" for code in operation_codes)
+        if successful:
+            for account in staged.values():
+                account.last_modified_ledger = self.ledger
+                self.accounts[account.account_id] = account
+            for index, operation in enumerate(payments):
+                token = str((self.ledger << 32) | (index + 1))
+                operation.update(id=token, paging_token=token, transaction_hash=tx_hash)
+                self.operations.append(operation)
+                if operation["type"] in PAYMENT_TYPES:
+                    self.payments.append(operation)
+                self.effects.extend(self._effects(operation))
+
+        record = {
+            "id": tx_hash,
+            "paging_token": str(self.ledger << 32),
+            "hash": tx_hash,
+            "ledger": self.ledger,
+            "successful": successful,
+            "source_account": transaction.source.account_id,
+            "source_account_sequence": str(transaction.sequence),
+            "fee_charged": str(fee),
+            "max_fee": str(transaction.fee),
+            "operation_count": len(transaction.operations),
+            "envelope_xdr": envelope_xdr,
+            "created_at": self._now(),
+        }
+        self.transactions[tx_hash] = record
+        self._close_ledger()
+        if not successful:
+            return 400, self._failed(
+                envelope_xdr, {"transaction": "tx_failed", "operations": operation_codes}
+            )
+        return 200, record
+
+    def _check_transaction(
+        self,
+        envelope: TransactionEnvelope,
+        source: Optional[EmulatedAccount]
+    ) -> Optional[Dict[str, str]]:
+        transaction = envelope.transaction
+        if source is None:
+            return {"transaction": "tx_no_source_account"}
+        if transaction.sequence != source.sequence + 1:
+            return {"transaction": "tx_bad_seq"}
+        time_bounds = transaction.preconditions.time_bounds if transaction.preconditions else None
+        if time_bounds is not None and time_bounds.max_time and time.time() > time_bounds.max_time:
+            return {"transaction": "tx_too_late"}
+        if transaction.fee < self.base_fee * len(transaction.operations):
+            return {"transaction": "tx_insufficient_fee"}
+        if source.balance - self.base_fee * len(transaction.operations) < source.min_balance:
+            return {"transaction": "tx_insufficient_balance"}
+        signers = {transaction.source.account_id} | {
+            operation.source.account_id for operation in transaction.operations if operation.source
+        }
+        if not all(self._is_signed(envelope, signer) for signer in signers):
+            return {"transaction": "tx_bad_auth"}
+        return None
+
+    @staticmethod
+    def _is_signed(envelope: TransactionEnvelope, public_key: str) -> bool:
+        keypair = Keypair.from_public_key(public_key)
+        tx_hash = envelope.hash()
+        for signature in envelope.signatures:
+            if signature.signature_hint != keypair.signature_hint():
+                continue
+            try:
+                keypair.verify(tx_hash, signature.signature)
+                return True
+            except exceptions.BadSignatureError:
+                continue
+        return False
+
+    def _apply(
+        self,
+        operation: Any,
+        tx_source: str,
+        staged: Dict[str, EmulatedAccount],
+        payments: List[Dict[str, Any]]
+    ) -> str:
+        def load(account_id: str) -> Optional[EmulatedAccount]:
+            if account_id not in staged:
+                account = self.accounts.get(account_id)
+                if account is None:
+                    return None
+                staged[account_id] = replace(account, data=dict(account.data))
+            return staged[account_id]
+
+        source_id = operation.source.account_id if operation.source else tx_source
+        source = load(source_id)
+        if source is None:
+            return "op_no_source_account"
+
+        if isinstance(operation, CreateAccount):
+            amount = to_stroops(operation.starting_balance)
+            if load(operation.destination) is not None:
+                return "op_already_exists"
+            if amount < 2 * BASE_RESERVE:
+                return "op_low_reserve"
+            if source.balance - amount < source.min_balance:
+                return "op_underfunded"
+            source.balance -= amount
+            staged[operation.destination] = EmulatedAccount(
+                operation.destination, amount, (self.ledger + 1) << 32
+            )
+            payments.append({
+                "type": "create_account",
+                "created_at": self._now(),
+                "source_account": source_id,
+                "funder": source_id,
+                "account": operation.destination,
+                "starting_balance": to_amount(amount),
+            })
+        elif isinstance(operation, Payment):
+            if not operation.asset.is_native():
+                return "op_no_trust"
+            destination = load(operation.destination.account_id)
+            if destination is None:
+                return "op_no_destination"
+            amount = to_stroops(operation.amount)
+            if source.balance - amount < source.min_balance:
+                return "op_underfunded"
+            source.balance -= amount
+            destination.balance += amount
+            payments.append({
+                "type": "payment",
+                "created_at": self._now(),
+                "source_account": source_id,
+                "from": source_id,
+                "to": destination.account_id,
+                "amount": to_amount(amount),
+                "asset_type": "native",
+            })
+        elif isinstance(operation, ManageData):
+            if operation.data_value is None:
+                if source.data.pop(operation.data_name, None) is None:
+                    return "op_name_not_found"
+            else:
+                if operation.data_name not in source.data and source.balance < source.min_balance + BASE_RESERVE:
+                    return "op_low_reserve"
+                source.data[operation.data_name] = base64.b64encode(operation.data_value).decode()
+            payments.append({
+                "type": "manage_data",
+                "created_at": self._now(),
+                "source_account": source_id,
+                "name": operation.data_name,
+                "value": source.data.get(operation.data_name, ""),
+            })
+        else:
+            return "op_not_supported"
+        return "op_success"
+
+    def _close_ledger(self) -> None:
+        if self._closed is not None:
+            self._closed.set()
+        self._closed = asyncio.Event()
+
+    async def _wait_ledger(self) -> None:
+        if self._closed is None:
+            self._closed = asyncio.Event()
+        await self._closed.wait()
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.rate_limit and not self._take_rate_token():
+            response = self._json(429, self._problem(
+                "rate_limit_exceeded", "Rate Limit Exceeded", 429,
+                "The rate limit for the requesting IP address is over its alloted limit."
+            ))
+            response.headers["Retry-After"] = str(math.ceil((1 - self._rate_tokens) / self._rate))
+            return self._rate_headers(response)
+        if self.error_rate and self._random.random() < self.error_rate:
+            return self._rate_headers(self._json(503, self._problem(
+                "service_unavailable", "Service Unavailable", 503,
+                "The emulator injected a failure for this request."
+            )))
+        return self._rate_headers(await handler(request))
+
+    @property
+    def _rate(self) -> float:
+        return self.rate_limit / RATE_LIMIT_WINDOW
+
+    def _take_rate_token(self) -> bool:
+        now = time.monotonic()
+        self._rate_tokens = min(self.rate_limit_burst, self._rate_tokens + (now - self._rate_updated) * self._rate)
+        self._rate_updated = now
+        if self._rate_tokens < 1:
+            return False
+        self._rate_tokens -= 1
+        return True
+
+    def _rate_headers(self, response: web.StreamResponse) -> web.StreamResponse:
+        # Streams já enviaram os cabeçalhos quando o handler retorna
+        if self.rate_limit and not response.prepared:
+            response.headers["X-Ratelimit-Limit"] = str(self.rate_limit)
+            response.headers["X-Ratelimit-Remaining"] = str(int(self._rate_tokens))
+            response.headers["X-Ratelimit-Reset"] = str(
+                math.ceil((self.rate_limit_burst - self._rate_tokens) / self._rate)
+            )
+        return response
+
+    async def _get_account(self, request: web.Request) -> web.StreamResponse:
+        account_id = request.match_info["account_id"]
+        if self._is_stream(request):
+            return await self._stream_account(request, account_id)
+        account = self.accounts.get(account_id)
+        if account is None:
+            return self._not_found()
+        return self._json(200, account.to_json())
+
+    async def _get_payments(self, request: web.Request) -> web.StreamResponse:
+        # Sem conta na rota, é o stream de pagamentos da rede inteira
+        account_id = request.match_info.get("account_id")
+        if self._is_stream(request):
+            return await self._stream_records(request, self.payments, account_id)
+        return self._page(request, self.payments)
+
+    async def _get_operations(self, request: web.Request) -> web.StreamResponse:
+        return self._page(request, self.operations)
+
+    async def _get_effects(self, request: web.Request) -> web.StreamResponse:
+        if self._is_stream(request):
+            return await self._stream_records(request, self.effects, request.match_info.get("account_id"))
+        return self._page(request, self.effects)
+
+    def _page(self, request: web.Request, records: List[Dict[str, Any]]) -> web.Response:
+        account_id = request.match_info.get("account_id")
+        if account_id is not None and account_id not in self.accounts:
+            return self._not_found()
+        descending = request.query.get("order") == "desc"
+        limit = min(int(request.query.get("limit", PAGE_LIMIT)), MAX_PAGE_LIMIT)
+        page = self._records_after(records, account_id, request.query.get("cursor"), descending)[:limit]
+        links = {"self": {"href": str(request.rel_url)}}
+        if page:
+            next_url = request.rel_url.update_query(cursor=page[-1]["paging_token"])
+            links["next"] = {"href": str(next_url)}
+        return self._json(200, {"_links": links, "_embedded": {"records": page}})
+
+    async def _get_fee_stats(self, request: web.Request) -> web.StreamResponse:
+        recent = sorted(
+            fee for ledger, fee in self._fees if ledger > self.ledger - FEE_STATS_LEDGERS
+        ) or [self.base_fee]
+        fee_charged = {
+            "max": str(recent[-1]),
+            "min": str(recent[0]),
+            "mode": str(max(set(recent), key=recent.count)),
+        }
+        for percentile in PERCENTILES:
+            index = min(len(recent) * percentile // 100, len(recent) - 1)
+            fee_charged[f"p{percentile}"] = str(recent[index])
+        return self._json(200, {
+            "last_ledger": str(self.ledger),
+            "last_ledger_base_fee": str(self.base_fee),
+            "ledger_capacity_usage": str(self.capacity_usage),
+            "fee_charged": fee_charged,
+            "max_fee": dict(fee_charged),
+        })
+
+    async def _get_order_book(self, request: web.Request) -> web.StreamResponse:
+        selling = self._query_asset(request, "selling")
+        buying = self._query_asset(request, "buying")
+        price, listed = self.prices.get((selling, buying), (None, False))
+        bids: List[Dict[str, Any]] = []
+        asks: List[Dict[str, Any]] = []
+        if price is not None and listed:
+            bids.append(self._offer(price * (1 - ORDER_BOOK_SPREAD / 2)))
+            asks.append(self._offer(price * (1 + ORDER_BOOK_SPREAD / 2)))
+        return self._json(200, {
+            "bids": bids,
+            "asks": asks,
+            "base": self._asset_json(selling),
+            "counter": self._asset_json(buying),
+        })
+
+    async def _get_strict_send_paths(self, request: web.Request) -> web.StreamResponse:
+        source = self._query_asset(request, "source")
+        source_amount = to_stroops(request.query.get("source_amount", "0"))
+        records = []
+        for destination in filter(None, request.query.get("destination_assets", "").split(",")):
+            price, _ = self.prices.get((source, destination), (None, False))
+            if price is None:
+                continue
+            records.append({
+                **{f"source_{key}": value for key, value in self._asset_json(source).items()},
+                "source_amount": to_amount(source_amount),
+                **{f"destination_{key}": value for key, value in self._asset_json(destination).items()},
+                "destination_amount": to_amount(int(source_amount * price)),
+                "path": [],
+            })
+        return self._json(200, {"_embedded": {"records": records}})
+
+    async def _get_liquidity_pool(self, request: web.Request) -> web.StreamResponse:
+        pool = self.pools.get(request.match_info["pool_id"])
+        if pool is None:
+            return self._not_found()
+        return self._json(200, pool)
+
+    @staticmethod
+    def _query_asset(request: web.Request, prefix: str) -> str:
+        if request.query.get(f"{prefix}_asset_type", "native") == "native":
+            return "native"
+        return f"{request.query.get(f'{prefix}_asset_code')}:{request.query.get(f'{prefix}_asset_issuer')}"
+
+    @staticmethod
+    def _asset_json(asset: str) -> Dict[str, str]:
+        if asset == "native":
+            return {"asset_type": "native"}
+        code, _, issuer = asset.partition(":")
+        return {
+            "asset_type": "credit_alphanum4" if len(code) <= 4 else "credit_alphanum12",
+            "asset_code": code,
+            "asset_issuer": issuer,
+        }
+
+    @staticmethod
+    def _offer(price: Fraction) -> Dict[str, Any]:
+        price = price.limit_denominator(10 ** 7)
+        return {
+            "price_r": {"n": price.numerator, "d": price.denominator},
+            "price": f"{float(price):.7f}",
+            "amount": "1000000.0000000",
+        }
+
+    async def _get_transaction(self, request: web.Request) -> web.StreamResponse:
+        record = self.transactions.get(request.match_info["hash"])
+        if record is None:
+            return self._not_found()
+        return self._json(200, record)
+
+    async def _post_transaction(self, request: web.Request) -> web.StreamResponse:
+        form = await request.post()
+        status, body = self.submit(str(form.get("tx", "")))
+        if status == 200 and self.submit_timeout_rate and self._random.random() < self.submit_timeout_rate:
+            # Igual ao Horizon: a transação entrou no ledger, mas o cliente só recebe o timeout
+            return self._json(504, self._problem(
+                "timeout", "Timeout", 504,
+                "Your request timed out before completing."
+            ))
+        return self._json(status, body)
+
+    async def _stream_account(self, request: web.Request, account_id: str) -> web.StreamResponse:
+        response = self._stream_response()
+        last_modified = -1
+        try:
+            await self._open_stream(request, response)
+            while not self._stopping:
+                account = self.accounts.get(account_id)
+                if account is not None and account.last_modified_ledger != last_modified:
+                    last_modified = account.last_modified_ledger
+                    await response.write(f"data: {json.dumps(account.to_json())}\n\n".encode())
+                await self._wait_ledger()
+        except ConnectionResetError:
+            pass
+        return response
+
+    async def _stream_records(
+        self,
+        request: web.Request,
+        records: List[Dict[str, Any]],
+        account_id: Optional[str]
+    ) -> web.StreamResponse:
+        response = self._stream_response()
+        cursor = request.query.get("cursor")
+        if cursor == "now":
+            cursor = str((self.ledger + 1) << 32)
+        try:
+            await self._open_stream(request, response)
+            while not self._stopping:
+                for record in self._records_after(records, account_id, cursor, False):
+                    cursor = record["paging_token"]
+                    await response.write(f"id: {cursor}\ndata: {json.dumps(record)}\n\n".encode())
+                await self._wait_ledger()
+        except ConnectionResetError:
+            pass
+        return response
+
+    @staticmethod
+    def _records_after(
+        records: List[Dict[str, Any]],
+        account_id: Optional[str],
+        cursor: Optional[str],
+        descending: bool
+    ) -> List[Dict[str, Any]]:
+        selected = [
+            record for record in records
+            if account_id is None or account_id in (
+                record.get("from"), record.get("to"), record.get("funder"),
+                record.get("account"), record.get("source_account"),
+            )
+        ]
+        if descending:
+            selected.reverse()
+        if cursor:
+            # Tokens de efeitos têm o formato "operação-índice"; comparar como tuplas cobre os dois casos
+            position = _token_key(cursor)
+            selected = [
+                record for record in selected
+                if (_token_key(record["paging_token"]) < position if descending
+                    else _token_key(record["paging_token"]) > position)
+            ]
+        return selected
+
+    def _effects(self, operation: Dict[str, Any]) -> List[Dict[str, Any]]:
+        if operation["type"] == "create_account":
+            changes = [
+                ("account_created", operation["account"], {"starting_balance": operation["starting_balance"]}),
+                ("account_debited", operation["funder"], {"amount": operation["starting_balance"], "asset_type": "native"}),
+            ]
+        elif operation["type"] == "payment":
+            changes = [
+                ("account_credited", operation["to"], {"amount": operation["amount"], "asset_type": "native"}),
+                ("account_debited", operation["from"], {"amount": operation["amount"], "asset_type": "native"}),
+            ]
+        else:
+            changes = [("data_updated", operation["source_account"], {"name": operation["name"]})]
+        effects = []
+        for index, (kind, account, details) in enumerate(changes, start=1):
+            token = f"{operation['paging_token']}-{index}"
+            effects.append({
+                "id": f"{int(operation['paging_token']):019d}-{index:010d}",
+                "paging_token": token,
+                "account": account,
+                "type": kind,
+                "created_at": operation["created_at"],
+                "transaction_hash": operation["transaction_hash"],
+                **details,
+            })
+        return effects
+
+    @staticmethod
+    def _stream_response() -> web.StreamResponse:
+        return web.StreamResponse(headers={
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+        })
+
+    @staticmethod
+    async def _open_stream(request: web.Request, response: web.StreamResponse) -> None:
+        await response.prepare(request)
+        await response.write(b'retry: 1000\nevent: open\ndata: "hello"\n\n')
+
+    @staticmethod
+    def _is_stream(request: web.Request) -> bool:
+        return "text/event-stream" in request.headers.get("Accept", "")
+
+    @staticmethod
+    def _now() -> str:
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+    @staticmethod
+    def _json(status: int, body: Dict[str, Any]) -> web.Response:
+        return web.json_response(body, status=status)
+
+    def _not_found(self) -> web.Response:
+        return self._json(404, self._problem(
+            "not_found", "Resource Missing", 404,
+            "The resource at the url requested was not found."
+        ))
+
+    def _failed(self, envelope_xdr: str, result_codes: Dict[str, Any]) -> Dict[str, Any]:
+        return self._problem(
+            "transaction_failed", "Transaction Failed", 400,
+            "The transaction failed when submitted to the stellar network.",
+            {"envelope_xdr": envelope_xdr, "result_codes": result_codes}
+        )
+
+    @staticmethod
+    def _problem(
+        kind: str,
+        title: str,
+        status: int,
+        detail: str,
+        extras: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        problem: Dict[str, Any] = {
+            "type": f"https://stellar.org/horizon-errors/{kind}",
+            "title": title,
+            "status": status,
+            "detail": detail,
+        }
+        if extras is not None:
+            problem["extras"] = extras
+        return problem
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from app.core.scheduler import background
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+FEE_POLL_INTERVAL = 5.0
+FEE_IDLE_TIMEOUT = 120.0
+FEE_HISTORY_SIZE = 20
+MAX_FEE = 10_000
+SURGE_THRESHOLD = 0.9
+# Falhas seguidas do poller até base_fee deixar de confiar nele e consultar direto
+FEE_POLL_FAILURES = 3
+
+logger = logging.getLogger(__name__)
+
+
+class FeePolicy(Enum):
+    BASE = "base"
+    P50 = "p50"
+    P90 = "p90"
+    P99 = "p99"
+    SURGE = "surge"
+
+
+# Degrau seguinte quando a rede recusa a taxa com tx_insufficient_fee
+NEXT_POLICY = {
+    FeePolicy.BASE: FeePolicy.P50,
+    FeePolicy.P50: FeePolicy.P90,
+    FeePolicy.SURGE: FeePolicy.P90,
+    FeePolicy.P90: FeePolicy.P99,
+    FeePolicy.P99: FeePolicy.P99,
+}
+
+
+@dataclass
+class FeeStats:
+    last_ledger: int
+    base_fee: int
+    capacity_usage: float
+    fee_charged: Dict[str, int]
+    fetched_at: float
+
+    @classmethod
+    def from_response(cls, response: Dict[str, Any]) -> "FeeStats":
+        return cls(
+            last_ledger=int(response["last_ledger"]),
+            base_fee=int(response["last_ledger_base_fee"]),
+            capacity_usage=float(response["ledger_capacity_usage"]),
+            fee_charged={key: int(value) for key, value in response["fee_charged"].items()},
+            fetched_at=time.monotonic(),
+        )
+
+    def percentile(self, name: str) -> int:
+        return max(self.fee_charged.get(name, self.base_fee), self.base_fee)
+
+
+class FeeOracle:
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        interval: float = FEE_POLL_INTERVAL,
+        max_fee: int = MAX_FEE,
+        surge_threshold: float = SURGE_THRESHOLD,
+        history_size: int = FEE_HISTORY_SIZE
+    ) -> None:
+        self.horizon = horizon
+        self.interval = interval
+        self.max_fee = max_fee
+        self.surge_threshold = surge_threshold
+        self.history_size = history_size
+        self.history: OrderedDict[int, FeeStats] = OrderedDict()
+        self._poller: Optional[asyncio.Task] = None
+        self._last_used = 0.0
+        self._poll_failures = 0
+
+    @property
+    def stats(self) -> Optional[FeeStats]:
+        if not self.history:
+            return None
+        return next(reversed(self.history.values()))
+
+    async def base_fee(self, policy: FeePolicy = FeePolicy.SURGE) -> int:
+        self._last_used = time.monotonic()
+        polling = self._poller is not None and not self._poller.done()
+        stats = self.stats
+        # Poller que só falha não atualiza nada: com as estatísticas velhas a consulta passa a ser direta
+        trusted = polling and self._poll_failures < FEE_POLL_FAILURES
+        if stats is None or (not trusted and self._is_stale(stats)):
+            stats = await self.refresh()
+        if not polling:
+            with background("fees"):
+                self._poller = asyncio.create_task(self._poll())
+        return self.select(stats, policy)
+
+    def select(self, stats: FeeStats, policy: FeePolicy) -> int:
+        if policy == FeePolicy.BASE:
+            return stats.base_fee
+        if policy == FeePolicy.SURGE:
+            if stats.capacity_usage < self.surge_threshold:
+                return stats.base_fee
+            return max(min(stats.percentile("p90"), self.max_fee), stats.base_fee)
+        return max(min(stats.percentile(policy.value), self.max_fee), stats.base_fee)
+
+    async def escalate(self, policy: FeePolicy) -> FeePolicy:
+        # A taxa em cache já foi recusada: relê /fee_stats e sobe um degrau, sempre limitado a max_fee
+        await self.refresh()
+        return NEXT_POLICY[policy]
+
+    async def refresh(self) -> FeeStats:
+        response = await self.horizon.server.fee_stats().call()
+        stats = FeeStats.from_response(response)
+        self.history[stats.last_ledger] = stats
+        self.history.move_to_end(stats.last_ledger)
+        while len(self.history) > self.history_size:
+            self.history.popitem(last=False)
+        return stats
+
+    def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    def _is_stale(self, stats: FeeStats) -> bool:
+        return time.monotonic() - stats.fetched_at > self.interval
+
+    async def _poll(self) -> None:
+        # Para de consultar /fee_stats quando ninguém pede taxa por um tempo
+        while time.monotonic() - self._last_used < FEE_IDLE_TIMEOUT:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as ex:
+                self._poll_failures += 1
+                self.horizon.metrics.increment("fees.poll_failures")
+                logger.warning("Falha ao consultar /fee_stats (%d seguidas): %s", self._poll_failures, ex)
+            else:
+                self._poll_failures = 0
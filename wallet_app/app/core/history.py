@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Sequence
+
+from app.core.scheduler import background
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+HISTORY_DB_ENV = "NEBULOSA_HISTORY_DB"
+HISTORY_DB_PATH = Path.home() / ".nebulosa" / "history.sqlite3"
+HISTORY_KINDS = ("payments", "operations", "effects")
+SYNC_PAGE_SIZE = 200
+QUERY_LIMIT = 50
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    horizon TEXT NOT NULL,
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    paging_token TEXT NOT NULL,
+    type TEXT,
+    created_at TEXT,
+    transaction_hash TEXT,
+    data TEXT NOT NULL,
+    UNIQUE (horizon, account, kind, id)
+);
+CREATE INDEX IF NOT EXISTS records_by_account ON records (horizon, account, kind, seq);
+CREATE INDEX IF NOT EXISTS records_by_hash ON records (transaction_hash);
+CREATE TABLE IF NOT EXISTS cursors (
+    horizon TEXT NOT NULL,
+    account TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    cursor TEXT NOT NULL,
+    PRIMARY KEY (horizon, account, kind)
+);
+"""
+
+
+class HistoryStore:
+    # Uma conexão protegida por lock; as escritas rodam em threads para não travar o loop
+    _shared: Dict[str, "HistoryStore"] = {}
+
+    def __init__(self, path: Optional[str | Path] = None) -> None:
+        self.path = Path(path or os.environ.get(HISTORY_DB_ENV, HISTORY_DB_PATH))
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    @classmethod
+    def shared(cls, path: Optional[str | Path] = None) -> "HistoryStore":
+        path = str(path or os.environ.get(HISTORY_DB_ENV, HISTORY_DB_PATH))
+        if path not in cls._shared:
+            cls._shared[path] = cls(path)
+        return cls._shared[path]
+
+    def cursor(self, horizon: str, account: str, kind: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT cursor FROM cursors WHERE horizon = ? AND account = ? AND kind = ?",
+                (horizon, account, kind),
+            ).fetchone()
+        return row[0] if row else None
+
+    def append(self, horizon: str, account: str, kind: str, records: Sequence[Dict[str, Any]]) -> int:
+        # Registros e cursor na mesma transação: uma interrupção nunca pula nem repete uma página
+        if not records:
+            return 0
+        rows = [
+            (
+                horizon, account, kind, str(record["id"]), record["paging_token"], record.get("type"),
+                record.get("created_at"), record.get("transaction_hash"), json.dumps(record),
+            )
+            for record in records
+        ]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO records "
+                "(horizon, account, kind, id, paging_token, type, created_at, transaction_hash, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            inserted = self._connection.total_changes - before
+            self._connection.execute(
+                "INSERT OR REPLACE INTO cursors (horizon, account, kind, cursor) VALUES (?, ?, ?, ?)",
+                (horizon, account, kind, records[-1]["paging_token"]),
+            )
+        return inserted
+
+    def records(
+        self,
+        horizon: str,
+        account: str,
+        kind: str = "payments",
+        limit: int = QUERY_LIMIT,
+        before: Optional[int] = None,
+        types: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        # Do mais novo para o mais antigo; "before" é o seq do último registro da página anterior
+        query = "SELECT seq, data FROM records WHERE horizon = ? AND account = ? AND kind = ?"
+        params: List[Any] = [horizon, account, kind]
+        if before is not None:
+            query += " AND seq < ?"
+            params.append(before)
+        if types is not None:
+            types = list(types)
+            query += f" AND type IN ({', '.join('?' * len(types))})"
+            params.extend(types)
+        query += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        return [{**json.loads(data), "seq": seq} for seq, data in rows]
+
+    def count(self, horizon: str, account: str, kind: str = "payments") -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM records WHERE horizon = ? AND account = ? AND kind = ?",
+                (horizon, account, kind),
+            ).fetchone()[0]
+
+    def by_transaction(self, transaction_hash: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT kind, data FROM records WHERE transaction_hash = ? ORDER BY seq",
+                (transaction_hash,),
+            ).fetchall()
+        return [{**json.loads(data), "kind": kind} for kind, data in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+class HistorySync:
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        store: HistoryStore,
+        page_size: int = SYNC_PAGE_SIZE
+    ) -> None:
+        self.horizon = horizon
+        self.store = store
+        self.page_size = page_size
+        self._running: Dict[tuple, asyncio.Future] = {}
+
+    async def sync(self, account: str, kinds: Sequence[str] = HISTORY_KINDS) -> Dict[str, int]:
+        counts = await asyncio.gather(*(self.sync_kind(account, kind) for kind in kinds))
+        return dict(zip(kinds, counts))
+
+    async def sync_kind(self, account: str, kind: str) -> int:
+        # Duas chamadas simultâneas para a mesma conta compartilham a mesma sincronização
+        key = (account, kind)
+        running = self._running.get(key)
+        if running is None:
+            with background("history"):
+                running = self._running[key] = asyncio.ensure_future(self._sync_kind(account, kind))
+            running.add_done_callback(lambda _: self._running.pop(key, None))
+        return await asyncio.shield(running)
+
+    async def _sync_kind(self, account: str, kind: str) -> int:
+        horizon_url = self.horizon.horizon_url
+        cursor = await asyncio.to_thread(self.store.cursor, horizon_url, account, kind)
+        metrics = self.horizon.metrics
+        inserted = 0
+        with metrics.stage(f"history.{kind}"):
+            records = await self._fetch(account, kind, cursor)
+            while records:
+                # A próxima página já é pedida enquanto a atual é gravada
+                prefetch = None
+                if len(records) == self.page_size:
+                    prefetch = asyncio.create_task(self._fetch(account, kind, records[-1]["paging_token"]))
+                try:
+                    inserted += await asyncio.to_thread(self.store.append, horizon_url, account, kind, records)
+                except BaseException:
+                    if prefetch is not None:
+                        prefetch.cancel()
+                    raise
+                if prefetch is None:
+                    break
+                records = await prefetch
+        metrics.increment(f"history.{kind}.records", inserted)
+        return inserted
+
+    async def _fetch(self, account: str, kind: str, cursor: Optional[str]) -> List[Dict[str, Any]]:
+        builder = getattr(self.horizon.server, kind)().for_account(account).order(desc=False).limit(self.page_size)
+        if cursor:
+            builder = builder.cursor(cursor)
+        response = await builder.call()
+        return response["_embedded"]["records"]
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+from stellar_sdk import Network, ServerAsync
+from stellar_sdk.client.aiohttp_client import AiohttpClient
+from stellar_sdk.client.response import Response
+from app.core.cache import AccountCache
+from app.core.fees import FeeOracle
+from app.core.metrics import Metrics
+from app.core.scheduler import RATE_LIMIT_RETRIES, RequestScheduler
+from app.core.sequence import SequenceManager
+from app.core.streams import StreamManager
+from app.core.valuation import PriceOracle
+
+HORIZON_URL = "https://horizon.stellar.org"
+HORIZON_URL_ENV = "NEBULOSA_HORIZON_URL"
+NETWORK_PASSPHRASE_ENV = "NEBULOSA_NETWORK_PASSPHRASE"
+POOL_SIZE = 100
+# Quanto esperar o loop anterior, ainda rodando em outra thread, fechar a sessão dele
+RELEASE_TIMEOUT = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentedClient(AiohttpClient):
+    # Todo GET e POST passa pelo agendador; um 429 espera a pausa pedida e repete, já que nada foi processado
+    def __init__(self, metrics: Metrics, scheduler: Optional[RequestScheduler] = None, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.metrics = metrics
+        self.scheduler = scheduler or RequestScheduler(metrics)
+        self._in_flight: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], asyncio.Future] = {}
+
+    async def get(self, url: str, params: Dict[str, str] = None) -> Response:
+        # GETs idênticos em andamento viram uma única chamada; todos recebem a mesma resposta.
+        # POST fica de fora: cada envio é uma transação diferente
+        key = (url, tuple(sorted((params or {}).items())))
+        pending = self._in_flight.get(key)
+        if pending is None:
+            pending = self._in_flight[key] = asyncio.ensure_future(self._get(url, params))
+            pending.add_done_callback(lambda future: self._finish(key, future))
+        else:
+            self.metrics.increment("horizon.coalesced")
+        return await asyncio.shield(pending)
+
+    async def _get(self, url: str, params: Optional[Dict[str, str]]) -> Response:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await self.scheduler.acquire()
+            with self.metrics.stage("horizon.get"):
+                response = await super().get(url, params)
+            self._count(response)
+            if not self.scheduler.observe(response.status_code, response.headers) or attempt == RATE_LIMIT_RETRIES:
+                break
+        return response
+
+    async def post(self, url: str, data: Dict[str, str] = None, json_data: Dict[str, Any] = None) -> Response:
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await self.scheduler.acquire()
+            self.metrics.increment("horizon.bytes_sent", sum(len(str(value)) for value in (data or {}).values()))
+            with self.metrics.stage("horizon.post"):
+                response = await super().post(url, data, json_data)
+            self._count(response)
+            if not self.scheduler.observe(response.status_code, response.headers) or attempt == RATE_LIMIT_RETRIES:
+                break
+        return response
+
+    def forget(self, path: str) -> None:
+        # Depois de uma escrita, quem pedir de novo não pode herdar uma leitura iniciada antes dela
+        for key in [key for key in self._in_flight if key[0].endswith(path)]:
+            del self._in_flight[key]
+
+    def _finish(self, key: Tuple[str, Tuple[Tuple[str, str], ...]], future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    def _count(self, response: Response) -> None:
+        self.metrics.increment("horizon.requests")
+        self.metrics.increment("horizon.bytes_received", len(response.text))
+        if response.status_code >= 400:
+            self.metrics.increment(f"horizon.status_{response.status_code}")
+
+
+class HorizonClient:
+    _shared: Dict[str, "HorizonClient"] = {}
+
+    def __init__(
+        self,
+        horizon_url: Optional[str] = None,
+        network_passphrase: Optional[str] = None,
+        pool_size: int = POOL_SIZE
+    ) -> None:
+        # Sem argumentos, o servidor vem do ambiente para permitir apontar para o emulador local
+        self.horizon_url = horizon_url or os.environ.get(HORIZON_URL_ENV, HORIZON_URL)
+        self.network_passphrase = network_passphrase or os.environ.get(
+            NETWORK_PASSPHRASE_ENV, Network.PUBLIC_NETWORK_PASSPHRASE
+        )
+        self.pool_size = pool_size
+        self.metrics = Metrics()
+        self._server: Optional[ServerAsync] = None
+        self._accounts: Optional[AccountCache] = None
+        self._fees: Optional[FeeOracle] = None
+        self._sequences: Optional[SequenceManager] = None
+        self._prices: Optional[PriceOracle] = None
+        self._streams: Optional[StreamManager] = None
+        self._scheduler: Optional[RequestScheduler] = None
+        self._client: Optional[InstrumentedClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def shared(cls, horizon_url: Optional[str] = None) -> "HorizonClient":
+        horizon_url = horizon_url or os.environ.get(HORIZON_URL_ENV, HORIZON_URL)
+        if horizon_url not in cls._shared:
+            cls._shared[horizon_url] = cls(horizon_url)
+        return cls._shared[horizon_url]
+
+    def _bind_loop(self) -> None:
+        # A sessão aiohttp e os streams ficam presos ao loop em que foram criados
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._release_loop()
+            self._scheduler = RequestScheduler(self.metrics)
+            self._client = InstrumentedClient(self.metrics, self._scheduler, pool_size=self.pool_size)
+            self._server = ServerAsync(self.horizon_url, client=self._client)
+            self._accounts = AccountCache(self)
+            self._fees = FeeOracle(self)
+            self._sequences = SequenceManager(self)
+            self._prices = PriceOracle(self)
+            self._streams = StreamManager(self)
+            self._loop = loop
+
+    @property
+    def server(self) -> ServerAsync:
+        self._bind_loop()
+        assert self._server is not None
+        return self._server
+
+    @property
+    def client(self) -> InstrumentedClient:
+        self._bind_loop()
+        assert self._client is not None
+        return self._client
+
+    @property
+    def scheduler(self) -> RequestScheduler:
+        self._bind_loop()
+        assert self._scheduler is not None
+        return self._scheduler
+
+    @property
+    def accounts(self) -> AccountCache:
+        self._bind_loop()
+        assert self._accounts is not None
+        return self._accounts
+
+    @property
+    def fees(self) -> FeeOracle:
+        self._bind_loop()
+        assert self._fees is not None
+        return self._fees
+
+    @property
+    def sequences(self) -> SequenceManager:
+        self._bind_loop()
+        assert self._sequences is not None
+        return self._sequences
+
+    @property
+    def prices(self) -> PriceOracle:
+        self._bind_loop()
+        assert self._prices is not None
+        return self._prices
+
+    @property
+    def streams(self) -> StreamManager:
+        self._bind_loop()
+        assert self._streams is not None
+        return self._streams
+
+    async def close(self) -> None:
+        if self._loop is asyncio.get_running_loop():
+            await self._shutdown(self._accounts, self._fees, self._streams, self._server)
+        else:
+            self._release_loop()
+        self._server = None
+        self._accounts = None
+        self._fees = None
+        self._sequences = None
+        self._prices = None
+        self._streams = None
+        self._scheduler = None
+        self._client = None
+        self._loop = None
+
+    def _release_loop(self) -> None:
+        # Trocar de loop sem fechar a sessão antiga deixaria as conexões dela abertas para sempre
+        loop, client = self._loop, self._client
+        if loop is None or client is None:
+            return
+        if loop.is_running():
+            # Loop vivo em outra thread: o fechamento roda nele, onde a sessão e os streams foram criados.
+            # A troca espera o fim, senão os componentes antigos se religariam ao loop de lá
+            future = asyncio.run_coroutine_threadsafe(
+                self._shutdown(self._accounts, self._fees, self._streams, self._server), loop
+            )
+            try:
+                future.result(RELEASE_TIMEOUT)
+            except Exception as ex:
+                logger.warning("Sessão do loop anterior não foi fechada: %s", ex)
+            return
+        # Loop parado ou encerrado não roda mais nada; as conexões são soltas na hora, como o aiohttp faz
+        for session in (client._session, client._sse_session):
+            if session is not None and not session.closed:
+                session.connector._close()
+
+    @staticmethod
+    async def _shutdown(
+        accounts: Optional[AccountCache],
+        fees: Optional[FeeOracle],
+        streams: Optional[StreamManager],
+        server: Optional[ServerAsync]
+    ) -> None:
+        if accounts is not None:
+            accounts.clear()
+        if fees is not None:
+            fees.stop()
+        if streams is not None:
+            streams.close()
+        if server is not None:
+            await server.close()
@@ -0,0 +1,109 @@
+import json
+import os
+import struct
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Deque, Dict, Iterator, List, Optional
+import nacl.pwhash
+import nacl.secret
+import nacl.utils
+from stellar_sdk import Keypair
+
+CHUNK_SIZE = 1000
+MAGIC = b"NEBW1"
+KDF_OPSLIMIT = nacl.pwhash.argon2id.OPSLIMIT_INTERACTIVE
+KDF_MEMLIMIT = nacl.pwhash.argon2id.MEMLIMIT_INTERACTIVE
+
+_HEADER = struct.Struct(">QQ")
+_FRAME = struct.Struct(">I")
+
+
+def new_wallet(with_mnemonic: bool = True) -> Dict[str, str]:
+    if not with_mnemonic:
+        keypair = Keypair.random()
+        return {"public_key": keypair.public_key, "private_key": keypair.secret}
+    # A chave é derivada da frase para que o mnemonic realmente recupere a conta
+    mnemonic_phrase = Keypair.generate_mnemonic_phrase()
+    keypair = Keypair.from_mnemonic_phrase(mnemonic_phrase)
+    return {
+        "public_key": keypair.public_key,
+        "private_key": keypair.secret,
+        "mnemonic": mnemonic_phrase
+    }
+
+
+def _generate_chunk(count: int, with_mnemonic: bool) -> List[Dict[str, str]]:
+    return [new_wallet(with_mnemonic) for _ in range(count)]
+
+
+def generate_wallets(
+    count: int,
+    with_mnemonic: bool = True,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[List[Dict[str, str]]]:
+    workers = workers or os.cpu_count() or 1
+    sizes = (min(chunk_size, count - start) for start in range(0, count, chunk_size))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Limita os lotes em andamento para não acumular carteiras na memória
+        pending: Deque[Future] = deque()
+        for size in sizes:
+            pending.append(executor.submit(_generate_chunk, size, with_mnemonic))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class EncryptedWalletWriter:
+    def __init__(self, file: BinaryIO, password: str) -> None:
+        salt = nacl.utils.random(nacl.pwhash.argon2id.SALTBYTES)
+        self._box = nacl.secret.SecretBox(_derive_key(password, salt, KDF_OPSLIMIT, KDF_MEMLIMIT))
+        self._file = file
+        self._file.write(MAGIC + salt + _HEADER.pack(KDF_OPSLIMIT, KDF_MEMLIMIT))
+
+    def write(self, wallets: List[Dict[str, str]]) -> None:
+        payload = "".join(json.dumps(wallet) + "\n" for wallet in wallets).encode()
+        frame = self._box.encrypt(payload)
+        self._file.write(_FRAME.pack(len(frame)) + frame)
+
+
+def read_encrypted_wallets(path: str | Path, password: str) -> Iterator[Dict[str, str]]:
+    with Path(path).open("rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Arquivo de carteiras inválido")
+        salt = file.read(nacl.pwhash.argon2id.SALTBYTES)
+        opslimit, memlimit = _HEADER.unpack(file.read(_HEADER.size))
+        box = nacl.secret.SecretBox(_derive_key(password, salt, opslimit, memlimit))
+        while size_bytes := file.read(_FRAME.size):
+            (size,) = _FRAME.unpack(size_bytes)
+            for line in box.decrypt(file.read(size)).decode().splitlines():
+                yield json.loads(line)
+
+
+def write_wallets(
+    path: str | Path,
+    count: int,
+    password: str,
+    with_mnemonic: bool = True,
+    workers: Optional[int] = None,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[int]:
+    written = 0
+    with Path(path).open("wb") as file:
+        writer = EncryptedWalletWriter(file, password)
+        for wallets in generate_wallets(count, with_mnemonic, workers, chunk_size):
+            writer.write(wallets)
+            written += len(wallets)
+            yield written
+
+
+def _derive_key(password: str, salt: bytes, opslimit: int, memlimit: int) -> bytes:
+    return nacl.pwhash.argon2id.kdf(
+        nacl.secret.SecretBox.KEY_SIZE,
+        password.encode(),
+        salt,
+        opslimit=opslimit,
+        memlimit=memlimit,
+    )
@@ -0,0 +1,231 @@
+import json
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+HISTOGRAM_WINDOW = 1024
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PROMETHEUS_HOST = "127.0.0.1"
+PROMETHEUS_PORT = 9464
+
+_trace: ContextVar[Optional[Dict[str, float]]] = ContextVar("metrics_trace", default=None)
+
+
+@dataclass
+class MetricEvent:
+    kind: str
+    name: str
+    value: float
+    timestamp: float
+
+
+class MetricsSink:
+    def record(self, event: MetricEvent) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class RollingHistogram:
+    # Percentis saem das últimas amostras; count e total acumulam desde o início
+    def __init__(self, window: int = HISTOGRAM_WINDOW) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self._samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percentile: float) -> float:
+        if not self._samples:
+            return 0.0
+        samples = sorted(self._samples)
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": max(self._samples, default=0.0),
+        }
+
+
+class Metrics:
+    def __init__(self, window: int = HISTOGRAM_WINDOW, sinks: Iterable[MetricsSink] = ()) -> None:
+        self.window = window
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.sinks: List[MetricsSink] = list(sinks)
+
+    def add_sink(self, sink: MetricsSink) -> MetricsSink:
+        self.sinks.append(sink)
+        return sink
+
+    def remove_sink(self, sink: MetricsSink) -> None:
+        if sink in self.sinks:
+            self.sinks.remove(sink)
+            sink.close()
+
+    def observe(self, name: str, seconds: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = RollingHistogram(self.window)
+        histogram.observe(seconds)
+        trace = _trace.get()
+        if trace is not None:
+            trace[name] = trace.get(name, 0.0) + seconds
+        self._emit("timing", name, seconds)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + amount
+        self._emit("counter", name, amount)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.increment(f"{name}.errors")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    @contextmanager
+    def trace(self) -> Iterator[Dict[str, float]]:
+        # Junta as etapas de uma única transação, mesmo as medidas em outras camadas
+        timings: Dict[str, float] = {}
+        token = _trace.set(timings)
+        try:
+            yield timings
+        finally:
+            _trace.reset(token)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "stages": {name: histogram.summary() for name, histogram in self.histograms.items()},
+            "counters": dict(self.counters),
+        }
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+        self.sinks.clear()
+
+    def _emit(self, kind: str, name: str, value: float) -> None:
+        if not self.sinks:
+            return
+        event = MetricEvent(kind, name, value, time.time())
+        for sink in self.sinks:
+            sink.record(event)
+
+
+class LoggingSink(MetricsSink):
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.logger = logger or logging.getLogger("nebulosa.metrics")
+        self.level = level
+
+    def record(self, event: MetricEvent) -> None:
+        if event.kind == "timing":
+            self.logger.log(self.level, "%s %.1f ms", event.name, event.value * 1000)
+        else:
+            self.logger.log(self.level, "%s +%g", event.name, event.value)
+
+
+class JsonLinesSink(MetricsSink):
+    def __init__(self, path: str | Path) -> None:
+        self._file = Path(path).open("a", encoding="utf-8")
+
+    def record(self, event: MetricEvent) -> None:
+        self._file.write(json.dumps(asdict(event)) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class PrometheusSink(MetricsSink):
+    # O Prometheus espera histogramas cumulativos, então o sink agrega por conta própria
+    def __init__(
+        self,
+        host: str = PROMETHEUS_HOST,
+        port: int = PROMETHEUS_PORT,
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[str, Tuple[List[int], List[float]]] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def record(self, event: MetricEvent) -> None:
+        with self._lock:
+            if event.kind == "counter":
+                self._counters[event.name] = self._counters.get(event.name, 0) + event.value
+                return
+            counts, totals = self._histograms.setdefault(
+                event.name, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            for index, bound in enumerate(self.buckets):
+                if event.value <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            totals[0] += event.value
+
+    def render(self) -> str:
+        lines = ["# TYPE nebulosa_stage_seconds histogram"]
+        with self._lock:
+            for name, (counts, totals) in sorted(self._histograms.items()):
+                for bound, count in zip(self.buckets, counts):
+                    lines.append(f'nebulosa_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+                lines.append(f'nebulosa_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {counts[-1]}')
+                lines.append(f'nebulosa_stage_seconds_sum{{stage="{name}"}} {totals[0]}')
+                lines.append(f'nebulosa_stage_seconds_count{{stage="{name}"}} {counts[-1]}')
+            for name, value in sorted(self._counters.items()):
+                metric = "nebulosa_" + re.sub(r"[^a-zA-Z0-9_]", "_", name) + "_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def start(self) -> None:
+        if self._server is not None:
+            return
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                body = sink.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
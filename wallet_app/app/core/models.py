@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import Optional, Dict
+from app.core.balances import BalanceSheet
 
 class OperationType(Enum):
     TRANSFER = "transfer"
@@ -12,6 +13,7 @@ class TransactionResult:
     message: str
     operation_type: Optional[OperationType] = None
     hash: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
 
 @dataclass
 class TransactionData:
@@ -31,4 +33,29 @@ class KeyType(Enum):
 class KeyValidationResult:
     type: KeyType
     public_key: str = ""
-    error_message: str = ""
\ No newline at end of file
+    error_message: str = ""
+
+@dataclass
+class AccountBalances:
+    public_key: str
+    balances: BalanceSheet = field(default_factory=BalanceSheet)
+    error_message: str = ""
+
+    @property
+    def success(self) -> bool:
+        return not self.error_message
+
+@dataclass
+class PayoutRow:
+    destination_id: str
+    amount: str
+    operation_type: OperationType = OperationType.TRANSFER
+    asset_type: Optional[str] = "XLM (Nativo)"
+
+@dataclass
+class PayoutResult:
+    index: int
+    destination_id: str
+    success: bool
+    message: str
+    hash: Optional[str] = None
@@ -0,0 +1,223 @@
+import asyncio
+import csv
+import json
+from contextlib import nullcontext
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+from stellar_sdk import Keypair, StrKey, exceptions
+from app.core.models import OperationType, PayoutRow, PayoutResult, TransactionData
+from app.core.scheduler import background
+from app.core.services import TransactionProcessor
+from app.core.submission import SubmissionPending
+
+MAX_OPERATIONS = 100
+PAYOUT_CONCURRENCY = 4
+PAYOUT_RETRIES = 1
+
+PayoutRecord = PayoutRow | TransactionData | Dict[str, Any]
+PayoutBatch = List[Tuple[int, PayoutRow]]
+
+
+def read_payout_rows(path: str | Path) -> Iterator[Dict[str, Any]]:
+    path = Path(path)
+    with path.open(newline="", encoding="utf-8") as file:
+        if path.suffix.lower() == ".jsonl":
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(file)
+
+
+def to_payout_row(record: PayoutRecord) -> PayoutRow:
+    if isinstance(record, PayoutRow):
+        return record
+    if isinstance(record, TransactionData):
+        return PayoutRow(
+            destination_id=record.destination_id,
+            amount=record.amount,
+            operation_type=record.operation_type,
+            asset_type=record.asset_type,
+        )
+    return PayoutRow(
+        destination_id=str(record["destination_id"]).strip(),
+        amount=str(record["amount"]).strip(),
+        operation_type=OperationType(record.get("operation_type") or OperationType.TRANSFER.value),
+        asset_type=record.get("asset_type") or "XLM (Nativo)",
+    )
+
+
+def validate_payout_row(row: PayoutRow) -> Optional[str]:
+    if not StrKey.is_valid_ed25519_public_key(row.destination_id):
+        return "Endereço do destinatário inválido"
+    try:
+        amount = Decimal(row.amount)
+    except InvalidOperation:
+        return "Quantidade inválida"
+    if not amount.is_finite() or amount <= 0 or amount.as_tuple().exponent < -7:
+        return "Quantidade inválida"
+    if row.operation_type == OperationType.TRANSFER and row.asset_type != "XLM (Nativo)":
+        return "Ativo não suportado"
+    return None
+
+
+def operation_result_codes(ex: Exception, count: int) -> Optional[List[str]]:
+    if not isinstance(ex, exceptions.BadRequestError):
+        return None
+    result_codes = (ex.extras or {}).get("result_codes", {})
+    operations = result_codes.get("operations") or []
+    if result_codes.get("transaction") != "tx_failed" or len(operations) != count:
+        return None
+    return operations
+
+
+def describe_error(ex: Exception) -> str:
+    if isinstance(ex, exceptions.BaseHorizonError) and ex.extras:
+        return f"Erro na transação: {ex.extras.get('result_codes', ex.title)}"
+    return f"Erro na transação: {str(ex)}"
+
+
+class PayoutEngine:
+    def __init__(
+        self,
+        processor: TransactionProcessor,
+        source_secret: str,
+        concurrency: int = PAYOUT_CONCURRENCY,
+        memo: Optional[str] = None,
+        batch_size: int = MAX_OPERATIONS
+    ) -> None:
+        self.processor = processor
+        self.source_keypair = Keypair.from_secret(source_secret)
+        self.concurrency = concurrency
+        self.memo = memo
+        self.batch_size = min(batch_size, MAX_OPERATIONS)
+        self._source_lock = asyncio.Lock()
+
+    async def run(self, records: Iterable[PayoutRecord]) -> AsyncIterator[PayoutResult]:
+        batches = self._batches(records)
+        results: asyncio.Queue[Optional[List[PayoutResult]]] = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        async def worker() -> None:
+            for batch, rejected in batches:
+                if rejected:
+                    await results.put(rejected)
+                if batch:
+                    await results.put(await self._submit(batch))
+
+        async def run_workers() -> None:
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                # Erro ao ler ou validar as linhas também encerra o consumo em vez de travá-lo
+                for task in workers:
+                    task.cancel()
+                await results.put(None)
+
+        with background("payouts"):
+            runner = asyncio.create_task(run_workers())
+        try:
+            while (chunk := await results.get()) is not None:
+                for result in chunk:
+                    yield result
+            await runner
+        finally:
+            runner.cancel()
+            while not results.empty():
+                results.get_nowait()
+
+    def _batches(self, records: Iterable[PayoutRecord]) -> Iterator[Tuple[PayoutBatch, List[PayoutResult]]]:
+        batch: PayoutBatch = []
+        rejected: List[PayoutResult] = []
+        for index, record in enumerate(records):
+            try:
+                row = to_payout_row(record)
+                error = validate_payout_row(row)
+            except (KeyError, TypeError, ValueError, AttributeError) as ex:
+                rejected.append(PayoutResult(index, "", False, f"Linha inválida: {str(ex)}"))
+                continue
+            if error:
+                rejected.append(PayoutResult(index, row.destination_id, False, error))
+            else:
+                batch.append((index, row))
+            if len(batch) == self.batch_size:
+                yield batch, rejected
+                batch, rejected = [], []
+        if batch or rejected:
+            yield batch, rejected
+
+    async def _submit(self, batch: PayoutBatch) -> List[PayoutResult]:
+        results: List[PayoutResult] = []
+        pending = batch
+        retries = PAYOUT_RETRIES
+        try:
+            pending = await self._reject_memo_required(pending, results)
+        except Exception as ex:
+            return results + self._fail(pending, describe_error(ex))
+
+        while pending:
+            try:
+                # Os destinos que exigem memo já saíram do lote em _reject_memo_required
+                async with self._sequence_slot():
+                    response = await self.processor.submit_batch(
+                        self.source_keypair, [row for _, row in pending], self.memo, check_memo=False
+                    )
+            except SubmissionPending as ex:
+                # Reenviar o lote arriscaria pagar duas vezes; o hash permite conferir depois
+                return results + [
+                    PayoutResult(index, row.destination_id, False, "Resultado incerto; confira o hash", ex.hash)
+                    for index, row in pending
+                ]
+            except Exception as ex:
+                codes = operation_result_codes(ex, len(pending))
+                if codes is None:
+                    return results + self._fail(pending, describe_error(ex))
+                # Uma operação inválida derruba o lote inteiro; reenviamos só as válidas
+                retry: PayoutBatch = []
+                for item, code in zip(pending, codes):
+                    if code == "op_success":
+                        retry.append(item)
+                    else:
+                        results.extend(self._fail([item], f"Operação rejeitada: {code}"))
+                if retries == 0:
+                    return results + self._fail(retry, "Lote rejeitado por outra operação")
+                retries -= 1
+                self.processor.horizon.metrics.increment("payout_retries")
+                pending = retry
+                continue
+
+            results.extend(
+                PayoutResult(index, row.destination_id, True, "Pagamento enviado", response["hash"])
+                for index, row in pending
+            )
+            break
+        return results
+
+    async def _reject_memo_required(self, batch: PayoutBatch, results: List[PayoutResult]) -> PayoutBatch:
+        if self.memo:
+            return batch
+        transfers = [
+            row.destination_id for _, row in batch
+            if row.operation_type == OperationType.TRANSFER
+        ]
+        required = await asyncio.gather(*(self.processor.requires_memo(key) for key in transfers))
+        memo_required = {key for key, needed in zip(transfers, required) if needed}
+        accepted: PayoutBatch = []
+        for index, row in batch:
+            if row.destination_id in memo_required:
+                results.append(PayoutResult(index, row.destination_id, False, "A conta de destino exige um memo"))
+            else:
+                accepted.append((index, row))
+        return accepted
+
+    def _sequence_slot(self) -> AsyncContextManager[Any]:
+        # Sem pool de canais todos os lotes usam a sequência da origem: um lote recusado ou expirado
+        # deixaria um buraco e os que já estão no ar cairiam em tx_bad_seq, então saem um de cada vez
+        if self.processor.channels is None:
+            return self._source_lock
+        return nullcontext()
+
+    @staticmethod
+    def _fail(batch: PayoutBatch, message: str) -> List[PayoutResult]:
+        return [PayoutResult(index, row.destination_id, False, message) for index, row in batch]
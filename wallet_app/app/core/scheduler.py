@@ -0,0 +1,164 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import ContextManager, Deque, Dict, Iterator, Mapping, Optional, Tuple
+from app.core.metrics import Metrics
+
+# O Horizon público anuncia um limite por hora em X-Ratelimit-Limit
+RATE_LIMIT_WINDOW = 3600.0
+RATE_LIMIT_RETRIES = 3
+RETRY_AFTER_DEFAULT = 1.0
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_lane: ContextVar[Tuple[Priority, str]] = ContextVar(
+    "scheduler_lane", default=(Priority.INTERACTIVE, "interactive")
+)
+
+
+@contextmanager
+def lane(priority: Priority, caller: str) -> Iterator[None]:
+    # Tarefas criadas dentro do bloco herdam a fila: basta envolver o create_task
+    token = _lane.set((priority, caller))
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def background(caller: str = "background") -> ContextManager[None]:
+    return lane(Priority.BACKGROUND, caller)
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[float]:
+    value = headers.get(name)
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RequestScheduler:
+    # Balde de fichas dimensionado pelos cabeçalhos X-Ratelimit-*; enquanto o servidor não anuncia
+    # limite, nada espera. Na fila, interativo passa na frente e cada chamador recebe uma ficha por vez
+    def __init__(self, metrics: Metrics, window: float = RATE_LIMIT_WINDOW) -> None:
+        self.metrics = metrics
+        self.window = window
+        self.limit: Optional[int] = None
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queues: Dict[Priority, OrderedDict[str, Deque[asyncio.Future]]] = {
+            priority: OrderedDict() for priority in Priority
+        }
+        self._waiting = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def rate(self) -> float:
+        return self.limit / self.window if self.limit else 0.0
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self) -> None:
+        if not self._waiting and self._take():
+            return
+        priority, caller = _lane.get()
+        future = asyncio.get_running_loop().create_future()
+        self._queues[priority].setdefault(caller, deque()).append(future)
+        self._waiting += 1
+        self.metrics.increment(f"scheduler.queued.{priority.name.lower()}")
+        self._dispatch()
+        try:
+            with self.metrics.stage("scheduler.wait"):
+                await future
+        except asyncio.CancelledError:
+            queue = self._queues[priority].get(caller)
+            if queue is not None and future in queue:
+                queue.remove(future)
+                self._waiting -= 1
+                if not queue:
+                    del self._queues[priority][caller]
+            elif future.done() and not future.cancelled() and self.limit is not None:
+                # A ficha já tinha sido entregue: volta para o balde
+                self.tokens += 1
+            self._dispatch()
+            raise
+
+    def observe(self, status_code: int, headers: Mapping[str, str]) -> bool:
+        # Devolve True quando a resposta foi 429 e o pedido deve ser repetido depois da pausa
+        headers = {name.lower(): value for name, value in headers.items()}
+        limit = _header(headers, "x-ratelimit-limit")
+        remaining = _header(headers, "x-ratelimit-remaining")
+        if limit:
+            self._refill()
+            if self.limit is None:
+                self.tokens = limit
+            self.limit = int(limit)
+        if remaining is not None and self.limit is not None:
+            self._refill()
+            self.tokens = min(self.tokens, remaining)
+        if status_code != 429:
+            return False
+        retry_after = _header(headers, "retry-after") or _header(headers, "x-ratelimit-reset") or RETRY_AFTER_DEFAULT
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        self.tokens = min(self.tokens, 0.0)
+        self.metrics.increment("scheduler.throttled")
+        return True
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        if self.limit is not None:
+            self.tokens = min(float(self.limit), self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _take(self) -> bool:
+        if time.monotonic() < self._paused_until:
+            return False
+        if self.limit is None:
+            return True
+        self._refill()
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def _next(self) -> Optional[asyncio.Future]:
+        for queues in self._queues.values():
+            while queues:
+                caller, queue = next(iter(queues.items()))
+                future = queue.popleft()
+                if queue:
+                    queues.move_to_end(caller)
+                else:
+                    del queues[caller]
+                self._waiting -= 1
+                if not future.done():
+                    return future
+        return None
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._waiting and self._take():
+            future = self._next()
+            if future is None:
+                # Só havia pedidos cancelados: a ficha tirada volta
+                if self.limit is not None:
+                    self.tokens += 1
+                break
+            future.set_result(None)
+        if self._waiting:
+            now = time.monotonic()
+            delay = max(self._paused_until - now, (1 - self.tokens) / self.rate if self.rate else 0.0)
+            self._timer = asyncio.get_running_loop().call_later(max(delay, 0.001), self._dispatch)
@@ -0,0 +1,40 @@
+import asyncio
+from typing import TYPE_CHECKING, Dict
+from stellar_sdk import Account, exceptions
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+
+def is_bad_sequence(ex: Exception) -> bool:
+    if not isinstance(ex, exceptions.BadRequestError):
+        return False
+    result_codes = (ex.extras or {}).get("result_codes", {})
+    return result_codes.get("transaction") == "tx_bad_seq"
+
+
+class SequenceManager:
+    def __init__(self, horizon: "HorizonClient") -> None:
+        self.horizon = horizon
+        self._sequences: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def __contains__(self, public_key: str) -> bool:
+        return public_key in self._sequences
+
+    async def next_account(self, public_key: str) -> Account:
+        # O TransactionBuilder usa sequence + 1, então guardamos o último número entregue
+        async with self._locks.setdefault(public_key, asyncio.Lock()):
+            if public_key not in self._sequences:
+                account = await self.horizon.accounts.load_account(public_key)
+                self._sequences[public_key] = account.sequence
+            sequence = self._sequences[public_key]
+            self._sequences[public_key] = sequence + 1
+            return Account(public_key, sequence)
+
+    def resync(self, public_key: str) -> None:
+        self._sequences.pop(public_key, None)
+        self.horizon.accounts.invalidate(public_key)
+
+    def clear(self) -> None:
+        self._sequences.clear()
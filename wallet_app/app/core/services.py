@@ -1,15 +1,64 @@
-from stellar_sdk import (Server, Keypair, TransactionBuilder, Network, Asset, Account, exceptions)
-from app.core.models import TransactionData, TransactionResult, OperationType, KeyType, KeyValidationResult
+from stellar_sdk import (Keypair, TransactionBuilder, Asset, Account, exceptions)
+from app.core.models import TransactionData, TransactionResult, OperationType, KeyType, KeyValidationResult, AccountBalances, PayoutRow
+from app.core.horizon import HorizonClient
+from app.core.balances import AssetTable, BalanceSheet
+from app.core.scheduler import background
+from app.core.streams import BalanceSubscription
+from app.core.fees import FeePolicy
+from app.core.submission import (
+    SEQUENCE_SPENT_CODES, SubmissionPending, TransactionSubmitter, is_rebuildable, transaction_code
+)
+from app.core.channels import ChannelPool
+from app.core.keygen import new_wallet
+from app.core.strkey import VALIDATION_CHUNK_SIZE, key_validator, keypair_from_secret
 import asyncio
-from typing import Dict, Any, List
+from itertools import islice
+from typing import Dict, Any, List, Iterable, Iterator, AsyncIterator, Awaitable, Optional, Sequence, Tuple
+
+FETCH_CONCURRENCY = 20
+SEQUENCE_RETRIES = 1
+MEMO_REQUIRED_KEY = "config.memo_required"
+MEMO_REQUIRED_VALUE = "MQ=="
+
+
+class TransactionRejected(ValueError):
+    # Recusa de validação: a mensagem vai direto ao usuário
+    pass
+
+
+async def run_stages(horizon: HorizonClient, stages: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+    # Estágios independentes correm juntos; a primeira falha cancela os que ainda estão em andamento
+    async def run(name: str, stage: Awaitable[Any]) -> Any:
+        with horizon.metrics.stage(name):
+            return await stage
+
+    tasks = {name: asyncio.ensure_future(run(name, stage)) for name, stage in stages.items()}
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}
+
 
 class TransactionProcessor:
-    def __init__(self, server: Server):
-        self.server = server
+    def __init__(
+        self,
+        horizon: HorizonClient,
+        fee_policy: FeePolicy = FeePolicy.SURGE,
+        channels: Optional[ChannelPool] = None,
+        submitter: Optional[TransactionSubmitter] = None
+    ):
+        self.horizon = horizon
+        self.fee_policy = fee_policy
+        self.channels = channels
+        self.submitter = submitter or TransactionSubmitter(horizon)
 
     async def check_account_exists(self, public_key: str) -> bool:
         try:
-            self.server.accounts().account_id(public_key).call()
+            await self.horizon.accounts.get(public_key)
             return True
         except exceptions.NotFoundError:
             return False
@@ -18,22 +67,76 @@ class TransactionProcessor:
         except Exception as ex:
             raise ValueError(f"Erro ao checar conta destino: {str(ex)}")
 
+    async def check_destination(self, data: TransactionData) -> None:
+        destination_exists = await self.check_account_exists(data.destination_id)
+        if data.operation_type == OperationType.TRANSFER and not destination_exists:
+            raise TransactionRejected("A conta de destino não existe")
+        if data.operation_type == OperationType.CREATE_ACCOUNT and destination_exists:
+            raise TransactionRejected("A conta de destino já existe")
+
+    async def prefetch_source(self, public_key: str) -> None:
+        # Só aquece o cache da conta; o número de sequência continua sendo reservado na montagem
+        if self.channels is None and public_key not in self.horizon.sequences:
+            await self.horizon.accounts.get(public_key)
+
+    async def requires_memo(self, public_key: str) -> bool:
+        try:
+            account = await self.horizon.accounts.get(public_key)
+        except exceptions.NotFoundError:
+            return False
+        return account.get("data", {}).get(MEMO_REQUIRED_KEY) == MEMO_REQUIRED_VALUE
+
+    async def check_memo_required(self, operations: Sequence[TransactionData | PayoutRow]) -> None:
+        destinations = {
+            data.destination_id for data in operations
+            if data.operation_type == OperationType.TRANSFER
+        }
+        required = await asyncio.gather(*(self.requires_memo(key) for key in destinations))
+        if any(required):
+            raise ValueError("A conta de destino exige um memo")
+
     async def build_transaction(
         self,
         source_account: Account,
         data: TransactionData
     ) -> TransactionBuilder:
-        base_fee = self.server.fetch_base_fee()
+        return await self.build_batch_transaction(source_account, [data], data.memo)
+
+    async def build_batch_transaction(
+        self,
+        source_account: Account,
+        operations: Sequence[TransactionData | PayoutRow],
+        memo: Optional[str] = None,
+        operation_source: Optional[str] = None,
+        fee_policy: Optional[FeePolicy] = None
+    ) -> TransactionBuilder:
+        # Em process_transaction o estágio "base_fee" de run_stages já mede esta leitura
+        base_fee = await self.horizon.fees.base_fee(fee_policy or self.fee_policy)
         builder = TransactionBuilder(
             source_account=source_account,
-            network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE,
+            network_passphrase=self.horizon.network_passphrase,
             base_fee=base_fee,
         )
 
+        for data in operations:
+            self.append_operation(builder, data, operation_source)
+
+        if memo:
+            builder.add_text_memo(memo)
+
+        return builder
+
+    def append_operation(
+        self,
+        builder: TransactionBuilder,
+        data: TransactionData | PayoutRow,
+        source: Optional[str] = None
+    ) -> None:
         if data.operation_type == OperationType.CREATE_ACCOUNT:
             builder.append_create_account_op(
                 destination=data.destination_id,
-                starting_balance=data.amount
+                starting_balance=data.amount,
+                source=source
             )
         else:
             asset = Asset.native() if data.asset_type == "XLM (Nativo)" else None
@@ -42,137 +145,216 @@ class TransactionProcessor:
             builder.append_payment_op(
                 destination=data.destination_id,
                 asset=asset,
-                amount=data.amount
+                amount=data.amount,
+                source=source
             )
 
-        if data.memo:
-            builder.add_text_memo(data.memo)
+    async def process_transaction(self, data: TransactionData) -> TransactionResult:
+        metrics = self.horizon.metrics
+        with metrics.trace() as timings, metrics.stage("transaction"):
+            try:
+                # Decodificar a chave é local: se falhar, nenhuma consulta chega a sair
+                source_keypair = keypair_from_secret(data.source_secret)
+                # Destino, conta de origem e taxa não dependem um do outro: uma ida e volta em vez de três.
+                # A montagem depois só encontra caches quentes
+                await run_stages(self.horizon, {
+                    "destination_check": self.check_destination(data),
+                    "source_account": self.prefetch_source(source_keypair.public_key),
+                    "base_fee": self.horizon.fees.base_fee(self.fee_policy),
+                })
 
-        return builder
+                response = await self.submit_transaction(source_keypair, data)
 
-    async def process_transaction(self, data: TransactionData) -> TransactionResult:
-        try:
-            source_keypair = Keypair.from_secret(data.source_secret)
-            destination_exists = await self.check_account_exists(data.destination_id)
-            
-            if data.operation_type == OperationType.TRANSFER and not destination_exists:
-                return TransactionResult(False, "A conta de destino não existe")
-            elif data.operation_type == OperationType.CREATE_ACCOUNT and destination_exists:
-                return TransactionResult(False, "A conta de destino já existe")
-
-            source_account = self.server.load_account(source_keypair.public_key)
-            transaction = await self.build_transaction(source_account, data)
-            
-            transaction = transaction.set_timeout(30).build()
-            transaction.sign(source_keypair)
-            
-            response = self.server.submit_transaction(transaction)
-            
-            return TransactionResult(
-                success=True,
-                message="A transação foi processada com sucesso na rede Stellar",
-                operation_type=data.operation_type,
-                hash=response['hash']
-            )
-            
-        except Exception as ex:
-            return TransactionResult(False, f"Erro na transação: {str(ex)}")
+                return TransactionResult(
+                    success=True,
+                    message="A transação foi processada com sucesso na rede Stellar",
+                    operation_type=data.operation_type,
+                    hash=response['hash'],
+                    timings=timings
+                )
+
+            except TransactionRejected as ex:
+                return TransactionResult(False, str(ex), timings=timings)
+            except SubmissionPending as ex:
+                return TransactionResult(
+                    False,
+                    f"Não foi possível confirmar a transação; consulte o hash antes de repetir: {str(ex.cause)}",
+                    operation_type=data.operation_type,
+                    hash=ex.hash,
+                    timings=timings
+                )
+            except Exception as ex:
+                return TransactionResult(False, f"Erro na transação: {str(ex)}", timings=timings)
+
+    async def submit_transaction(self, source_keypair: Keypair, data: TransactionData) -> Dict[str, Any]:
+        return await self.submit_batch(source_keypair, [data], data.memo)
+
+    async def submit_batch(
+        self,
+        source_keypair: Keypair,
+        operations: Sequence[TransactionData | PayoutRow],
+        memo: Optional[str] = None,
+        check_memo: bool = True
+    ) -> Dict[str, Any]:
+        # check_memo=False quando quem chama já filtrou os destinos SEP-29 por conta própria
+        if check_memo and not memo:
+            await self.check_memo_required(operations)
+        if self.channels is None:
+            return await self._submit_with_sequence(source_keypair, source_keypair, operations, memo)
+        # O canal só fornece o número de sequência; as operações continuam saindo da conta de origem
+        async with self.channels.lease() as channel:
+            return await self._submit_with_sequence(channel.keypair, source_keypair, operations, memo)
+
+    async def _submit_with_sequence(
+        self,
+        sequence_keypair: Keypair,
+        source_keypair: Keypair,
+        operations: Sequence[TransactionData | PayoutRow],
+        memo: Optional[str]
+    ) -> Dict[str, Any]:
+        public_key = sequence_keypair.public_key
+        operation_source = None if sequence_keypair is source_keypair else source_keypair.public_key
+        retries = SEQUENCE_RETRIES
+        fee_policy = self.fee_policy
+        metrics = self.horizon.metrics
+        while True:
+            with metrics.stage("load_account"):
+                source_account = await self.horizon.sequences.next_account(public_key)
+            try:
+                transaction = await self.build_batch_transaction(
+                    source_account, operations, memo, operation_source, fee_policy
+                )
+
+                with metrics.stage("sign"):
+                    transaction = transaction.set_timeout(30).build()
+                    transaction.sign(sequence_keypair)
+                    if operation_source:
+                        transaction.sign(source_keypair)
+
+                if not self.submitter.claim(transaction):
+                    # Uma releitura da conta reemitiu um número ainda em uso por um envelope idêntico;
+                    # enviar os dois viraria um único pagamento, então este passa para o próximo número
+                    metrics.increment("sequence_collisions")
+                    continue
+
+                with metrics.stage("submit"):
+                    return await self.submitter.submit(transaction)
+            except (SubmissionPending, asyncio.CancelledError):
+                # Não se sabe se a sequência foi gasta; a próxima transação relê a conta
+                self.horizon.sequences.resync(public_key)
+                raise
+            except Exception as ex:
+                code = transaction_code(ex)
+                if code not in SEQUENCE_SPENT_CODES:
+                    # Falha ao montar ou recusa antes do ledger: o número não foi gasto e o seguinte daria tx_bad_seq
+                    self.horizon.sequences.resync(public_key)
+                if not is_rebuildable(ex) or retries == 0:
+                    raise
+                retries -= 1
+                metrics.increment("sequence_retries")
+                if code == "tx_insufficient_fee":
+                    fee_policy = await self.horizon.fees.escalate(fee_policy)
+            finally:
+                self.horizon.accounts.invalidate(public_key)
+                self.horizon.accounts.invalidate(source_keypair.public_key)
+                for data in operations:
+                    self.horizon.accounts.invalidate(data.destination_id)
         
     
 class BalanceProcessor:
-    def __init__(self, server: Server):
-        self.server = server
+    def __init__(self, horizon: HorizonClient):
+        self.horizon = horizon
+        # Tabela compartilhada: cada ativo é guardado uma vez para todas as contas consultadas
+        self.assets = AssetTable()
 
     def validate_key(self, key: str | None) -> KeyValidationResult:
-        if not key:
-            return KeyValidationResult(
-                type=KeyType.INVALID,
-                error_message="Por favor, insira uma chave Stellar"
-            )
-        if len(key) != 56:
-            return KeyValidationResult(
-                type=KeyType.INVALID,
-                error_message="Chave Stellar deve ter exatamente 56 caracteres"
-            )
+        return key_validator.validate(key)
 
-        try:
-            if key.startswith('G'):
-                Keypair.from_public_key(key)
-                return KeyValidationResult(
-                    type=KeyType.PUBLIC,
-                    public_key=key
-                )
-            elif key.startswith('S'):
-                keypair = Keypair.from_secret(key)
-                return KeyValidationResult(
-                    type=KeyType.PRIVATE,
-                    public_key=keypair.public_key
-                )
-            else:
-                return KeyValidationResult(
-                    type=KeyType.INVALID,
-                    error_message="Chave inválida"
-                )
-        except Exception as ex:
-            return KeyValidationResult(
-                type=KeyType.INVALID,
-                error_message=f"Chave inválida: {str(ex)}"
-            )
+    def validate_keys(self, keys: Iterable[str | None]) -> List[KeyValidationResult]:
+        return key_validator.validate_many(keys)
         
     async def fetch_account_data(self, public_key: str) -> Dict[str, Any]:
         try:
-            await asyncio.sleep(0.2)
-            return self.server.accounts().account_id(public_key).call()
+            return await self.horizon.accounts.get(public_key)
         except exceptions.NotFoundError:
             raise ValueError("Conta não encontrada. Verifique a chave.")
         except exceptions.BadResponseError:
             raise ValueError("Erro ao conectar com a rede Stellar. Tente novamente.")
         except Exception as ex:
             raise ValueError(f"Erro inesperado: {str(ex)}")
-        
-    def process_balance_entry(self, balance: Dict[str, Any]) -> Dict[str, Any]:
-        asset_type = balance.get('asset_type', 'native')
-        processed_balance = {
-            'balance': balance.get('balance', '0'),
-            'asset_type': asset_type,
-            'asset_code': '',
-            'asset_issuer': '',
-            'liquidity_pool_id': ''
-        }
 
-        if asset_type == 'native':
-            processed_balance['asset_code'] = 'XLM'
-        elif asset_type == 'liquidity_pool_shares':
-            processed_balance['asset_code'] = 'Pool Shares'
-            processed_balance['liquidity_pool_id'] = balance.get('liquidity_pool_id', '')
-        else:
-            processed_balance['asset_code'] = balance.get('asset_code', '')
-            processed_balance['asset_issuer'] = balance.get('asset_issuer', '')
-
-        return processed_balance
-
-    def process_balances(self, balances: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        processed_balances = [self.process_balance_entry(balance) for balance in balances]
-        type_order = {
-            'native': 0,
-            'credit_alphanum4': 1,
-            'credit_alphanum12': 1,
-            'liquidity_pool_shares': 2
-        }
-        processed_balances.sort(
-            key=lambda x: (
-                type_order.get(x['asset_type'], 3),
-                x.get('asset_code', '')
-            )
-        )
-        return processed_balances
+    def watch(self, keys: Iterable[str]) -> BalanceSubscription:
+        # Modo ao vivo: cada mudança de saldo chega como BalanceDelta, sem consultas periódicas
+        public_keys = []
+        for key, validation_result in self._validated(keys):
+            if validation_result.type == KeyType.INVALID:
+                raise ValueError(f"{key}: {validation_result.error_message}")
+            public_keys.append(validation_result.public_key)
+        return self.horizon.streams.subscribe(public_keys)
+
+    async def fetch_balances(
+        self,
+        key: str,
+        validation_result: Optional[KeyValidationResult] = None
+    ) -> AccountBalances:
+        # A entrada pode ser uma semente secreta: o resultado só carrega a chave pública derivada
+        validation_result = validation_result or self.validate_key(key)
+        public_key = validation_result.public_key
+        if validation_result.type == KeyType.INVALID:
+            return AccountBalances(public_key, error_message=validation_result.error_message)
+        try:
+            account = await self.fetch_account_data(public_key)
+            balances = self.process_balances(account.get("balances", []))
+        except Exception as ex:
+            return AccountBalances(public_key, error_message=str(ex))
+        return AccountBalances(public_key, balances=balances)
+
+    async def fetch_many(
+        self,
+        public_keys: Iterable[str],
+        concurrency: int = FETCH_CONCURRENCY
+    ) -> AsyncIterator[AccountBalances]:
+        keys = self._validated(public_keys)
+        results: asyncio.Queue[Optional[AccountBalances]] = asyncio.Queue(maxsize=concurrency * 2)
+
+        async def worker() -> None:
+            for key, validation_result in keys:
+                await results.put(await self.fetch_balances(key, validation_result))
+
+        async def run_workers() -> None:
+            workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                # Uma falha na validação ou no iterador de chaves não pode deixar o consumidor esperando
+                for task in workers:
+                    task.cancel()
+                await results.put(None)
+
+        # Consultas em lote ficam atrás das interativas na fila do Horizon
+        with background("balances"):
+            runner = asyncio.create_task(run_workers())
+        try:
+            while (result := await results.get()) is not None:
+                yield result
+            await runner
+        finally:
+            runner.cancel()
+            # Abre espaço para a sentinela caso o consumidor tenha saído com a fila cheia
+            while not results.empty():
+                results.get_nowait()
+
+    def _validated(
+        self,
+        keys: Iterable[str],
+        chunk_size: int = VALIDATION_CHUNK_SIZE
+    ) -> Iterator[Tuple[str, KeyValidationResult]]:
+        iterator = iter(keys)
+        while chunk := list(islice(iterator, chunk_size)):
+            yield from zip(chunk, self.validate_keys(chunk))
+
+    def process_balances(self, balances: Iterable[Dict[str, Any]]) -> BalanceSheet:
+        return BalanceSheet.from_horizon(balances, self.assets).sorted()
     
 async def generate_wallet() -> Dict[str, str]:
-    await asyncio.sleep(1)
-    keypair = Keypair.random()
-    mnemonic_phrase = keypair.generate_mnemonic_phrase()
-    return {
-        "public_key": keypair.public_key,
-        "private_key": keypair.secret,
-        "mnemonic": mnemonic_phrase
-    }
\ No newline at end of file
+    return await asyncio.to_thread(new_wallet)
\ No newline at end of file
@@ -0,0 +1,279 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set
+from app.core.balances import AssetInfo, AssetTable, BalanceSheet
+from app.core.cache import MAX_RECONNECT_DELAY, RECONNECT_DELAY
+from app.core.scheduler import background
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+MAX_ACCOUNT_STREAMS = 20
+REFRESH_CONCURRENCY = 20
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BalanceDelta:
+    public_key: str
+    balances: BalanceSheet
+    changes: Dict[AssetInfo, int] = field(default_factory=dict)
+
+
+def diff_balances(previous: Optional[BalanceSheet], current: BalanceSheet) -> Dict[AssetInfo, int]:
+    before = previous.totals() if previous is not None else {}
+    after = current.totals()
+    return {
+        asset: after.get(asset, 0) - before.get(asset, 0)
+        for asset in before.keys() | after.keys()
+        if after.get(asset, 0) != before.get(asset, 0) or (asset in after) != (asset in before)
+    }
+
+
+class BalanceSubscription:
+    # Consumidor lento não trava os streams: cada conta guarda só o estado mais novo ainda não entregue
+    def __init__(self, manager: "StreamManager", public_keys: Iterable[str]) -> None:
+        self.manager = manager
+        self.public_keys = list(dict.fromkeys(public_keys))
+        self._delivered: Dict[str, BalanceSheet] = {}
+        self._pending: OrderedDict[str, BalanceSheet] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    def __aiter__(self) -> "BalanceSubscription":
+        return self
+
+    async def __anext__(self) -> BalanceDelta:
+        if self._closed:
+            raise StopAsyncIteration
+        delta = await self.get()
+        if delta is None:
+            raise StopAsyncIteration
+        return delta
+
+    async def __aenter__(self) -> "BalanceSubscription":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def backlog(self) -> int:
+        return len(self._pending)
+
+    async def get(self) -> Optional[BalanceDelta]:
+        while not self._pending:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        public_key, balances = self._pending.popitem(last=False)
+        previous = self._delivered.get(public_key)
+        self._delivered[public_key] = balances
+        return BalanceDelta(public_key, balances, diff_balances(previous, balances))
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._ready.set()
+            self.manager.unsubscribe(self)
+
+    def _offer(self, public_key: str, balances: BalanceSheet) -> None:
+        if self._closed:
+            return
+        if public_key in self._pending:
+            self.manager.horizon.metrics.increment("streams.conflated")
+        self._pending[public_key] = balances
+        self._pending.move_to_end(public_key)
+        self._ready.set()
+
+
+class StreamManager:
+    # Até max_account_streams contas, um stream de conta para cada; acima disso, um único stream
+    # de efeitos da rede inteira, filtrado pelas contas observadas. Efeitos, e não pagamentos, porque
+    # trades, trustlines, pools e merges também mexem no saldo e todos trazem a conta em "account".
+    # Só a taxa de uma transação que falhou não gera efeito. Os streams de conta são os do
+    # AccountCache, então a mesma conexão atualiza o cache e os assinantes
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        max_account_streams: int = MAX_ACCOUNT_STREAMS,
+        refresh_concurrency: int = REFRESH_CONCURRENCY
+    ) -> None:
+        self.horizon = horizon
+        self.max_account_streams = max_account_streams
+        self.refresh_concurrency = refresh_concurrency
+        self.assets = AssetTable()
+        self.snapshots: Dict[str, BalanceSheet] = {}
+        self.effects_cursor: Optional[str] = None
+        self._watchers: Dict[str, Set[BalanceSubscription]] = {}
+        self._account_streams: Set[str] = set()
+        self._effects_stream: Optional[asyncio.Task] = None
+        self._dirty: Set[str] = set()
+        self._wake = asyncio.Event()
+        self._refresher: Optional[asyncio.Task] = None
+
+    @property
+    def watched(self) -> Set[str]:
+        return set(self._watchers)
+
+    @property
+    def connections(self) -> int:
+        return len(self._account_streams) + (self._effects_stream is not None)
+
+    def subscribe(self, public_keys: Iterable[str]) -> BalanceSubscription:
+        subscription = BalanceSubscription(self, public_keys)
+        for public_key in subscription.public_keys:
+            self._watchers.setdefault(public_key, set()).add(subscription)
+            if public_key in self.snapshots:
+                subscription._offer(public_key, self.snapshots[public_key])
+        self._rebalance()
+        return subscription
+
+    def unsubscribe(self, subscription: BalanceSubscription) -> None:
+        for public_key in subscription.public_keys:
+            watchers = self._watchers.get(public_key)
+            if watchers is None:
+                continue
+            watchers.discard(subscription)
+            if not watchers:
+                del self._watchers[public_key]
+                self.snapshots.pop(public_key, None)
+                self._dirty.discard(public_key)
+        self._rebalance()
+
+    def close(self) -> None:
+        for public_key in self._account_streams:
+            self.horizon.accounts.unsubscribe(public_key, self._on_account)
+        for task in [self._effects_stream, self._refresher]:
+            if task is not None:
+                task.cancel()
+        self._account_streams.clear()
+        self._effects_stream = None
+        self._refresher = None
+        self._watchers.clear()
+        self.snapshots.clear()
+
+    def publish(self, public_key: str, balances: List[Dict[str, Any]]) -> None:
+        if public_key not in self._watchers:
+            return
+        sheet = BalanceSheet.from_horizon(balances, self.assets).sorted()
+        if self.snapshots.get(public_key) == sheet:
+            return
+        self.snapshots[public_key] = sheet
+        self.horizon.metrics.increment("streams.updates")
+        for subscription in self._watchers[public_key]:
+            subscription._offer(public_key, sheet)
+
+    def _rebalance(self) -> None:
+        multiplexed = len(self._watchers) > self.max_account_streams
+        for public_key in list(self._account_streams):
+            if multiplexed or public_key not in self._watchers:
+                self._account_streams.discard(public_key)
+                self.horizon.accounts.unsubscribe(public_key, self._on_account)
+        if multiplexed:
+            if self._effects_stream is None:
+                with background("streams"):
+                    self._effects_stream = asyncio.create_task(self._follow_effects())
+            elif self.effects_cursor is not None:
+                # Contas novas são lidas uma vez; daí em diante só os efeitos disparam leituras
+                for public_key in self._watchers.keys() - self.snapshots.keys():
+                    self._mark_dirty(public_key)
+        else:
+            if self._effects_stream is not None:
+                self._effects_stream.cancel()
+                self._effects_stream = None
+                self.effects_cursor = None
+            for public_key in self._watchers:
+                if public_key not in self._account_streams:
+                    self._account_streams.add(public_key)
+                    self.horizon.accounts.subscribe(public_key, self._on_account)
+        if self._dirty:
+            self._ensure_refresher()
+        if not self._watchers and self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    def _on_account(self, data: Dict[str, Any]) -> None:
+        self.publish(data["account_id"], data.get("balances", []))
+
+    async def _follow_effects(self) -> None:
+        # Retoma do último paging_token recebido, então nenhum efeito fica para trás
+        delay = RECONNECT_DELAY
+        while self.effects_cursor is None:
+            try:
+                latest = await self.horizon.server.effects().order(desc=True).limit(1).call()
+                records = latest["_embedded"]["records"]
+                self.effects_cursor = records[0]["paging_token"] if records else "0"
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.debug("Falha ao ler o cursor de efeitos: %s", ex)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+        # Com o cursor fixado, o estado lido agora mais os efeitos depois dele cobrem tudo
+        for public_key in self._watchers:
+            self._mark_dirty(public_key)
+        while True:
+            try:
+                stream = self.horizon.server.effects().cursor(self.effects_cursor).stream()
+                async for record in stream:
+                    delay = RECONNECT_DELAY
+                    self.effects_cursor = record.get("paging_token", self.effects_cursor)
+                    public_key = record.get("account")
+                    if public_key in self._watchers:
+                        self._mark_dirty(public_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                logger.debug("Stream de efeitos caiu no cursor %s: %s", self.effects_cursor, ex)
+            self.horizon.metrics.increment("streams.reconnects")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+
+    def _mark_dirty(self, public_key: str) -> None:
+        self._dirty.add(public_key)
+        self._wake.set()
+        self._ensure_refresher()
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher is None or self._refresher.done():
+            with background("streams"):
+                self._refresher = asyncio.create_task(self._refresh())
+
+    async def _refresh(self) -> None:
+        # Vários eventos da mesma conta viram uma única leitura; as leituras têm limite de concorrência
+        semaphore = asyncio.Semaphore(self.refresh_concurrency)
+        delay = RECONNECT_DELAY
+
+        async def load(public_key: str) -> bool:
+            async with semaphore:
+                # Passa pelo cache para que a leitura provocada pelo efeito também o atualize
+                self.horizon.accounts.invalidate(public_key)
+                try:
+                    account = await self.horizon.accounts.get(public_key)
+                except Exception as ex:
+                    logger.warning("Falha ao atualizar %s: %s", public_key, ex)
+                    return False
+                self.publish(public_key, account.get("balances", []))
+                return True
+
+        while True:
+            self._wake.clear()
+            if not self._dirty:
+                await self._wake.wait()
+                continue
+            batch, self._dirty = list(self._dirty), set()
+            loaded = await asyncio.gather(*(load(public_key) for public_key in batch))
+            failed = {public_key for public_key, ok in zip(batch, loaded) if not ok}
+            if not failed:
+                delay = RECONNECT_DELAY
+                continue
+            # O efeito já passou pelo cursor: se a leitura se perder, a mudança só apareceria no próximo
+            self.horizon.metrics.increment("streams.refresh_failures", len(failed))
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_RECONNECT_DELAY)
+            self._dirty |= failed & self._watchers.keys()
@@ -0,0 +1,155 @@
+import binascii
+import re
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from stellar_sdk import Keypair
+from app.core.models import KeyType, KeyValidationResult
+
+KEY_LENGTH = 56
+DECODED_LENGTH = 35
+PUBLIC_KEY_VERSION = 6 << 3
+SECRET_SEED_VERSION = 18 << 3
+PUBLIC_KEY_CACHE_SIZE = 100_000
+VALIDATION_CHUNK_SIZE = 50_000
+
+# O int() do Python aceita base 32 com os dígitos 0-9a-v, então traduzimos o alfabeto
+# RFC 4648 para decodificar o lote inteiro numa única conversão feita em C
+_BASE32 = re.compile("[A-Z2-7]*")
+_TO_INT_DIGITS = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", "0123456789abcdefghijklmnopqrstuv")
+
+_secret_scope: ContextVar[Optional[Dict[str, Keypair]]] = ContextVar("secret_scope", default=None)
+
+
+@contextmanager
+def secret_scope() -> Iterator[None]:
+    # Segredos decodificados só vivem enquanto durar a requisição
+    token = _secret_scope.set({})
+    try:
+        yield
+    finally:
+        keypairs = _secret_scope.get()
+        if keypairs is not None:
+            keypairs.clear()
+        _secret_scope.reset(token)
+
+
+def keypair_from_secret(secret: str) -> Keypair:
+    keypairs = _secret_scope.get()
+    if keypairs is None:
+        return Keypair.from_secret(secret)
+    keypair = keypairs.get(secret)
+    if keypair is None:
+        keypair = keypairs[secret] = Keypair.from_secret(secret)
+    return keypair
+
+
+def _check_decoded(decoded: bytes, offset: int, version: int) -> Optional[str]:
+    if decoded[offset] != version:
+        return "Chave inválida: byte de versão incorreto"
+    checksum = binascii.crc_hqx(decoded[offset:offset + 33], 0).to_bytes(2, "little")
+    if checksum != decoded[offset + 33:offset + DECODED_LENGTH]:
+        return "Chave inválida: checksum incorreto"
+    return None
+
+
+def _b32decode(keys: str, size: int) -> Optional[bytes]:
+    if not _BASE32.fullmatch(keys):
+        return None
+    return int(keys.translate(_TO_INT_DIGITS), 32).to_bytes(size, "big")
+
+
+def _decode_one(key: str, version: int) -> Optional[str]:
+    decoded = _b32decode(key, DECODED_LENGTH)
+    if decoded is None:
+        return "Chave inválida: caracteres fora do alfabeto base32"
+    return _check_decoded(decoded, 0, version)
+
+
+def decode_batch(keys: List[str], version: int) -> List[Optional[str]]:
+    # 56 caracteres base32 viram exatamente 35 bytes, então as chaves podem ser concatenadas
+    decoded = _b32decode("".join(keys), DECODED_LENGTH * len(keys))
+    if decoded is None:
+        return [_decode_one(key, version) for key in keys]
+    return [
+        _check_decoded(decoded, offset, version)
+        for offset in range(0, len(decoded), DECODED_LENGTH)
+    ]
+
+
+class KeyValidator:
+    def __init__(self, cache_size: int = PUBLIC_KEY_CACHE_SIZE) -> None:
+        self.cache_size = cache_size
+        self._public_keys: OrderedDict[str, KeyValidationResult] = OrderedDict()
+
+    def validate(self, key: Optional[str]) -> KeyValidationResult:
+        return self.validate_many([key])[0]
+
+    def validate_many(self, keys: Iterable[Optional[str]]) -> List[KeyValidationResult]:
+        results: List[KeyValidationResult] = []
+        iterator = iter(keys)
+        while chunk := list(islice(iterator, VALIDATION_CHUNK_SIZE)):
+            results.extend(self._validate_chunk(chunk))
+        return results
+
+    def _validate_chunk(self, keys: List[Optional[str]]) -> List[KeyValidationResult]:
+        results: List[Optional[KeyValidationResult]] = [None] * len(keys)
+        public: List[Tuple[int, str]] = []
+        secret: List[Tuple[int, str]] = []
+
+        for index, key in enumerate(keys):
+            if not key:
+                results[index] = KeyValidationResult(
+                    type=KeyType.INVALID,
+                    error_message="Por favor, insira uma chave Stellar"
+                )
+            elif len(key) != KEY_LENGTH:
+                results[index] = KeyValidationResult(
+                    type=KeyType.INVALID,
+                    error_message="Chave Stellar deve ter exatamente 56 caracteres"
+                )
+            elif key.startswith('G'):
+                cached = self._public_keys.get(key)
+                if cached is None:
+                    public.append((index, key))
+                else:
+                    self._public_keys.move_to_end(key)
+                    results[index] = cached
+            elif key.startswith('S'):
+                secret.append((index, key))
+            else:
+                results[index] = KeyValidationResult(
+                    type=KeyType.INVALID,
+                    error_message="Chave inválida"
+                )
+
+        if public:
+            errors = decode_batch([key for _, key in public], PUBLIC_KEY_VERSION)
+            for (index, key), error in zip(public, errors):
+                result = self._result(KeyType.PUBLIC, key, error)
+                results[index] = result
+                self._remember(key, result)
+
+        if secret:
+            errors = decode_batch([key for _, key in secret], SECRET_SEED_VERSION)
+            for (index, key), error in zip(secret, errors):
+                public_key = "" if error else keypair_from_secret(key).public_key
+                results[index] = self._result(KeyType.PRIVATE, public_key, error)
+
+        return [result for result in results if result is not None]
+
+    def _remember(self, key: str, result: KeyValidationResult) -> None:
+        self._public_keys[key] = result
+        if len(self._public_keys) > self.cache_size:
+            self._public_keys.popitem(last=False)
+
+    @staticmethod
+    def _result(key_type: KeyType, public_key: str, error: Optional[str]) -> KeyValidationResult:
+        if error:
+            return KeyValidationResult(type=KeyType.INVALID, error_message=error)
+        return KeyValidationResult(type=key_type, public_key=public_key)
+
+
+key_validator = KeyValidator()
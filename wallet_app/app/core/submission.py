@@ -0,0 +1,171 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from stellar_sdk import TransactionEnvelope, exceptions
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+SUBMIT_RETRIES = 5
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 8.0
+# Por quanto tempo um hash sem limite de tempo fica reservado para o pedido que o enviou
+CLAIM_TTL = 300.0
+# Status em que o Horizon recusou antes de repassar ao stellar-core: o envelope não entrou
+RETRYABLE_STATUS = {429, 503}
+# Rejeições que não gastam o número de sequência: dá para montar e assinar de novo
+REBUILD_CODES = {"tx_bad_seq", "tx_too_late", "tx_insufficient_fee"}
+# Rejeições vindas da aplicação no ledger: a taxa foi cobrada e o número de sequência, gasto
+SEQUENCE_SPENT_CODES = {"tx_failed", "tx_fee_bump_inner_failed"}
+
+
+class SubmitErrorKind(Enum):
+    RETRYABLE = "retryable"
+    UNKNOWN = "unknown"
+    REBUILD = "rebuild"
+    FATAL = "fatal"
+
+
+class SubmissionPending(Exception):
+    # O envelope pode ter entrado no ledger; só o hash diz o que aconteceu
+    def __init__(self, transaction_hash: str, cause: Exception) -> None:
+        super().__init__(f"Resultado incerto para a transação {transaction_hash}: {cause}")
+        self.hash = transaction_hash
+        self.cause = cause
+
+
+def transaction_code(ex: Exception) -> Optional[str]:
+    if not isinstance(ex, exceptions.BaseHorizonError):
+        return None
+    return (ex.extras or {}).get("result_codes", {}).get("transaction")
+
+
+def classify_error(ex: Exception) -> SubmitErrorKind:
+    if isinstance(ex, (asyncio.TimeoutError, exceptions.ConnectionError)):
+        return SubmitErrorKind.UNKNOWN
+    if not isinstance(ex, exceptions.BaseHorizonError):
+        return SubmitErrorKind.FATAL
+    if ex.status in RETRYABLE_STATUS:
+        return SubmitErrorKind.RETRYABLE
+    if ex.status >= 500:
+        # 504 e afins: o core pode ter aceitado depois que o Horizon desistiu de esperar
+        return SubmitErrorKind.UNKNOWN
+    if transaction_code(ex) in REBUILD_CODES:
+        return SubmitErrorKind.REBUILD
+    return SubmitErrorKind.FATAL
+
+
+def is_rebuildable(ex: Exception) -> bool:
+    return classify_error(ex) is SubmitErrorKind.REBUILD
+
+
+class TransactionSubmitter:
+    # Reenvia sempre o mesmo envelope assinado: o hash não muda, então ele entra no ledger no máximo uma vez
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        retries: int = SUBMIT_RETRIES,
+        delay: float = RETRY_DELAY,
+        max_delay: float = MAX_RETRY_DELAY
+    ) -> None:
+        self.horizon = horizon
+        self.retries = retries
+        self.delay = delay
+        self.max_delay = max_delay
+        self._random = random.Random()
+        self._claims: OrderedDict[str, float] = OrderedDict()
+
+    def claim(self, envelope: TransactionEnvelope) -> bool:
+        # Cada hash pertence a um único pedido enquanto o envelope ainda pode entrar no ledger
+        now = time.time()
+        while self._claims and next(iter(self._claims.values())) < now:
+            self._claims.popitem(last=False)
+        transaction_hash = envelope.hash_hex()
+        if transaction_hash in self._claims:
+            return False
+        self._claims[transaction_hash] = self._max_time(envelope) or now + CLAIM_TTL
+        return True
+
+    async def submit(self, envelope: TransactionEnvelope) -> Dict[str, Any]:
+        transaction_hash = envelope.hash_hex()
+        try:
+            return await self._submit(envelope, transaction_hash)
+        except SubmissionPending:
+            raise
+        except Exception:
+            # Rejeitado com certeza: o mesmo número pode ser reemitido com este conteúdo.
+            # Cancelamento não entra aqui: o POST pode ter saído e o hash continua reservado
+            self._claims.pop(transaction_hash, None)
+            raise
+
+    async def _submit(self, envelope: TransactionEnvelope, transaction_hash: str) -> Dict[str, Any]:
+        metrics = self.horizon.metrics
+        uncertain = False
+        attempt = 0
+        while True:
+            try:
+                return await self.horizon.server.submit_transaction(envelope, skip_memo_required_check=True)
+            except Exception as ex:
+                kind = classify_error(ex)
+                if kind is SubmitErrorKind.UNKNOWN:
+                    uncertain = True
+                elif kind is not SubmitErrorKind.RETRYABLE and not uncertain:
+                    raise
+                exhausted = attempt >= self.retries or self._expired(envelope)
+                if uncertain:
+                    if not exhausted:
+                        await self._backoff(attempt)
+                    try:
+                        record = await self.lookup(transaction_hash)
+                    except Exception as lookup_error:
+                        # Sem confirmação de ausência não se reconstrói nada: só o hash resolve a dúvida
+                        raise SubmissionPending(transaction_hash, lookup_error) from lookup_error
+                    if record is not None:
+                        metrics.increment("submit.already_applied")
+                        return self._applied(record)
+                    if kind not in (SubmitErrorKind.UNKNOWN, SubmitErrorKind.RETRYABLE):
+                        # Depois de um envio incerto, tx_bad_seq ou tx_too_late podem ser o próprio
+                        # envelope já aplicado; só com o hash confirmado ausente a recusa vale
+                        raise
+                    if exhausted:
+                        if self._expired(envelope):
+                            raise
+                        raise SubmissionPending(transaction_hash, ex) from ex
+                elif exhausted:
+                    raise
+                else:
+                    await self._backoff(attempt)
+                attempt += 1
+                metrics.increment("submit.retries")
+
+    async def lookup(self, transaction_hash: str) -> Optional[Dict[str, Any]]:
+        # None só quando o Horizon confirma que o hash não existe; qualquer outra falha sobe
+        try:
+            return await self.horizon.server.transactions().transaction(transaction_hash).call()
+        except exceptions.NotFoundError:
+            return None
+
+    async def _backoff(self, attempt: int) -> None:
+        # Jitter completo: clientes que falharam juntos não voltam todos no mesmo instante
+        await asyncio.sleep(self._random.uniform(0, min(self.max_delay, self.delay * 2 ** attempt)))
+
+    @staticmethod
+    def _applied(record: Dict[str, Any]) -> Dict[str, Any]:
+        if not record.get("successful", True):
+            raise ValueError(f"A transação {record.get('hash')} entrou no ledger, mas falhou")
+        return record
+
+    @classmethod
+    def _expired(cls, envelope: TransactionEnvelope) -> bool:
+        # Passado o limite de tempo, o envelope não pode mais entrar; não encontrado significa não aplicado
+        max_time = cls._max_time(envelope)
+        return max_time is not None and time.time() > max_time
+
+    @staticmethod
+    def _max_time(envelope: TransactionEnvelope) -> Optional[float]:
+        preconditions = envelope.transaction.preconditions
+        time_bounds = preconditions.time_bounds if preconditions else None
+        return time_bounds.max_time if time_bounds and time_bounds.max_time else None
@@ -0,0 +1,264 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from fractions import Fraction
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+from stellar_sdk import Asset
+from app.core.balances import STROOPS_PER_UNIT, AssetInfo, BalanceSheet, aggregate, format_amount, parse_amount
+
+if TYPE_CHECKING:
+    from app.core.horizon import HorizonClient
+
+PRICE_TTL = 60.0
+PRICE_CONCURRENCY = 10
+# Quantia usada para sondar caminhos quando o livro de ofertas está vazio
+PATH_PROBE_AMOUNT = "1"
+NATIVE = AssetInfo("native", "XLM")
+
+
+def parse_asset(asset: str) -> AssetInfo:
+    # Formato do Horizon: "native" ou "CODIGO:EMISSOR"
+    if asset == "native":
+        return NATIVE
+    code, _, issuer = asset.partition(":")
+    if not code or not issuer:
+        raise ValueError(f"Ativo inválido: {asset!r}")
+    return AssetInfo("credit_alphanum4" if len(code) <= 4 else "credit_alphanum12", code, issuer)
+
+
+def to_sdk_asset(asset: AssetInfo) -> Asset:
+    if asset.asset_type == "native":
+        return Asset.native()
+    if asset.asset_type == "liquidity_pool_shares":
+        raise ValueError("Cotas de pool não são negociadas no livro de ofertas")
+    return Asset(asset.asset_code, asset.asset_issuer)
+
+
+@dataclass
+class PriceQuote:
+    asset: AssetInfo
+    quote: AssetInfo
+    price: Optional[Fraction]
+    source: str
+    fetched_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class AssetValuation:
+    asset: AssetInfo
+    amount: int
+    value: int
+    price: Optional[str]
+    source: str
+
+
+@dataclass
+class Valuation:
+    quote: AssetInfo
+    total: int
+    assets: List[AssetValuation] = field(default_factory=list)
+    accounts: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def unpriced(self) -> List[AssetInfo]:
+        return [item.asset for item in self.assets if item.price is None]
+
+
+class PriceCache:
+    # Cada par é buscado uma vez: quem chega durante a busca espera o mesmo futuro
+    def __init__(self, ttl: float = PRICE_TTL) -> None:
+        self.ttl = ttl
+        self._entries: Dict[Tuple[AssetInfo, AssetInfo], PriceQuote] = {}
+        self._pending: Dict[Tuple[AssetInfo, AssetInfo], asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def peek(self, key: Tuple[AssetInfo, AssetInfo]) -> Optional[PriceQuote]:
+        quote = self._entries.get(key)
+        if quote is None or time.monotonic() - quote.fetched_at > self.ttl:
+            return None
+        return quote
+
+    async def get(
+        self,
+        key: Tuple[AssetInfo, AssetInfo],
+        load: Callable[[], Awaitable[PriceQuote]]
+    ) -> PriceQuote:
+        quote = self.peek(key)
+        if quote is not None:
+            return quote
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = asyncio.ensure_future(load())
+            pending.add_done_callback(lambda future: self._finish(key, future))
+        return await asyncio.shield(pending)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _finish(self, key: Tuple[AssetInfo, AssetInfo], future: asyncio.Future) -> None:
+        self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._entries[key] = future.result()
+
+
+class PriceOracle:
+    def __init__(self, horizon: "HorizonClient", ttl: float = PRICE_TTL) -> None:
+        self.horizon = horizon
+        self.cache = PriceCache(ttl)
+
+    def cached(self, asset: AssetInfo, quote: AssetInfo = NATIVE) -> Optional[PriceQuote]:
+        if asset == quote:
+            return PriceQuote(asset, quote, Fraction(1), "quote")
+        return self.cache.peek((asset, quote))
+
+    async def price(self, asset: AssetInfo, quote: AssetInfo = NATIVE) -> PriceQuote:
+        cached = self.cached(asset, quote)
+        if cached is not None:
+            return cached
+        return await self.cache.get((asset, quote), lambda: self._load(asset, quote))
+
+    async def _load(self, asset: AssetInfo, quote: AssetInfo) -> PriceQuote:
+        self.horizon.metrics.increment("price_lookups")
+        if asset.asset_type == "liquidity_pool_shares":
+            return PriceQuote(asset, quote, await self._pool_price(asset, quote), "pool")
+        price = await self._order_book_price(asset, quote)
+        if price is not None:
+            return PriceQuote(asset, quote, price, "order_book")
+        price = await self._path_price(asset, quote)
+        return PriceQuote(asset, quote, price, "path" if price is not None else "none")
+
+    async def _order_book_price(self, asset: AssetInfo, quote: AssetInfo) -> Optional[Fraction]:
+        book = await self.horizon.server.orderbook(to_sdk_asset(asset), to_sdk_asset(quote)).call()
+        # Os preços do livro já vêm em unidades da cotação por unidade do ativo
+        sides = [
+            Fraction(int(offers[0]["price_r"]["n"]), int(offers[0]["price_r"]["d"]))
+            for offers in (book.get("bids"), book.get("asks")) if offers
+        ]
+        if not sides:
+            return None
+        return sum(sides, Fraction(0)) / len(sides)
+
+    async def _path_price(self, asset: AssetInfo, quote: AssetInfo) -> Optional[Fraction]:
+        response = await self.horizon.server.strict_send_paths(
+            to_sdk_asset(asset), PATH_PROBE_AMOUNT, [to_sdk_asset(quote)]
+        ).call()
+        records = response.get("_embedded", {}).get("records", [])
+        if not records:
+            return None
+        received = max(parse_amount(record["destination_amount"]) for record in records)
+        return Fraction(received, parse_amount(PATH_PROBE_AMOUNT))
+
+    async def _pool_price(self, asset: AssetInfo, quote: AssetInfo) -> Optional[Fraction]:
+        # Uma cota vale a parte proporcional das reservas, cada uma cotada pelo próprio cache
+        pool = await self.horizon.server.liquidity_pools().liquidity_pool(asset.liquidity_pool_id).call()
+        total_shares = parse_amount(pool["total_shares"])
+        if not total_shares:
+            return None
+        reserves = pool.get("reserves", [])
+        quotes = await asyncio.gather(*(
+            self.price(parse_asset(reserve["asset"]), quote) for reserve in reserves
+        ))
+        if any(item.price is None for item in quotes):
+            return None
+        value = sum(
+            (parse_amount(reserve["amount"]) * item.price for reserve, item in zip(reserves, quotes)),
+            Fraction(0)
+        )
+        return value / total_shares
+
+
+class PortfolioValuator:
+    def __init__(
+        self,
+        horizon: "HorizonClient",
+        quote: AssetInfo = NATIVE,
+        concurrency: int = PRICE_CONCURRENCY
+    ) -> None:
+        self.horizon = horizon
+        self.quote = quote
+        self.concurrency = concurrency
+
+    async def prices(self, assets: Iterable[AssetInfo]) -> Dict[AssetInfo, PriceQuote]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        oracle = self.horizon.prices
+
+        async def load(asset: AssetInfo) -> PriceQuote:
+            async with semaphore:
+                try:
+                    return await oracle.price(asset, self.quote)
+                except Exception:
+                    return PriceQuote(asset, self.quote, None, "error")
+
+        # Só o que não está no cache vira tarefa
+        prices: Dict[AssetInfo, PriceQuote] = {}
+        missing = []
+        for asset in assets:
+            cached = oracle.cached(asset, self.quote)
+            if cached is None:
+                missing.append(asset)
+            else:
+                prices[asset] = cached
+        for quote in await asyncio.gather(*(load(asset) for asset in missing)):
+            prices[quote.asset] = quote
+        return prices
+
+    async def value(self, sheets: Mapping[str, BalanceSheet]) -> Valuation:
+        # As consultas ao Horizon dependem só dos ativos distintos, nunca do número de contas
+        totals = aggregate(sheets.values())
+        with self.horizon.metrics.stage("valuation.prices"):
+            prices = await self.prices(totals)
+
+        assets = []
+        for asset, amount in totals.items():
+            price = prices[asset].price
+            assets.append(AssetValuation(
+                asset=asset,
+                amount=amount,
+                value=_value(amount, price),
+                price=None if price is None else format_amount(_value(STROOPS_PER_UNIT, price)),
+                source=prices[asset].source,
+            ))
+        assets.sort(key=lambda item: item.value, reverse=True)
+
+        with self.horizon.metrics.stage("valuation.accounts"):
+            accounts = self._value_accounts(sheets, prices)
+        return Valuation(self.quote, sum(item.value for item in assets), assets, accounts)
+
+    @staticmethod
+    def _value_accounts(
+        sheets: Mapping[str, BalanceSheet],
+        prices: Dict[AssetInfo, PriceQuote]
+    ) -> Dict[str, int]:
+        # Preço vira duas colunas inteiras alinhadas à tabela de ativos, montadas uma vez por tabela
+        columns: Dict[int, Tuple[List[int], List[int]]] = {}
+        accounts = {}
+        for account, sheet in sheets.items():
+            table = columns.get(id(sheet.assets))
+            if table is None:
+                table = columns[id(sheet.assets)] = _price_columns(sheet.assets.assets, prices)
+            numerators, denominators = table
+            accounts[account] = sum(map(
+                int.__floordiv__,
+                map(int.__mul__, sheet.amounts, map(numerators.__getitem__, sheet.asset_index)),
+                map(denominators.__getitem__, sheet.asset_index),
+            ))
+        return accounts
+
+
+def _value(amount: int, price: Optional[Fraction]) -> int:
+    if price is None:
+        return 0
+    return amount * price.numerator // price.denominator
+
+
+def _price_columns(assets: List[AssetInfo], prices: Dict[AssetInfo, PriceQuote]) -> Tuple[List[int], List[int]]:
+    numerators, denominators = [], []
+    for asset in assets:
+        quote = prices.get(asset)
+        price = quote.price if quote is not None else None
+        numerators.append(0 if price is None else price.numerator)
+        denominators.append(1 if price is None else price.denominator)
+    return numerators, denominators
+
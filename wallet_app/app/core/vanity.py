@@ -0,0 +1,170 @@
+import asyncio
+import binascii
+import multiprocessing
+import os
+import queue
+import time
+from base64 import b32encode
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from nacl.bindings import crypto_sign_seed_keypair
+from stellar_sdk import Keypair
+
+BASE32_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+VERSION_BYTE = b"\x30"
+BATCH_SIZE = 2048
+MAX_SUFFIX_LENGTH = 8
+PROGRESS_INTERVAL = 0.5
+
+
+@dataclass
+class VanityProgress:
+    attempts: int
+    keys_per_second: float
+    expected_attempts: float
+    eta_seconds: float
+
+
+class VanityMatcher:
+    # O prefixo é o trecho logo após o "G" inicial do endereço
+    def __init__(self, prefix: str = "", suffix: str = "") -> None:
+        self.prefix = prefix.upper()
+        self.suffix = suffix.upper()
+        self._validate()
+        bits = 5 * (len(self.prefix) + 1)
+        self._prefix_bytes = (bits + 7) // 8
+        self._prefix_shift = 8 * self._prefix_bytes - bits
+        self._prefix_value = 0
+        for char in "G" + self.prefix:
+            self._prefix_value = (self._prefix_value << 5) | BASE32_ALPHABET.index(char)
+        self._suffix_bytes = self.suffix.encode()
+
+    @property
+    def expected_attempts(self) -> float:
+        attempts = 32.0 ** len(self.suffix)
+        if self.prefix:
+            # O segundo caractere só carrega 2 bits da chave, pois o byte de versão fixa os outros 3
+            attempts *= 4 * 32.0 ** (len(self.prefix) - 1)
+        return attempts
+
+    def search(self, count: int = BATCH_SIZE) -> Optional[bytes]:
+        prefix_bytes = self._prefix_bytes - 1
+        prefix_shift = self._prefix_shift
+        prefix_value = self._prefix_value
+        suffix = self._suffix_bytes
+        suffix_length = len(suffix)
+        check_prefix = bool(self.prefix)
+        seeds = os.urandom(32 * count)
+        # Compara só os bits relevantes e evita a codificação StrKey completa
+        for offset in range(0, len(seeds), 32):
+            seed = seeds[offset:offset + 32]
+            public_key, _ = crypto_sign_seed_keypair(seed)
+            if check_prefix and (
+                int.from_bytes(VERSION_BYTE + public_key[:prefix_bytes], "big") >> prefix_shift
+            ) != prefix_value:
+                continue
+            if suffix_length:
+                payload = VERSION_BYTE + public_key
+                checksum = binascii.crc_hqx(payload, 0).to_bytes(2, "little")
+                if b32encode(public_key[-3:] + checksum)[-suffix_length:] != suffix:
+                    continue
+            return seed
+        return None
+
+    def _validate(self) -> None:
+        if not self.prefix and not self.suffix:
+            raise ValueError("Informe um prefixo ou sufixo")
+        invalid = set(self.prefix + self.suffix) - set(BASE32_ALPHABET)
+        if invalid:
+            raise ValueError(f"Caracteres inválidos: {''.join(sorted(invalid))}")
+        if self.prefix and self.prefix[0] not in "ABCD":
+            raise ValueError("O primeiro caractere após o G deve ser A, B, C ou D")
+        if len(self.suffix) > MAX_SUFFIX_LENGTH:
+            raise ValueError(f"O sufixo deve ter no máximo {MAX_SUFFIX_LENGTH} caracteres")
+
+
+def _search_worker(prefix: str, suffix: str, batch_size: int, stop, attempts, found) -> None:
+    matcher = VanityMatcher(prefix, suffix)
+    while not stop.is_set():
+        seed = matcher.search(batch_size)
+        with attempts.get_lock():
+            attempts.value += batch_size
+        if seed is not None:
+            found.put(seed)
+
+
+class VanitySearch:
+    def __init__(
+        self,
+        prefix: str = "",
+        suffix: str = "",
+        workers: Optional[int] = None,
+        batch_size: int = BATCH_SIZE
+    ) -> None:
+        self.matcher = VanityMatcher(prefix, suffix)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self._context = multiprocessing.get_context()
+        self._stop = self._context.Event()
+
+    def cancel(self) -> None:
+        self._stop.set()
+
+    def run(self, on_progress: Optional[Callable[[VanityProgress], None]] = None) -> Optional[Keypair]:
+        attempts = self._context.Value("Q", 0)
+        found = self._context.Queue()
+        processes = [
+            self._context.Process(
+                target=_search_worker,
+                args=(self.matcher.prefix, self.matcher.suffix, self.batch_size, self._stop, attempts, found),
+                daemon=True,
+            )
+            for _ in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    seed = found.get(timeout=PROGRESS_INTERVAL)
+                except queue.Empty:
+                    if on_progress:
+                        on_progress(self._progress(attempts.value, started))
+                    continue
+                return Keypair.from_raw_ed25519_seed(seed)
+            return None
+        finally:
+            self._stop.set()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    def _progress(self, attempts: int, started: float) -> VanityProgress:
+        rate = attempts / max(time.monotonic() - started, 1e-9)
+        expected = self.matcher.expected_attempts
+        # Cada tentativa é independente, então a espera esperada não diminui com o tempo
+        return VanityProgress(
+            attempts=attempts,
+            keys_per_second=rate,
+            expected_attempts=expected,
+            eta_seconds=expected / rate if rate else float("inf"),
+        )
+
+
+async def generate_vanity_wallet(
+    prefix: str = "",
+    suffix: str = "",
+    workers: Optional[int] = None,
+    on_progress: Optional[Callable[[VanityProgress], None]] = None
+) -> Dict[str, str]:
+    search = VanitySearch(prefix, suffix, workers)
+    try:
+        keypair = await asyncio.to_thread(search.run, on_progress)
+    except asyncio.CancelledError:
+        search.cancel()
+        raise
+    if keypair is None:
+        raise ValueError("Busca cancelada")
+    return {"public_key": keypair.public_key, "private_key": keypair.secret}
@@ -1,4 +1,11 @@
 from .components import Header, BalanceDisplay, KeyCards, Navigation
-from .pages import WalletPage
 
-__all__ = ["WalletPage", "Header", "BalanceDisplay", "KeyCards", "Navigation"]
\ No newline at end of file
+__all__ = ["WalletPage", "Header", "BalanceDisplay", "KeyCards", "Navigation"]
+
+
+def __getattr__(name: str):
+    # As páginas puxam o núcleo e o stellar_sdk, então só carregam quando usadas
+    if name == "WalletPage":
+        from .pages import WalletPage
+        return WalletPage
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
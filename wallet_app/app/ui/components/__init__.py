@@ -1,8 +1,9 @@
 from .header import Header
 from .balance_card import BalanceDisplay
+from .history_list import HistoryList
 from .key_cards import KeyCards
 from .navigation import Navigation
 from .mnemonic import MnemonicDisplay
 from .success_dialog import SuccessDialog, SuccessDialogData
 from .button import StylizedButton
-__all__ = ["Header", "BalanceDisplay", "KeyCards", "Navigation", "MnemonicDisplay", "SuccessDialog", "SuccessDialogData", "StylizedButton"]
\ No newline at end of file
+__all__ = ["Header", "BalanceDisplay", "HistoryList", "KeyCards", "Navigation", "MnemonicDisplay", "SuccessDialog", "SuccessDialogData", "StylizedButton"]
\ No newline at end of file
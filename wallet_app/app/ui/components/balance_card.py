@@ -1,16 +1,16 @@
 import flet as ft
-from dataclasses import dataclass
-from typing import List, Dict
+from itertools import islice
+from typing import Dict, List
+from app.core.balances import AssetInfo, BalanceEntry, BalanceSheet, format_amount
 from app.ui.styles import ColorScheme
 
+CARD_HEIGHT = 64
+CARD_SPACING = 8
+VISIBLE_CARDS = 8
+# Cartões montados de uma vez; o resto da carteira espera a rolagem
+PAGE_CARDS = 4 * VISIBLE_CARDS
+SCROLL_INTERVAL = 100
 
-@dataclass
-class BalanceInfo:
-    asset_code: str
-    balance: float
-    asset_type: str
-    asset_issuer: str = ''
-    liquidity_pool_id: str = ''
 
 class AssetTheme:
     ICONS: Dict[str, str] = {
@@ -24,63 +24,26 @@ class AssetTheme:
     def get_icon(cls, asset_type: str) -> str:
         return cls.ICONS.get(asset_type, ft.icons.HELP_OUTLINE)
 
-class BalanceProcessor:
-    @staticmethod
-    def process_balance(balance: Dict) -> BalanceInfo:
-        asset_type = balance.get('asset_type', 'native')
-        
-        processors = {
-            'liquidity_pool_shares': BalanceProcessor._process_pool_shares,
-            'native': BalanceProcessor._process_native,
-        }
-        
-        processor = processors.get(asset_type, BalanceProcessor._process_custom_asset)
-        return processor(balance)
-
-    @staticmethod
-    def _process_pool_shares(balance: Dict) -> BalanceInfo:
-        return BalanceInfo(
-            asset_code='Pool Shares',
-            balance=float(balance.get('balance', '0')),
-            asset_type='liquidity_pool_shares',
-            liquidity_pool_id=balance.get('liquidity_pool_id', '')
-        )
-
-    @staticmethod
-    def _process_native(balance: Dict) -> BalanceInfo:
-        return BalanceInfo(
-            asset_code='XLM',
-            balance=float(balance.get('balance', '0')),
-            asset_type='native'
-        )
-
-    @staticmethod
-    def _process_custom_asset(balance: Dict) -> BalanceInfo:
-        return BalanceInfo(
-            asset_code=balance.get('asset_code', 'Unknown'),
-            balance=float(balance.get('balance', '0')),
-            asset_type=balance.get('asset_type', 'unknown'),
-            asset_issuer=balance.get('asset_issuer', '')
-        )
-
-class BalanceCardBuilder:
-    @staticmethod
-    def create_balance_card(balance: BalanceInfo, color_index: int) -> ft.Container:
-
-        return ft.Container(
+class BalanceCard:
+    # Controles montados uma vez e reaproveitados; só o texto do saldo muda a cada atualização
+    def __init__(self) -> None:
+        self.asset: AssetInfo | None = None
+        self.balance = 0
+        self.icon = ft.Icon(color=ColorScheme.STARDUST, size=20)
+        self.asset_code = ft.Text(size=16, weight=ft.FontWeight.BOLD, color=ColorScheme.STARDUST)
+        self.balance_text = ft.Text(size=14, weight=ft.FontWeight.W_600, color=ColorScheme.MILKY_WAY_WHITE)
+        self.additional_info = ft.Text(size=11, color=ColorScheme.STARDUST)
+        self.container = ft.Container(
             content=ft.Row(
                 controls=[
-                    BalanceCardBuilder._build_icon(balance),
+                    ft.Container(content=self.icon, padding=8),
                     ft.Column(
                         controls=[
                             ft.Row(
-                                controls=[
-                                    BalanceCardBuilder._build_asset_code(balance),
-                                    BalanceCardBuilder._build_balance_text(balance.balance),
-                                ],
+                                controls=[self.asset_code, self.balance_text],
                                 alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                             ),
-                            BalanceCardBuilder._build_additional_info(balance),
+                            self.additional_info,
                         ],
                         spacing=3,
                         horizontal_alignment=ft.CrossAxisAlignment.START,
@@ -89,76 +52,111 @@ class BalanceCardBuilder:
                 ],
                 spacing=10,
             ),
-            margin=ft.margin.only(bottom=8),
+            height=CARD_HEIGHT,
+            margin=ft.margin.only(bottom=CARD_SPACING),
             padding=ft.padding.only(left=15, right=15, top=10, bottom=10),
             border_radius=15,
-            gradient=ColorScheme.get_card_gradient(color_index),
-        )
-
-    @staticmethod
-    def _build_icon(balance: BalanceInfo) -> ft.Container:
-        return ft.Container(
-            content=ft.Icon(
-                AssetTheme.get_icon(balance.asset_type),
-                color=ColorScheme.STARDUST,
-                size=20,
-            ),
-            padding=8,
-        )
-
-    @staticmethod
-    def _build_asset_code(balance: BalanceInfo) -> ft.Text:
-        return ft.Text(
-            balance.asset_code,
-            size=16,
-            weight=ft.FontWeight.BOLD,
-            color=ColorScheme.STARDUST,
         )
 
-    @staticmethod
-    def _build_balance_text(balance: float) -> ft.Text:
-        return ft.Text(
-            f"{balance:.7f}",
-            size=14,
-            weight=ft.FontWeight.W_600,
-            color=ColorScheme.MILKY_WAY_WHITE,
-        )
+    def bind(self, entry: BalanceEntry, color_index: int) -> None:
+        self.asset = entry.asset
+        self.balance = entry.balance
+        self.icon.name = AssetTheme.get_icon(entry.asset.asset_type)
+        self.asset_code.value = entry.asset.asset_code
+        self.balance_text.value = self.format_balance(entry.balance)
+        info = self.get_additional_info_text(entry.asset)
+        self.additional_info.value = info
+        self.additional_info.visible = bool(info)
+        self.container.gradient = ColorScheme.get_card_gradient(color_index)
+
+    def set_balance(self, balance: int) -> bool:
+        if balance == self.balance:
+            return False
+        self.balance = balance
+        self.balance_text.value = self.format_balance(balance)
+        return True
 
     @staticmethod
-    def _build_additional_info(balance: BalanceInfo) -> ft.Control:
-        info = BalanceCardBuilder._get_additional_info_text(balance)
-        if not info:
-            return ft.Container()
-            
-        return ft.Text(
-            info,
-            size=11,
-            color=ColorScheme.STARDUST,
-        )
+    def format_balance(stroops: int) -> str:
+        return format_amount(stroops)
 
     @staticmethod
-    def _get_additional_info_text(balance: BalanceInfo) -> str:
-        if balance.asset_type == 'native':
+    def get_additional_info_text(asset: AssetInfo) -> str:
+        if asset.asset_type == 'native':
             return "Native Asset"
-        elif balance.asset_type == 'liquidity_pool_shares':
-            return f"Pool ID: {balance.liquidity_pool_id[:4]}...{balance.liquidity_pool_id[-4:]}"
-        elif balance.asset_issuer:
-            return f"Issuer: {balance.asset_issuer[:4]}...{balance.asset_issuer[-4:]}"
+        elif asset.asset_type == 'liquidity_pool_shares':
+            return f"Pool ID: {asset.liquidity_pool_id[:4]}...{asset.liquidity_pool_id[-4:]}"
+        elif asset.asset_issuer:
+            return f"Issuer: {asset.asset_issuer[:4]}...{asset.asset_issuer[-4:]}"
         return ""
 
 class BalanceDisplay:
-    def __init__(self, balances: List[Dict]):
-        self.balances = [BalanceProcessor.process_balance(balance) for balance in balances]
+    # Cartões montados por página: a próxima entra quando a rolagem chega perto do fim da anterior
+    def __init__(self, balances: BalanceSheet | None = None, page_size: int = PAGE_CARDS):
+        self.page_size = page_size
+        self._balances = BalanceSheet()
+        self._shown = page_size
+        self._cards: Dict[AssetInfo, BalanceCard] = {}
+        self._pool: List[BalanceCard] = []
+        self._next_color = 0
+        # O ListView só desenha os cartões visíveis; item_extent evita medir cada um
+        self.list_view = ft.ListView(
+            controls=[],
+            item_extent=CARD_HEIGHT + CARD_SPACING,
+            height=0,
+            on_scroll=self._on_scroll,
+            on_scroll_interval=SCROLL_INTERVAL,
+        )
+        self.container = ft.Container(
+            content=self.list_view,
+            padding=ft.padding.only(left=20, right=20),
+        )
+        self.update_balances(balances or BalanceSheet())
 
     def build(self) -> ft.Container:
-        return ft.Container(
-            content=ft.Column(
-                controls=[
-                    BalanceCardBuilder.create_balance_card(balance, idx)
-                    for idx, balance in enumerate(self.balances)
-                ],
-                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                spacing=8,
-            ),
-            padding=ft.padding.only(left=20, right=20),
-        )
\ No newline at end of file
+        return self.container
+
+    @property
+    def has_more(self) -> bool:
+        return self._shown < len(self._balances)
+
+    def update_balances(self, balances: BalanceSheet) -> List[ft.Control]:
+        self._balances = balances
+        return self._render()
+
+    def show_more(self) -> List[ft.Control]:
+        if not self.has_more:
+            return []
+        self._shown += self.page_size
+        return self._render()
+
+    def _on_scroll(self, e: ft.OnScrollEvent) -> None:
+        if e.pixels >= e.max_scroll_extent - VISIBLE_CARDS * (CARD_HEIGHT + CARD_SPACING) and self.show_more():
+            self.list_view.update()
+
+    def _render(self) -> List[ft.Control]:
+        # Devolve só os controles que precisam ser enviados ao cliente
+        changed: List[ft.Control] = []
+        previous = self._cards
+        cards: Dict[AssetInfo, BalanceCard] = {}
+        for entry in islice(self._balances, self._shown):
+            card = previous.get(entry.asset)
+            if card is None:
+                card = self._pool.pop() if self._pool else BalanceCard()
+                card.bind(entry, self._next_color)
+                self._next_color += 1
+            elif card.set_balance(entry.balance):
+                changed.append(card.balance_text)
+            cards[entry.asset] = card
+
+        for key, card in previous.items():
+            if key not in cards:
+                self._pool.append(card)
+
+        order = [card.container for card in cards.values()]
+        self._cards = cards
+        if order != self.list_view.controls:
+            self.list_view.controls = order
+            self.list_view.height = min(len(order), VISIBLE_CARDS) * (CARD_HEIGHT + CARD_SPACING)
+            return [self.list_view]
+        return changed
@@ -0,0 +1,62 @@
+import flet as ft
+from typing import Any, Dict, List, Tuple
+from app.ui.styles import ColorScheme
+
+HISTORY_ROWS = 10
+ROW_HEIGHT = 44
+
+
+class HistoryList:
+    # Linhas fixas reaproveitadas; cada atualização só troca os textos
+    def __init__(self, public_key: str = "", rows: int = HISTORY_ROWS) -> None:
+        self.public_key = public_key
+        self.rows = [self._create_row() for _ in range(rows)]
+        self.empty = ft.Text("Nenhuma movimentação registrada", size=12, color=ColorScheme.STARDUST)
+        self.container = ft.Container(
+            content=ft.Column(
+                controls=[
+                    ft.Text("Histórico recente", size=14, weight=ft.FontWeight.W_600, color=ColorScheme.STARDUST),
+                    self.empty,
+                    *(row for row, _, _ in self.rows),
+                ],
+                spacing=4,
+            ),
+            padding=ft.padding.only(left=20, right=20),
+        )
+
+    def build(self) -> ft.Container:
+        return self.container
+
+    @staticmethod
+    def _create_row() -> Tuple[ft.Container, ft.Text, ft.Text]:
+        title = ft.Text(size=13, weight=ft.FontWeight.W_600, color=ColorScheme.MILKY_WAY_WHITE)
+        detail = ft.Text(size=11, color=ColorScheme.STARDUST)
+        row = ft.Container(
+            content=ft.Column(controls=[title, detail], spacing=2),
+            height=ROW_HEIGHT,
+            visible=False,
+        )
+        return row, title, detail
+
+    def update_records(self, public_key: str, records: List[Dict[str, Any]]) -> ft.Container:
+        self.public_key = public_key
+        self.empty.visible = not records
+        for (row, title, detail), record in zip(self.rows, records + [None] * len(self.rows)):
+            row.visible = record is not None
+            if record is not None:
+                title.value, detail.value = self.describe(record)
+        return self.container
+
+    def describe(self, record: Dict[str, Any]) -> Tuple[str, str]:
+        date = (record.get("created_at") or "").replace("T", " ").rstrip("Z")
+        if record.get("type") == "create_account":
+            incoming = record.get("account") == self.public_key
+            counterparty = record.get("funder") if incoming else record.get("account")
+            title = f"{'Conta criada' if incoming else 'Conta ativada'}: {record.get('starting_balance')} XLM"
+        else:
+            incoming = record.get("to") == self.public_key
+            counterparty = record.get("from") if incoming else record.get("to")
+            code = record.get("asset_code", "XLM")
+            title = f"{'Recebido' if incoming else 'Enviado'}: {record.get('amount')} {code}"
+        counterparty = counterparty or ""
+        return title, f"{'De' if incoming else 'Para'} {counterparty[:4]}...{counterparty[-4:]} · {date}"
@@ -1,22 +1,47 @@
+import importlib
 import flet as ft
+from typing import Any, Dict, Optional
+from app.core.metrics import Metrics
 from app.ui.styles import ColorScheme
 
+PAGES = (
+    ("app.ui.pages.wallet_page", "WalletPage"),
+    ("app.ui.pages.balance_page", "BalancePage"),
+    ("app.ui.pages.transfer_page", "TransferPage"),
+)
+
 class Navigation:
-    def __init__(self, page):
+    def __init__(self, page, metrics: Optional[Metrics] = None):
         self.page = page
+        self.metrics = metrics or Metrics()
         self.current_index = 0
-        self.setup_pages()
+        self.pages: Dict[int, Any] = {}
+        self.page_trees: Dict[int, ft.Control] = {}
+        self.page_content = ft.Column(
+            controls=[],
+            scroll=ft.ScrollMode.HIDDEN,
+            expand=True,
+            spacing=0,
+        )
 
-    def setup_pages(self):
-        from app.ui.pages.wallet_page import WalletPage
-        from app.ui.pages.balance_page import BalancePage
-        from app.ui.pages.transfer_page import TransferPage
-        
-        self.pages = [
-            WalletPage(self.page),
-            BalancePage(self.page),
-            TransferPage(self.page),
-        ]
+    def get_page(self, index: int) -> Any:
+        # Cada página é criada só na primeira visita
+        if index not in self.pages:
+            module, name = PAGES[index]
+            page_class = getattr(importlib.import_module(module), name)
+            self.pages[index] = page_class(self.page)
+        return self.pages[index]
+
+    def get_page_tree(self, index: int) -> ft.Control:
+        # A árvore montada é reaproveitada, preservando o estado dos campos entre as abas
+        if index not in self.page_trees:
+            with self.metrics.stage("ui.page_build"):
+                self.page_trees[index] = self.get_page(index).build()
+        return self.page_trees[index]
+
+    def preload_modules(self) -> None:
+        for module, _ in PAGES:
+            importlib.import_module(module)
 
     def build(self):
         return ft.Column(
@@ -31,12 +56,7 @@ class Navigation:
                     height=55,
                 ),
                 ft.Container(
-                    content=ft.Column(
-                        controls=[self.pages[self.current_index].build()],
-                        scroll=ft.ScrollMode.HIDDEN,
-                        expand=True,
-                        spacing=0,
-                    ),
+                    content=self._with_current_page(),
                     expand=True,
                     padding=0,
                 ),
@@ -69,8 +89,16 @@ class Navigation:
             ],
         )
 
+    def _with_current_page(self) -> ft.Column:
+        self.page_content.controls = [self.get_page_tree(self.current_index)]
+        return self.page_content
+
     def change_tab(self, e):
-        self.current_index = e.control.selected_index
-        page_content = self.page.controls[0].controls[1].content
-        page_content.controls = [self.pages[self.current_index].build()]
-        self.page.update()
+        with self.metrics.stage("ui.tab_switch"):
+            # A página que sai encerra o que roda em segundo plano; a árvore continua guardada
+            leave = getattr(self.pages.get(self.current_index), "leave", None)
+            if leave is not None and e.control.selected_index != self.current_index:
+                leave()
+            self.current_index = e.control.selected_index
+            self._with_current_page()
+            self.page.update()
@@ -1,5 +1,18 @@
-from .wallet_page import WalletPage
-from .balance_page import BalancePage
-from .transfer_page import TransferPage
+import importlib
+from typing import Any
 
-__all__ = ["WalletPage", "BalancePage", "TransferPage"]
\ No newline at end of file
+_MODULES = {
+    "WalletPage": ".wallet_page",
+    "BalancePage": ".balance_page",
+    "TransferPage": ".transfer_page",
+}
+
+__all__ = ["WalletPage", "BalancePage", "TransferPage"]
+
+
+def __getattr__(name: str) -> Any:
+    # Importar uma página não deve carregar as outras
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(module, __name__), name)
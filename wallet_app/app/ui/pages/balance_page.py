@@ -1,19 +1,31 @@
+import asyncio
+import logging
 import flet as ft
-from app.ui.components import Header, BalanceDisplay, StylizedButton
+from app.ui.components import Header, BalanceDisplay, HistoryList, StylizedButton
+from app.ui.components.history_list import HISTORY_ROWS
 from app.ui.styles import ColorScheme
-from stellar_sdk import Server
-import asyncio
 from typing import Optional, cast
 from app.core.models import KeyType
 from app.core.services import BalanceProcessor
+from app.core.horizon import HorizonClient
+from app.core.balances import BalanceSheet, format_amount
+from app.core.valuation import PortfolioValuator
+from app.core.history import HistoryStore, HistorySync
+from app.core.streams import BalanceSubscription
+
+logger = logging.getLogger(__name__)
 
 
 class BalancePage:
     def __init__(self, page: ft.Page) -> None:
         self.page = page
         self.header = Header(page.window.width)
-        self.server = Server("https://horizon.stellar.org")
-        self.balance_processor = BalanceProcessor(self.server)
+        self.horizon = HorizonClient.shared()
+        self.balance_processor = BalanceProcessor(self.horizon)
+        self.valuator = PortfolioValuator(self.horizon)
+        self.history: Optional[HistorySync] = None
+        self.subscription: Optional[BalanceSubscription] = None
+        self.live_task: Optional[asyncio.Task] = None
         self.setup_components()
         
     def setup_components(self) -> None:
@@ -54,9 +66,12 @@ class BalancePage:
             self.error_container.visible = show
 
     def _create_balance_container(self) -> ft.Container:
+        self.balance_display = BalanceDisplay()
+        self.history_list = HistoryList()
+        self.total_text = ft.Text("Calculando valor total...", size=14, weight=ft.FontWeight.W_600, color=ColorScheme.STARDUST)
         return ft.Container(
             content=ft.Column(
-                controls=[],
+                controls=[self.total_text, self.balance_display.build(), self.history_list.build()],
                 horizontal_alignment=ft.CrossAxisAlignment.CENTER,
                 spacing=10,
             ),
@@ -110,7 +125,7 @@ class BalancePage:
             width=self.page.window.width,
         )
 
-    def _load_balance(self, e) -> None:
+    async def _load_balance(self, e) -> None:
         key = self.key_field.value
         validation_result = self.balance_processor.validate_key(key)
         
@@ -118,28 +133,37 @@ class BalancePage:
             self.update_error_message(validation_result.error_message, True)
             self.balance_container.visible = False
             self.loading.visible = False
-            self.page.update()
+            self.page.update(self.error_container, self.balance_container, self.loading)
             return
 
         e.control.disabled = True
         self.update_error_message(show=False)
-        self.balance_container.visible = False
         self.loading.visible = True
-        self.page.update()
+        self.page.update(e.control, self.error_container, self.loading)
         
-        asyncio.run(self._account_balance(e, validation_result.public_key))
+        await self._account_balance(e, validation_result.public_key)
         
     async def _account_balance(self, e, public_key: str) -> None:
+        # Só os controles alterados vão para o cliente; a lista inteira não é reenviada a cada consulta
+        changed = []
         try:
             account = await self.balance_processor.fetch_account_data(public_key)
             if not account.get("balances"):
                 self.update_error_message("Nenhum saldo encontrado", True)
+                self.balance_container.visible = False
+                changed = [self.balance_container]
                 return
             processed_balances = self.balance_processor.process_balances(account["balances"])
-            balance_display = BalanceDisplay(processed_balances)
-            self.balance_container.content = balance_display.build()
-            self.balance_container.visible = True
-            self.page.update()
+            changed = self.balance_display.update_balances(processed_balances)
+            if not self.balance_container.visible:
+                self.balance_container.visible = True
+                changed = [self.balance_container]
+            if changed:
+                self.page.update(*changed)
+            self._watch(public_key)
+            changed = [await self._update_total(public_key, processed_balances)]
+            self.page.update(*changed)
+            changed = [await self._update_history(public_key)]
             
         except Exception as ex:
             self.page.open(
@@ -152,4 +176,65 @@ class BalancePage:
         finally:
             e.control.disabled = False
             self.loading.visible = False
-            self.page.update()
\ No newline at end of file
+            self.page.update(e.control, self.loading, self.error_container, *changed)
+
+    async def _update_total(self, public_key: str, balances: BalanceSheet) -> ft.Text:
+        # Os saldos já estão na tela; o valor total chega depois, quando as cotações respondem
+        try:
+            valuation = await self.valuator.value({public_key: balances})
+            total = f"Valor total: {format_amount(valuation.total)} {valuation.quote.asset_code}"
+            if valuation.unpriced:
+                total += f" ({len(valuation.unpriced)} sem cotação)"
+        except Exception:
+            total = "Valor total indisponível"
+        self.total_text.value = total
+        return self.total_text
+
+    async def _update_history(self, public_key: str) -> ft.Container:
+        # Só as páginas novas vêm do Horizon; a lista é lida do banco local
+        try:
+            if self.history is None:
+                store = await asyncio.to_thread(HistoryStore.shared)
+                self.history = HistorySync(self.horizon, store)
+            try:
+                await self.history.sync_kind(public_key, "payments")
+            except Exception:
+                # Sem Horizon, ainda vale mostrar o que já está no banco
+                pass
+            records = await asyncio.to_thread(
+                self.history.store.records, self.horizon.horizon_url, public_key, "payments", HISTORY_ROWS
+            )
+        except Exception:
+            logger.exception("Falha ao ler o histórico local de %s", public_key)
+            return self.history_list.build()
+        return self.history_list.update_records(public_key, records)
+
+    def _watch(self, public_key: str) -> None:
+        # Depois da primeira consulta, os saldos passam a chegar pelo stream, sem novo clique
+        if self.subscription is not None and self.subscription.public_keys == [public_key]:
+            return
+        self.leave()
+        self.subscription = self.balance_processor.watch([public_key])
+        self.live_task = asyncio.create_task(self._follow(self.subscription))
+
+    def leave(self) -> None:
+        # Chamado pela navegação ao trocar de aba: fecha o stream e a tarefa que o consome
+        if self.subscription is not None:
+            self.subscription.close()
+            self.subscription = None
+        if self.live_task is not None:
+            self.live_task.cancel()
+            self.live_task = None
+
+    async def _follow(self, subscription: BalanceSubscription) -> None:
+        try:
+            async for delta in subscription:
+                changed = self.balance_display.update_balances(delta.balances)
+                if not changed or not delta.changes:
+                    continue
+                self.page.update(*changed)
+                self.page.update(await self._update_total(delta.public_key, delta.balances))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Atualização ao vivo dos saldos parou")
@@ -1,20 +1,20 @@
 import flet as ft
 from app.ui.components import Header, SuccessDialog, SuccessDialogData, StylizedButton
 from app.ui.styles import ColorScheme
-from stellar_sdk import Server, Keypair
-import asyncio
 from typing import Optional, cast
 from decimal import Decimal
-from app.core.models import OperationType, TransactionData, TransactionResult
+from app.core.models import KeyType, OperationType, TransactionData, TransactionResult
 from app.core.services import TransactionProcessor
+from app.core.horizon import HorizonClient
+from app.core.strkey import key_validator, secret_scope
 
 
 class TransferPage:
     def __init__(self, page: ft.Page) -> None:
         self.page = page
         self.header = Header(page.window.width)
-        self.server = Server("https://horizon.stellar.org")
-        self.transaction_processor = TransactionProcessor(self.server)
+        self.horizon = HorizonClient.shared()
+        self.transaction_processor = TransactionProcessor(self.horizon)
         self.setup_components()
 
     def setup_components(self) -> None:
@@ -159,19 +159,11 @@ class TransferPage:
 
     def _validate_private_key(self) -> bool:
         private_key = str(self.private_key_field.value).strip()
-        try:
-            Keypair.from_secret(private_key)
-            return False
-        except Exception:
-            return True
+        return key_validator.validate(private_key).type != KeyType.PRIVATE
 
     def _validate_recipient(self) -> bool:
         recipient = str(self.recipient_field.value).strip()
-        try:
-            Keypair.from_public_key(recipient)
-            return False
-        except Exception:
-            return True
+        return key_validator.validate(recipient).type != KeyType.PUBLIC
 
     def _show_transaction_success(self, result: TransactionResult) -> None:
         operation_messages = {
@@ -234,12 +226,14 @@ class TransferPage:
             width=self.page.window.width,
         )
 
-    def _handle_transaction(self, e) -> None:
+    async def _handle_transaction(self, e) -> None:
         e.control.disabled = True
         self.loading.visible = True
         self.error_container.visible = False
         self.page.update()
-        asyncio.run(self._process_transaction(e))
+        # A chave privada é decodificada uma vez e reaproveitada até o fim da requisição
+        with secret_scope():
+            await self._process_transaction(e)
 
     async def _process_transaction(self, e) -> None:
         try:
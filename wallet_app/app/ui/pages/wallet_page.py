@@ -1,7 +1,5 @@
 import flet as ft
-from app.core.services import generate_wallet
 from app.ui.components import Header, KeyCards, MnemonicDisplay, StylizedButton
-import asyncio
 from typing import Dict
 from app.ui.styles import ColorScheme
 
@@ -77,6 +75,8 @@ class WalletPage:
         self.page.update()
 
     async def _async_wallet_creation(self, e: ft.ControlEvent) -> None:
+        from app.core.services import generate_wallet
+
         try:
             wallet_data = await generate_wallet()
             self._update_wallet_ui(wallet_data)
@@ -102,8 +102,8 @@ class WalletPage:
             self.mnemonic_container.visible = True
             self.page.update()
     
-    def create_wallet(self, e) -> None:
+    async def create_wallet(self, e) -> None:
         e.control.disabled = True
         self.loading.visible = True
         self.page.update()
-        asyncio.run(self._async_wallet_creation(e))
\ No newline at end of file
+        await self._async_wallet_creation(e)
\ No newline at end of file
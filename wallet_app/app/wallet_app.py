@@ -1,16 +1,24 @@
+import logging
+import time
 import flet as ft
+from app.core.metrics import LoggingSink, Metrics
 from app.ui.components import Navigation
 from app.ui.styles import ColorScheme
 
 class StellarWalletApp:
     def __init__(self):
+        self.started_at = time.perf_counter()
+        self.metrics = Metrics([LoggingSink(level=logging.DEBUG)])
         ft.app(target=self.main)
 
     def main(self, page: ft.Page):
         self.setup_page_config(page)
-        navigation = Navigation(page)
+        navigation = Navigation(page, self.metrics)
         page.add(navigation.build())
         page.update()
+        self.metrics.observe("ui.startup", time.perf_counter() - self.started_at)
+        # Com a janela já aberta, as outras páginas são importadas em segundo plano
+        page.run_thread(navigation.preload_modules)
 
     def setup_page_config(self, page: ft.Page):
         page.title = "Nebulosa"
@@ -0,0 +1,481 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from stellar_sdk import Account, Asset, Keypair, Network, TransactionBuilder
+
+SEED = 1234
+REPEAT = 5
+REGRESSION_THRESHOLD = 0.10
+KEY_COUNT = 100_000
+TRUSTLINE_SIZES = (1, 100, 1000, 10_000)
+DISPLAY_SIZES = (10, 100, 1000)
+TRANSACTION_COUNT = 200
+E2E_TRANSACTIONS = 50
+E2E_COLD_TRANSACTIONS = 10
+# Latência por requisição no envio a frio: cada ida e volta ao Horizon fica visível
+E2E_LATENCY = 0.02
+HISTORY_PAYMENTS = 1000
+TREASURY_ACCOUNTS = 500
+TREASURY_ASSETS = 2000
+TREASURY_TRUSTLINES = 20
+APP_ROOT = Path(__file__).resolve().parent
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    samples: List[float]
+    operations: int = 1
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.samples)
+        median = statistics.median(samples)
+        return {
+            "median": median,
+            "min": samples[0],
+            "p95": samples[min(int(len(samples) * 0.95), len(samples) - 1)],
+            "samples": len(samples),
+            "operations": self.operations,
+            "ops_per_second": self.operations / median if median else 0.0,
+            **self.extra,
+        }
+
+
+def measure(
+    name: str,
+    run: Callable[[], Any],
+    repeat: int,
+    operations: int = 1,
+    extra: Optional[Dict[str, Any]] = None
+) -> BenchmarkResult:
+    run()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - started)
+    return BenchmarkResult(name, samples, operations, extra or {})
+
+
+def random_keypair(rng: random.Random) -> Keypair:
+    return Keypair.from_raw_ed25519_seed(rng.randbytes(32))
+
+
+def sample_balances(rng: random.Random, count: int) -> List[Dict[str, Any]]:
+    issuer = random_keypair(rng).public_key
+    balances: List[Dict[str, Any]] = [{"balance": "1000.0000000", "asset_type": "native"}]
+    for index in range(count - 1):
+        if index % 10 == 9:
+            balances.append({
+                "balance": f"{rng.randrange(10**9) / 10**7:.7f}",
+                "asset_type": "liquidity_pool_shares",
+                "liquidity_pool_id": rng.randbytes(32).hex(),
+            })
+        else:
+            balances.append({
+                "balance": f"{rng.randrange(10**12) / 10**7:.7f}",
+                "asset_type": "credit_alphanum4" if index % 2 else "credit_alphanum12",
+                "asset_code": f"A{index:05d}",
+                "asset_issuer": issuer,
+            })
+    rng.shuffle(balances)
+    return balances
+
+
+def bench_key_validation(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from app.core.strkey import KeyValidator
+
+    keys = [random_keypair(rng).public_key for _ in range(KEY_COUNT)]
+    cached = KeyValidator(cache_size=len(keys))
+    # Validador novo a cada rodada para medir a decodificação, não o cache
+    return [
+        measure("key_validation.cold", lambda: KeyValidator(cache_size=len(keys)).validate_many(keys), repeat, len(keys)),
+        measure("key_validation.cached", lambda: cached.validate_many(keys), repeat, len(keys)),
+    ]
+
+
+def bench_process_balances(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from app.core.horizon import HorizonClient
+    from app.core.services import BalanceProcessor
+
+    processor = BalanceProcessor(HorizonClient("http://127.0.0.1"))
+    results = []
+    for size in TRUSTLINE_SIZES:
+        balances = sample_balances(rng, size)
+        results.append(measure(
+            f"process_balances.{size}", lambda: processor.process_balances(balances), repeat, size
+        ))
+    return results
+
+
+def bench_build_and_sign(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    source = random_keypair(rng)
+    destination = random_keypair(rng).public_key
+
+    def run() -> None:
+        for sequence in range(TRANSACTION_COUNT):
+            transaction = (
+                TransactionBuilder(Account(source.public_key, sequence), Network.PUBLIC_NETWORK_PASSPHRASE, 100)
+                .append_payment_op(destination, Asset.native(), "1")
+                .set_timeout(30)
+                .build()
+            )
+            transaction.sign(source)
+            transaction.to_xdr()
+
+    return [measure("build_and_sign", run, repeat, TRANSACTION_COUNT)]
+
+
+def bench_process_transaction(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from app.core.emulator import HorizonEmulator
+    from app.core.horizon import HorizonClient
+    from app.core.models import OperationType, TransactionData
+    from app.core.services import TransactionProcessor
+
+    source = random_keypair(rng)
+    destination = random_keypair(rng)
+
+    async def run() -> List[float]:
+        async with HorizonEmulator(seed=SEED) as emulator:
+            emulator.fund(source.public_key, "100000")
+            emulator.fund(destination.public_key, "10")
+            horizon = HorizonClient(emulator.url, Network.PUBLIC_NETWORK_PASSPHRASE)
+            processor = TransactionProcessor(horizon)
+            data = TransactionData(
+                source.secret, destination.public_key, "1", OperationType.TRANSFER, asset_type="XLM (Nativo)"
+            )
+            latencies = []
+            try:
+                for index in range(E2E_TRANSACTIONS * repeat + 1):
+                    started = time.perf_counter()
+                    result = await processor.process_transaction(data)
+                    if not result.success:
+                        raise RuntimeError(result.message)
+                    if index:
+                        latencies.append(time.perf_counter() - started)
+            finally:
+                await horizon.close()
+            return latencies
+
+    async def run_cold() -> List[float]:
+        # Cliente novo a cada envio: sem taxa, sequência nem conta em cache
+        async with HorizonEmulator(seed=SEED, latency=E2E_LATENCY) as emulator:
+            emulator.fund(source.public_key, "100000")
+            emulator.fund(destination.public_key, "10")
+            data = TransactionData(
+                source.secret, destination.public_key, "1", OperationType.TRANSFER, asset_type="XLM (Nativo)"
+            )
+            latencies = []
+            for _ in range(E2E_COLD_TRANSACTIONS * repeat):
+                horizon = HorizonClient(emulator.url, Network.PUBLIC_NETWORK_PASSPHRASE)
+                try:
+                    started = time.perf_counter()
+                    result = await TransactionProcessor(horizon).process_transaction(data)
+                    latencies.append(time.perf_counter() - started)
+                finally:
+                    await horizon.close()
+                if not result.success:
+                    raise RuntimeError(result.message)
+            return latencies
+
+    return [
+        BenchmarkResult("process_transaction.emulator", asyncio.run(run())),
+        BenchmarkResult("process_transaction.cold", asyncio.run(run_cold())),
+    ]
+
+
+def bench_valuation(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from app.core.emulator import HorizonEmulator
+    from app.core.horizon import HorizonClient
+    from app.core.services import BalanceProcessor
+    from app.core.valuation import PortfolioValuator
+
+    issuer = random_keypair(rng).public_key
+    assets = [f"T{index:04d}:{issuer}" for index in range(TREASURY_ASSETS)]
+    accounts = [random_keypair(rng).public_key for _ in range(TREASURY_ACCOUNTS)]
+
+    async def run() -> List[BenchmarkResult]:
+        async with HorizonEmulator(seed=SEED) as emulator:
+            # Metade dos ativos com livro de ofertas, o resto só por caminhos, alguns sem mercado
+            for index, asset in enumerate(assets):
+                if index % 20:
+                    emulator.set_price(asset, f"{rng.randrange(1, 10**6)}/1000", order_book=index % 2 == 0)
+            for account in accounts:
+                emulator.fund(account, "1000")
+                for asset in rng.sample(assets, TREASURY_TRUSTLINES):
+                    emulator.trust(account, asset, f"{rng.randrange(10**9) / 10**7:.7f}")
+            horizon = HorizonClient(emulator.url, Network.PUBLIC_NETWORK_PASSPHRASE)
+            try:
+                sheets = {
+                    result.public_key: result.balances
+                    async for result in BalanceProcessor(horizon).fetch_many(accounts)
+                }
+                valuator = PortfolioValuator(horizon)
+                cold, warm = [], []
+                requests = 0
+                for _ in range(repeat):
+                    horizon.prices.cache.clear()
+                    before = horizon.metrics.snapshot()["counters"]["horizon.requests"]
+                    started = time.perf_counter()
+                    await valuator.value(sheets)
+                    cold.append(time.perf_counter() - started)
+                    requests = horizon.metrics.snapshot()["counters"]["horizon.requests"] - before
+                    started = time.perf_counter()
+                    await valuator.value(sheets)
+                    warm.append(time.perf_counter() - started)
+            finally:
+                await horizon.close()
+        distinct = len({asset for sheet in sheets.values() for asset in sheet.totals()})
+        return [
+            BenchmarkResult("valuation.cold", cold, TREASURY_ACCOUNTS, {
+                "horizon_requests": requests, "requests_per_asset": requests / distinct,
+            }),
+            BenchmarkResult("valuation.cached", warm, TREASURY_ACCOUNTS),
+        ]
+
+    return asyncio.run(run())
+
+
+def bench_history(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from app.core.emulator import HorizonEmulator
+    from app.core.history import HistoryStore, HistorySync
+    from app.core.horizon import HorizonClient
+
+    source = random_keypair(rng)
+    destination = random_keypair(rng).public_key
+
+    async def run() -> List[BenchmarkResult]:
+        async with HorizonEmulator(seed=SEED) as emulator:
+            emulator.fund(source.public_key, "100000")
+            emulator.fund(destination, "10")
+            for _ in range(HISTORY_PAYMENTS):
+                sequence = emulator.accounts[source.public_key].sequence
+                transaction = (
+                    TransactionBuilder(Account(source.public_key, sequence), emulator.network_passphrase, 100)
+                    .append_payment_op(destination, Asset.native(), "1")
+                    .set_timeout(30)
+                    .build()
+                )
+                transaction.sign(source)
+                status, _ = emulator.submit(transaction.to_xdr())
+                if status != 200:
+                    raise RuntimeError("O emulador recusou um pagamento do histórico")
+            horizon = HorizonClient(emulator.url, emulator.network_passphrase)
+            full, incremental, local, remote = [], [], [], []
+            try:
+                for _ in range(repeat):
+                    store = HistoryStore(":memory:")
+                    history = HistorySync(horizon, store)
+                    started = time.perf_counter()
+                    await history.sync(source.public_key)
+                    full.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    await history.sync(source.public_key)
+                    incremental.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    store.records(horizon.horizon_url, source.public_key, limit=50)
+                    local.append(time.perf_counter() - started)
+                    started = time.perf_counter()
+                    await horizon.server.payments().for_account(source.public_key).order(desc=True).limit(50).call()
+                    remote.append(time.perf_counter() - started)
+                    store.close()
+            finally:
+                await horizon.close()
+        return [
+            BenchmarkResult("history.full_sync", full, HISTORY_PAYMENTS * 3),
+            BenchmarkResult("history.incremental_sync", incremental),
+            BenchmarkResult("history.query_local", local, 50),
+            BenchmarkResult("history.query_horizon", remote, 50),
+        ]
+
+    return asyncio.run(run())
+
+
+def count_controls(control: Any) -> int:
+    total = 1
+    content = getattr(control, "content", None)
+    if content is not None and hasattr(content, "_get_control_name"):
+        total += count_controls(content)
+    for child in getattr(control, "controls", None) or []:
+        total += count_controls(child)
+    return total
+
+
+def bench_balance_display(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from app.core.balances import BalanceSheet
+    from app.ui.components import BalanceDisplay
+
+    results = []
+    for size in DISPLAY_SIZES:
+        raw_balances = sample_balances(rng, size)
+        balances = BalanceSheet.from_horizon(raw_balances)
+        display = BalanceDisplay(balances)
+        results.append(measure(
+            f"balance_display.{size}", lambda: BalanceDisplay(balances), repeat, size,
+            {"controls": count_controls(display.build())}
+        ))
+        # Atualização com poucos saldos alterados: só esses textos devem ir ao cliente
+        updated = [dict(balance) for balance in raw_balances]
+        for balance in rng.sample(updated, max(1, size // 100)):
+            balance["balance"] = f"{float(balance['balance']) + 1:.7f}"
+        updated = BalanceSheet.from_horizon(updated, balances.assets)
+        sent: List[Any] = []
+        rounds = iter([updated, balances] * (repeat + 1))
+
+        def update() -> None:
+            sent[:] = display.update_balances(next(rounds))
+
+        result = measure(f"balance_display.update.{size}", update, repeat, size)
+        result.extra["controls"] = sum(count_controls(control) for control in sent)
+        results.append(result)
+    return results
+
+
+class HeadlessPage:
+    # Só o que as páginas usam de ft.Page, para medir a montagem sem abrir janela
+    def __init__(self) -> None:
+        self.window = type("Window", (), {"width": 430, "height": 732})()
+        self.overlay: List[Any] = []
+        self.controls: List[Any] = []
+
+    def add(self, *controls: Any) -> None:
+        self.controls.extend(controls)
+
+    def update(self, *controls: Any) -> None:
+        pass
+
+
+def bench_navigation(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    from types import SimpleNamespace
+    from app.ui.components import Navigation
+
+    def first_paint() -> None:
+        page = HeadlessPage()
+        page.add(Navigation(page).build())
+
+    navigation = Navigation(HeadlessPage())
+    navigation.build()
+    event = SimpleNamespace(control=SimpleNamespace(selected_index=0))
+
+    def switch_tabs() -> None:
+        for index in (1, 2, 0):
+            event.control.selected_index = index
+            navigation.change_tab(event)
+
+    return [
+        measure("navigation.first_paint", first_paint, repeat),
+        measure("navigation.tab_switch", switch_tabs, repeat, 3),
+    ]
+
+
+def bench_cold_start(rng: random.Random, repeat: int) -> List[BenchmarkResult]:
+    # Interpretador novo a cada rodada; a janela em si depende de display e fica de fora
+    def run() -> None:
+        subprocess.run(
+            [sys.executable, "-c", "import app.wallet_app"],
+            cwd=APP_ROOT, check=True, env={**os.environ, "PYTHONPATH": str(APP_ROOT)},
+        )
+
+    return [measure("cold_start.import", run, repeat)]
+
+
+BENCHMARKS: Dict[str, Callable[[random.Random, int], List[BenchmarkResult]]] = {
+    "key_validation": bench_key_validation,
+    "process_balances": bench_process_balances,
+    "build_and_sign": bench_build_and_sign,
+    "process_transaction": bench_process_transaction,
+    "valuation": bench_valuation,
+    "history": bench_history,
+    "balance_display": bench_balance_display,
+    "navigation": bench_navigation,
+    "cold_start": bench_cold_start,
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmarks(names: List[str], repeat: int = REPEAT, seed: int = SEED) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for name in names:
+        for result in BENCHMARKS[name](random.Random(seed), repeat):
+            results[result.name] = result.summary()
+            print(f"{result.name:<32} {results[result.name]['median'] * 1000:>10.3f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    regressions = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous["median"]:
+            continue
+        ratio = result["median"] / previous["median"]
+        result["baseline_median"] = previous["median"]
+        result["change"] = ratio - 1
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: {previous['median'] * 1000:.3f} ms -> {result['median'] * 1000:.3f} ms "
+                               f"(+{(ratio - 1) * 100:.1f}%)")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks da carteira")
+    parser.add_argument("names", nargs="*", help=f"benchmarks a rodar: {', '.join(BENCHMARKS)} (padrão: todos)")
+    parser.add_argument("-o", "--output", help="grava os resultados em JSON")
+    parser.add_argument("-b", "--baseline", help="JSON de uma rodada anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="piora relativa da mediana considerada regressão")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args(argv)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmarks desconhecidos: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(args.names or list(BENCHMARKS), args.repeat, args.seed)
+    regressions: List[str] = []
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    for regression in regressions:
+        print(f"REGRESSÃO {regression}", file=sys.stderr)
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import argparse
+import getpass
+import os
+import sys
+from typing import List, Optional
+from app.core.keygen import CHUNK_SIZE, write_wallets
+
+PASSWORD_ENV = "NEBULOSA_WALLET_PASSWORD"
+
+
+def _read_password() -> str:
+    password = os.environ.get(PASSWORD_ENV)
+    if password:
+        return password
+    password = getpass.getpass("Senha do arquivo: ")
+    if password != getpass.getpass("Confirme a senha: "):
+        raise SystemExit("As senhas não conferem")
+    return password
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Gera carteiras Stellar em lote")
+    parser.add_argument("count", type=int, help="quantidade de carteiras")
+    parser.add_argument("-o", "--output", required=True, help="arquivo criptografado de saída")
+    parser.add_argument("--no-mnemonic", action="store_true", help="gera só o par de chaves, sem frase")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: todos os núcleos)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="carteiras por lote")
+    args = parser.parse_args(argv)
+
+    password = _read_password()
+    for written in write_wallets(
+        args.output, args.count, password, not args.no_mnemonic, args.workers, args.chunk_size
+    ):
+        print(f"\r{written}/{args.count} carteiras", end="", file=sys.stderr)
+    print(file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
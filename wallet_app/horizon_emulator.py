@@ -0,0 +1,43 @@
+import argparse
+from typing import List, Optional
+from aiohttp import web
+from app.core.emulator import BASE_FEE, EMULATOR_HOST, EMULATOR_PORT, HorizonEmulator
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Emulador local do Horizon")
+    parser.add_argument("--host", default=EMULATOR_HOST)
+    parser.add_argument("--port", type=int, default=EMULATOR_PORT)
+    parser.add_argument("--fund", action="append", default=[], metavar="CHAVE[:SALDO]",
+                        help="conta criada no ledger inicial (pode repetir)")
+    parser.add_argument("--base-fee", type=int, default=BASE_FEE)
+    parser.add_argument("--capacity-usage", type=float, default=0.5)
+    parser.add_argument("--latency", type=float, default=0.0, help="atraso por requisição em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0, help="atraso aleatório extra em segundos")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de requisições com 503")
+    parser.add_argument("--submit-timeout-rate", type=float, default=0.0,
+                        help="fração de envios aplicados que respondem 504")
+    parser.add_argument("--rate-limit", type=int, default=0, help="pedidos por hora antes de responder 429")
+    parser.add_argument("--rate-limit-burst", type=int, default=None, help="rajada máxima (padrão: o limite)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    emulator = HorizonEmulator(
+        base_fee=args.base_fee,
+        capacity_usage=args.capacity_usage,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        submit_timeout_rate=args.submit_timeout_rate,
+        rate_limit=args.rate_limit,
+        rate_limit_burst=args.rate_limit_burst,
+        seed=args.seed,
+    )
+    for entry in args.fund:
+        public_key, _, balance = entry.partition(":")
+        emulator.fund(public_key, balance or "10000")
+    web.run_app(emulator.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple
+import pytest
+from stellar_sdk import Network
+from app.core.emulator import HorizonEmulator
+from app.core.horizon import HorizonClient
+
+
+@asynccontextmanager
+async def _horizon(**options) -> AsyncIterator[Tuple[HorizonEmulator, HorizonClient]]:
+    # Ledger próprio por teste, numa porta livre; o cliente é fechado junto com o emulador
+    options.setdefault("seed", 1)
+    async with HorizonEmulator(**options) as emulator:
+        horizon = HorizonClient(emulator.url, Network.PUBLIC_NETWORK_PASSPHRASE)
+        try:
+            yield emulator, horizon
+        finally:
+            await horizon.close()
+
+
+@pytest.fixture
+def horizon():
+    return _horizon
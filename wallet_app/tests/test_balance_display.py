@@ -0,0 +1,36 @@
+from stellar_sdk import Keypair
+from app.core.balances import BalanceSheet
+from app.ui.components.balance_card import PAGE_CARDS, BalanceDisplay
+
+ISSUER = Keypair.random().public_key
+
+
+def sheet(count: int, bump: int = 0) -> BalanceSheet:
+    return BalanceSheet.from_horizon([
+        {"asset_type": "credit_alphanum12", "asset_code": f"TOKEN{index}", "asset_issuer": ISSUER,
+         "balance": f"{index + (bump if index == count - 1 else 0)}.0000000"}
+        for index in range(count)
+    ])
+
+
+def test_cards_are_built_one_page_at_a_time():
+    display = BalanceDisplay(sheet(2 * PAGE_CARDS + 1))
+
+    assert len(display.list_view.controls) == PAGE_CARDS
+    assert display.show_more() == [display.list_view]
+    assert display.show_more() == [display.list_view]
+    assert len(display.list_view.controls) == 2 * PAGE_CARDS + 1
+    assert not display.has_more
+    assert display.show_more() == []
+
+
+def test_update_past_the_page_sends_nothing():
+    display = BalanceDisplay(sheet(2 * PAGE_CARDS))
+
+    assert display.update_balances(sheet(2 * PAGE_CARDS, bump=5)) == []
+    display.show_more()
+    last = display.list_view.controls[-1]
+    changed = display.update_balances(sheet(2 * PAGE_CARDS))
+
+    assert display.list_view.controls[-1] is last
+    assert len(changed) == 1 and changed[0].value == f"{2 * PAGE_CARDS - 1}.0000000"
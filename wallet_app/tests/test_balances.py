@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from stellar_sdk import Keypair
+from app.core.balances import (
+    MAX_AMOUNT,
+    AssetInfo,
+    AssetTable,
+    BalanceSheet,
+    aggregate,
+    format_amount,
+    parse_amount,
+)
+from app.core.services import BalanceProcessor
+
+ISSUER = Keypair.random().public_key
+XLM = AssetInfo("native", "XLM")
+USDC = AssetInfo("credit_alphanum4", "USDC", ISSUER)
+
+
+def native(balance: str, **extra: str):
+    return {"asset_type": "native", "balance": balance, **extra}
+
+
+def usdc(balance: str, **extra: str):
+    return {"asset_type": "credit_alphanum4", "asset_code": "USDC", "asset_issuer": ISSUER, "balance": balance, **extra}
+
+
+@pytest.mark.parametrize("amount, stroops", [
+    ("1.0000000", 10_000_000),
+    ("0.0000001", 1),
+    ("922337203685.4775807", MAX_AMOUNT),
+    ("-3.5000000", -35_000_000),
+    ("12", 120_000_000),
+    ("0.5", 5_000_000),
+])
+def test_parse_amount_is_exact(amount, stroops):
+    assert parse_amount(amount) == stroops
+
+
+@pytest.mark.parametrize("amount", [
+    "1.00000001", "abc", "1e5", "922337203685.4775808",
+    "1_0.5", "1_0.5000000", "1.000_000", " 7.25 ", " 7.2500000", "7.2500000 ", "+1.0000000", "+2",
+    "--1.0000000", "-+1", "١٢.0000000", "²", "",
+])
+def test_parse_amount_rejects_invalid_values(amount):
+    with pytest.raises(ValueError):
+        parse_amount(amount)
+
+
+@pytest.mark.parametrize("stroops", [0, 1, -1, 10_000_000, MAX_AMOUNT, -MAX_AMOUNT])
+def test_format_amount_round_trips(stroops):
+    assert parse_amount(format_amount(stroops)) == stroops
+
+
+def test_sheet_keeps_exact_columns_and_sorts_native_first():
+    sheet = BalanceSheet.from_horizon([
+        usdc("10.1000000", limit="1000.0000000", selling_liabilities="0.1000000"),
+        native("0.3000000", buying_liabilities="0.2000000"),
+    ]).sorted()
+
+    entries = list(sheet)
+    assert [entry.asset for entry in entries] == [XLM, USDC]
+    assert entries[0].balance == 3_000_000
+    assert entries[0].limit == MAX_AMOUNT
+    assert entries[0].buying_liabilities == 2_000_000
+    assert entries[1].available == 100_000_000
+    assert entries[1].limit == 10_000_000_000
+    assert sheet.to_dicts()[1]["balance"] == "10.1000000"
+
+
+def test_totals_add_without_float_error():
+    sheet = BalanceSheet.from_horizon([native("0.1000000"), native("0.2000000"), usdc("1.0000000")])
+    assert sheet.totals() == {XLM: 3_000_000, USDC: 10_000_000}
+    assert format_amount(sheet.totals()[XLM]) == "0.3000000"
+
+
+def test_aggregate_goes_past_int64_across_tables():
+    shared = AssetTable()
+    sheets = [BalanceSheet.from_horizon([native(format_amount(MAX_AMOUNT))], shared) for _ in range(2)]
+    sheets.append(BalanceSheet.from_horizon([native("1.0000000"), usdc("2.0000000")]))
+
+    totals = aggregate(sheets)
+
+    assert totals[XLM] == 2 * MAX_AMOUNT + 10_000_000
+    assert totals[USDC] == 20_000_000
+    assert len(shared) == 1
+
+
+def test_sheet_matches_the_emulated_ledger(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            holder = Keypair.random().public_key
+            emulator.fund(holder, "25.5")
+            emulator.trust(holder, f"USDC:{ISSUER}", "7.0000001")
+            account = await client.server.accounts().account_id(holder).call()
+
+            totals = BalanceSheet.from_horizon(account["balances"]).totals()
+
+            assert totals[XLM] == 255_000_000
+            assert totals[USDC] == 70_000_001
+
+    asyncio.run(scenario())
+
+
+def test_secret_seed_never_reaches_the_result(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            holder, stranger = Keypair.random(), Keypair.random()
+            emulator.fund(holder.public_key, "3")
+            processor = BalanceProcessor(client)
+            typo = stranger.secret[:-1] + ("A" if stranger.secret[-1] != "A" else "B")
+
+            results = [
+                await processor.fetch_balances(key)
+                for key in (holder.secret, stranger.secret, typo)
+            ]
+
+            assert [result.public_key for result in results] == [holder.public_key, stranger.public_key, ""]
+            assert results[0].balances.totals() == {XLM: 30_000_000}
+            assert not results[1].success and not results[2].success
+            for result, secret in zip(results, (holder.secret, stranger.secret, typo)):
+                assert secret not in repr(result)
+
+    asyncio.run(scenario())
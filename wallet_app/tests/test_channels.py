@@ -0,0 +1,91 @@
+import asyncio
+import time
+import pytest
+from stellar_sdk import Keypair
+from app.core.channels import ChannelPool, ChannelState
+
+
+def test_lease_fails_fast_when_every_channel_is_retired(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            keypairs = [Keypair.random() for _ in range(2)]
+            for keypair in keypairs:
+                emulator.fund(keypair.public_key, "1")
+            pool = ChannelPool(client, [keypair.secret for keypair in keypairs])
+
+            health = await pool.check_health()
+
+            assert not any(health.values())
+            assert pool.count(ChannelState.RETIRED) == 2
+            with pytest.raises(ValueError):
+                async with asyncio.timeout(1):
+                    async with pool.lease():
+                        pass
+
+    asyncio.run(scenario())
+
+
+def test_waiter_wakes_when_the_last_channel_is_retired(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            keypair = Keypair.random()
+            emulator.fund(keypair.public_key, "10")
+            pool = ChannelPool(client, [keypair.secret], reclaim_delay=0.05)
+            # Depois do envio incerto o canal fica sem saldo e a recuperação o aposenta
+            with pytest.raises(asyncio.TimeoutError):
+                async with pool.lease():
+                    emulator.accounts[keypair.public_key].balance = 10 ** 7
+                    raise asyncio.TimeoutError()
+
+            with pytest.raises(ValueError):
+                async with asyncio.timeout(1):
+                    async with pool.lease():
+                        pass
+            assert pool.count(ChannelState.RETIRED) == 1
+
+    asyncio.run(scenario())
+
+
+def test_slow_submit_keeps_its_channel_past_the_lease_timeout(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            keypair = Keypair.random()
+            emulator.fund(keypair.public_key, "10")
+            pool = ChannelPool(client, [keypair.secret], lease_timeout=0.05, reclaim_delay=0.01)
+            released = 0.0
+
+            async def slow_holder() -> None:
+                nonlocal released
+                async with pool.lease():
+                    await asyncio.sleep(0.3)
+                    released = time.monotonic()
+
+            holder = asyncio.create_task(slow_holder())
+            await asyncio.sleep(0)
+            async with pool.lease() as channel:
+                acquired = time.monotonic()
+            await holder
+
+            assert channel.public_key == keypair.public_key
+            assert acquired >= released > 0
+            assert pool.count(ChannelState.IDLE) == 1
+
+    asyncio.run(scenario())
+
+
+def test_abandoned_lease_is_reclaimed(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            keypair = Keypair.random()
+            emulator.fund(keypair.public_key, "10")
+            pool = ChannelPool(client, [keypair.secret], lease_timeout=0.05, reclaim_delay=0.01)
+            # Quem pegou o canal terminou sem devolvê-lo
+            await asyncio.create_task(pool._acquire())
+
+            async with asyncio.timeout(1):
+                async with pool.lease() as channel:
+                    assert channel.public_key == keypair.public_key
+            # Concedido, recuperado e concedido de novo
+            assert channel.lease_id == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import pytest
+from stellar_sdk import Keypair, Network, exceptions
+from app.core.emulator import HorizonEmulator
+from app.core.horizon import HorizonClient
+
+
+def counters(client):
+    return client.metrics.snapshot()["counters"]
+
+
+def test_identical_gets_share_one_request(horizon):
+    async def scenario():
+        async with horizon(latency=0.05) as (emulator, client):
+            key = Keypair.random().public_key
+            emulator.fund(key, "10")
+
+            accounts = await asyncio.gather(
+                *(client.server.accounts().account_id(key).call() for _ in range(20))
+            )
+
+            assert all(account["id"] == key for account in accounts)
+            assert counters(client)["horizon.requests"] == 1
+            assert counters(client)["horizon.coalesced"] == 19
+            assert not client.client._in_flight
+
+    asyncio.run(scenario())
+
+
+def test_finished_get_is_not_reused(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            key = Keypair.random().public_key
+            emulator.fund(key, "10")
+
+            await client.server.accounts().account_id(key).call()
+            await client.server.accounts().account_id(key).call()
+
+            assert counters(client)["horizon.requests"] == 2
+            assert "horizon.coalesced" not in counters(client)
+
+    asyncio.run(scenario())
+
+
+def test_different_params_are_not_coalesced(horizon):
+    async def scenario():
+        async with horizon(latency=0.05) as (emulator, client):
+            await asyncio.gather(
+                client.server.payments().limit(1).call(),
+                client.server.payments().limit(2).call(),
+            )
+
+            assert counters(client)["horizon.requests"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_errors_reach_every_waiter(horizon):
+    async def scenario():
+        async with horizon(latency=0.05) as (_, client):
+            key = Keypair.random().public_key
+
+            results = await asyncio.gather(
+                *(client.server.accounts().account_id(key).call() for _ in range(5)),
+                return_exceptions=True
+            )
+
+            assert all(isinstance(result, exceptions.NotFoundError) for result in results)
+            assert counters(client)["horizon.requests"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_forget_starts_a_fresh_read_after_a_write(horizon):
+    async def scenario():
+        async with horizon(latency=0.05) as (emulator, client):
+            key = Keypair.random().public_key
+            emulator.fund(key, "10")
+            before = asyncio.create_task(client.server.accounts().account_id(key).call())
+            await asyncio.sleep(0.01)
+            emulator.accounts[key].balance += 5 * 10 ** 7
+
+            client.client.forget(f"/accounts/{key}")
+            after = await client.server.accounts().account_id(key).call()
+
+            await before
+            assert counters(client)["horizon.requests"] == 2
+            assert "horizon.coalesced" not in counters(client)
+            assert after["balances"][0]["balance"] == "15.0000000"
+            # Terminados os dois pedidos, nenhum fica preso na tabela
+            assert not client.client._in_flight
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_get(horizon):
+    async def scenario():
+        async with horizon(latency=0.05) as (emulator, client):
+            key = Keypair.random().public_key
+            emulator.fund(key, "10")
+            first = asyncio.create_task(client.server.accounts().account_id(key).call())
+            second = asyncio.create_task(client.server.accounts().account_id(key).call())
+            await asyncio.sleep(0.01)
+
+            first.cancel()
+            account = await second
+
+            assert account["id"] == key
+            with pytest.raises(asyncio.CancelledError):
+                await first
+
+    asyncio.run(scenario())
+
+
+def test_new_loop_closes_the_session_of_a_finished_one():
+    emulator = HorizonEmulator(seed=1)
+    key = Keypair.random().public_key
+    emulator.fund(key, "10")
+    client = HorizonClient(network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE)
+
+    async def first():
+        await emulator.start()
+        client.horizon_url = emulator.url
+        await client.server.accounts().account_id(key).call()
+        await emulator.close()
+        return client.client
+
+    async def second():
+        assert client.server is not None
+        await client.close()
+
+    old = asyncio.run(first())
+    asyncio.run(second())
+
+    assert old._session.closed
+
+
+def test_new_loop_closes_the_session_of_a_loop_still_running_elsewhere():
+    emulator = HorizonEmulator(seed=1)
+    key = Keypair.random().public_key
+    emulator.fund(key, "10")
+    client = HorizonClient(network_passphrase=Network.PUBLIC_NETWORK_PASSPHRASE)
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever)
+    thread.start()
+
+    async def first():
+        await emulator.start()
+        client.horizon_url = emulator.url
+        await client.server.accounts().account_id(key).call()
+        return client.client
+
+    async def second():
+        assert client.server is not None
+        await client.close()
+
+    try:
+        old = asyncio.run_coroutine_threadsafe(first(), other).result(5)
+        asyncio.run(second())
+
+        assert old._session.closed
+        assert client._loop is None
+    finally:
+        asyncio.run_coroutine_threadsafe(emulator.close(), other).result(5)
+        other.call_soon_threadsafe(other.stop)
+        thread.join()
+        other.close()
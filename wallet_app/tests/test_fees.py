@@ -0,0 +1,22 @@
+import asyncio
+from app.core.fees import FEE_POLL_FAILURES, FeePolicy
+
+
+def test_failing_poller_falls_back_to_a_direct_fetch(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            oracle = client.fees
+            oracle.interval = 0.05
+            assert await oracle.base_fee(FeePolicy.BASE) == 100
+
+            emulator.error_rate = 1.0
+            async with asyncio.timeout(5):
+                while client.metrics.snapshot()["counters"].get("fees.poll_failures", 0) < FEE_POLL_FAILURES:
+                    await asyncio.sleep(0.01)
+            # O poller segue vivo, mas a próxima taxa já não sai das estatísticas velhas
+            emulator.error_rate = 0.0
+            emulator.base_fee = 500
+
+            assert await oracle.base_fee(FeePolicy.BASE) == 500
+
+    asyncio.run(scenario())
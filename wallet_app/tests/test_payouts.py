@@ -0,0 +1,90 @@
+import asyncio
+from stellar_sdk import Keypair, TransactionEnvelope
+from app.core.payouts import PayoutEngine
+from app.core.services import MEMO_REQUIRED_KEY, MEMO_REQUIRED_VALUE, TransactionProcessor
+
+
+def funded(emulator, count: int):
+    keypairs = [Keypair.random() for _ in range(count)]
+    for keypair in keypairs:
+        emulator.fund(keypair.public_key, "100")
+    return keypairs
+
+
+async def pay(engine: PayoutEngine, rows):
+    async with asyncio.timeout(10):
+        return sorted([result async for result in engine.run(rows)], key=lambda result: result.index)
+
+
+def row(destination: str, amount: str = "1"):
+    return {"destination_id": destination, "amount": amount}
+
+
+def test_rejected_operation_leaves_the_rest_of_the_batch(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, first, last = funded(emulator, 3)
+            missing = Keypair.random().public_key
+            engine = PayoutEngine(TransactionProcessor(client), source.secret)
+
+            results = await pay(engine, [row(first.public_key), row(missing), row(last.public_key, "2")])
+
+            assert [result.success for result in results] == [True, False, True]
+            assert results[1].message == "Operação rejeitada: op_no_destination"
+            assert results[0].hash == results[2].hash
+            assert emulator.accounts[first.public_key].balance == 101 * 10 ** 7
+            assert emulator.accounts[last.public_key].balance == 102 * 10 ** 7
+            assert client.metrics.snapshot()["counters"]["payout_retries"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_memo_required_destination_is_rejected_before_submitting(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, exchange, friend = funded(emulator, 3)
+            emulator.accounts[exchange.public_key].data[MEMO_REQUIRED_KEY] = MEMO_REQUIRED_VALUE
+            engine = PayoutEngine(TransactionProcessor(client), source.secret)
+
+            results = await pay(engine, [row(exchange.public_key), row(friend.public_key)])
+
+            assert [result.success for result in results] == [False, True]
+            assert results[0].message == "A conta de destino exige um memo"
+            assert emulator.accounts[exchange.public_key].balance == 100 * 10 ** 7
+            assert emulator.accounts[friend.public_key].balance == 101 * 10 ** 7
+
+            # Com memo o lote segue inteiro
+            engine = PayoutEngine(TransactionProcessor(client), source.secret, memo="fatura 7")
+            results = await pay(engine, [row(exchange.public_key)])
+            assert results[0].success
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_does_not_break_the_other_batches_from_its_source(horizon):
+    async def scenario():
+        async with horizon(latency=0.02) as (emulator, client):
+            source, *destinations = funded(emulator, 12)
+            refused = {destinations[index].public_key for index in (1, 4, 5)}
+            submit = emulator.submit
+
+            def refuse(envelope_xdr: str):
+                # Recusa antes de aplicar, sem gastar a sequência, como um lote que expirou
+                envelope = TransactionEnvelope.from_xdr(envelope_xdr, emulator.network_passphrase)
+                if envelope.transaction.operations[0].destination.account_id in refused:
+                    return 400, emulator._failed(envelope_xdr, {"transaction": "tx_bad_auth"})
+                return submit(envelope_xdr)
+
+            emulator.submit = refuse
+            engine = PayoutEngine(TransactionProcessor(client), source.secret, concurrency=4, batch_size=1)
+
+            results = await pay(engine, [row(destination.public_key) for destination in destinations])
+
+            assert [result.success for result in results] == [index not in (1, 4, 5) for index in range(11)]
+            for destination in destinations:
+                expected = 100 if destination.public_key in refused else 101
+                assert emulator.accounts[destination.public_key].balance == expected * 10 ** 7
+            # Sem pool de canais os lotes saem um de cada vez: nenhum recebe tx_bad_seq por causa do outro
+            assert "sequence_retries" not in client.metrics.snapshot()["counters"]
+
+    asyncio.run(scenario())
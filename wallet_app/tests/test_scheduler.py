@@ -0,0 +1,97 @@
+import asyncio
+import time
+from stellar_sdk import Keypair
+from app.core.metrics import Metrics
+from app.core.scheduler import RequestScheduler, background
+
+
+def limited(limit: str = "3600", remaining: str = "0") -> RequestScheduler:
+    # Janela de 36 s: 3600 pedidos viram 100 por segundo, uma ficha a cada 10 ms
+    scheduler = RequestScheduler(Metrics(), window=36.0)
+    scheduler.observe(200, {"X-Ratelimit-Limit": limit, "X-Ratelimit-Remaining": remaining})
+    return scheduler
+
+
+def test_no_limit_never_waits():
+    async def scenario():
+        scheduler = RequestScheduler(Metrics())
+        await asyncio.wait_for(asyncio.gather(*(scheduler.acquire() for _ in range(100))), 1)
+        assert scheduler.limit is None
+        assert scheduler.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_headers_size_the_bucket():
+    scheduler = limited(remaining="7")
+    assert scheduler.limit == 3600
+    assert scheduler.tokens == 7
+    assert scheduler.rate == 100
+
+
+def test_interactive_goes_first_and_callers_take_turns():
+    async def scenario():
+        scheduler = limited()
+        order = []
+
+        async def request(name: str) -> None:
+            await scheduler.acquire()
+            order.append(name)
+
+        with background("history"):
+            history = [asyncio.create_task(request(f"history{index}")) for index in range(3)]
+        with background("payouts"):
+            payouts = [asyncio.create_task(request(f"payouts{index}")) for index in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(request("interactive"))
+        await asyncio.wait_for(asyncio.gather(*history, *payouts, interactive), 2)
+
+        assert order == ["interactive", "history0", "payouts0", "history1", "payouts1", "history2"]
+
+    asyncio.run(scenario())
+
+
+def test_rate_limited_response_pauses_the_queue():
+    async def scenario():
+        scheduler = limited(remaining="10")
+        assert scheduler.observe(429, {"Retry-After": "0.2"})
+        started = time.monotonic()
+        await scheduler.acquire()
+        assert time.monotonic() - started >= 0.15
+        assert scheduler.metrics.snapshot()["counters"]["scheduler.throttled"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        scheduler = limited()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await asyncio.sleep(0)
+        assert scheduler.waiting == 1
+        waiter.cancel()
+        await asyncio.sleep(0)
+        assert scheduler.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_client_paces_requests_to_the_advertised_limit(horizon):
+    async def scenario():
+        async with horizon(rate_limit=360_000, rate_limit_burst=5) as (emulator, client):
+            keys = [Keypair.random().public_key for _ in range(30)]
+            for key in keys:
+                emulator.fund(key, "10")
+            # A primeira resposta traz os cabeçalhos; daí em diante o agendador segura os pedidos
+            await client.server.accounts().account_id(keys[0]).call()
+
+            accounts = await asyncio.gather(
+                *(client.server.accounts().account_id(key).call() for key in keys)
+            )
+
+            counters = client.metrics.snapshot()["counters"]
+            assert [account["id"] for account in accounts] == keys
+            assert "horizon.status_429" not in counters
+            assert counters["scheduler.queued.interactive"] > 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,155 @@
+import asyncio
+from urllib.parse import urlparse
+from stellar_sdk import Account, Asset, Keypair, Network, TransactionBuilder
+from app.core.emulator import HorizonEmulator
+from app.core.streams import StreamManager
+
+
+def pay(emulator: HorizonEmulator, source: Keypair, destination: str, amount: str) -> None:
+    # Direto no ledger, sem HTTP: funciona mesmo com o servidor do emulador parado
+    account = Account(source.public_key, emulator.accounts[source.public_key].sequence)
+    envelope = (
+        TransactionBuilder(account, Network.PUBLIC_NETWORK_PASSPHRASE, base_fee=emulator.base_fee)
+        .append_payment_op(destination, Asset.native(), amount)
+        .set_timeout(30)
+        .build()
+    )
+    envelope.sign(source)
+    status, _ = emulator.submit(envelope.to_xdr())
+    assert status == 200
+
+
+async def next_delta(subscription, public_key: str):
+    async with asyncio.timeout(5):
+        while True:
+            delta = await subscription.get()
+            if delta.public_key == public_key and delta.changes:
+                return delta
+
+
+async def drain(subscription, count: int) -> None:
+    async with asyncio.timeout(5):
+        for _ in range(count):
+            await subscription.get()
+
+
+def funded(emulator: HorizonEmulator, count: int):
+    keypairs = [Keypair.random() for _ in range(count)]
+    for keypair in keypairs:
+        emulator.fund(keypair.public_key, "100")
+    return keypairs
+
+
+def test_switches_between_account_streams_and_the_effects_stream(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, *watched = funded(emulator, 4)
+            manager = StreamManager(client, max_account_streams=2)
+
+            first = manager.subscribe([key.public_key for key in watched[:2]])
+            await drain(first, 2)
+            assert manager.connections == 2
+            assert client.accounts.streamed == {key.public_key for key in watched[:2]}
+
+            second = manager.subscribe([watched[2].public_key])
+            await drain(second, 1)
+            assert manager.connections == 1
+            assert not client.accounts.streamed
+            pay(emulator, source, watched[0].public_key, "3")
+            delta = await next_delta(first, watched[0].public_key)
+            assert list(delta.changes.values()) == [3 * 10 ** 7]
+
+            second.close()
+            assert manager.connections == 2
+            assert manager.effects_cursor is None
+            pay(emulator, source, watched[1].public_key, "4")
+            delta = await next_delta(first, watched[1].public_key)
+            assert list(delta.changes.values()) == [4 * 10 ** 7]
+            manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_effects_stream_resumes_from_its_cursor(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, *watched = funded(emulator, 3)
+            manager = StreamManager(client, max_account_streams=1)
+            subscription = manager.subscribe([key.public_key for key in watched])
+            await drain(subscription, 2)
+            pay(emulator, source, watched[0].public_key, "1")
+            await next_delta(subscription, watched[0].public_key)
+            cursor = manager.effects_cursor
+
+            # Servidor fora do ar: o pagamento acontece enquanto o stream está desconectado, e a
+            # reconexão do SDK recebe 503, então quem retoma é o laço do StreamManager
+            port = urlparse(emulator.url).port
+            await emulator.close()
+            pay(emulator, source, watched[1].public_key, "2")
+            emulator.error_rate = 1.0
+            await emulator.start(port=port)
+            async with asyncio.timeout(10):
+                while "streams.reconnects" not in client.metrics.snapshot()["counters"]:
+                    await asyncio.sleep(0.05)
+            emulator.error_rate = 0.0
+
+            delta = await next_delta(subscription, watched[1].public_key)
+            assert list(delta.changes.values()) == [2 * 10 ** 7]
+            assert manager.effects_cursor != cursor
+            manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_is_retried(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, *watched = funded(emulator, 3)
+            manager = StreamManager(client, max_account_streams=1)
+            subscription = manager.subscribe([key.public_key for key in watched])
+            await drain(subscription, 2)
+
+            # O efeito chega pelo stream já aberto, mas a leitura da conta recebe 503
+            emulator.error_rate = 1.0
+            pay(emulator, source, watched[0].public_key, "5")
+            await asyncio.sleep(0.2)
+            emulator.error_rate = 0.0
+
+            delta = await next_delta(subscription, watched[0].public_key)
+            assert list(delta.changes.values()) == [5 * 10 ** 7]
+            assert client.metrics.snapshot()["counters"]["streams.refresh_failures"] >= 1
+            manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_disconnected_account_stream_honours_the_ttl(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            (holder,) = funded(emulator, 1)
+            key = holder.public_key
+            updates = asyncio.Queue()
+            client.accounts.ttl = 0.05
+            client.accounts.subscribe(key, updates.put_nowait)
+            async with asyncio.timeout(5):
+                await updates.get()
+            await asyncio.sleep(0.1)
+            assert client.accounts.peek(key) is not None
+
+            # Stream caído e esperando para reconectar: a leitura avulsa só vale pelo TTL
+            port = urlparse(emulator.url).port
+            await emulator.close()
+            emulator.error_rate = 1.0
+            await emulator.start(port=port)
+            async with asyncio.timeout(10):
+                while "streams.reconnects" not in client.metrics.snapshot()["counters"]:
+                    await asyncio.sleep(0.05)
+            emulator.error_rate = 0.0
+            await client.accounts.get(key)
+            await asyncio.sleep(0.1)
+
+            assert key in client.accounts.streamed
+            assert client.accounts.peek(key) is None
+            client.accounts.unsubscribe(key, updates.put_nowait)
+
+    asyncio.run(scenario())
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import pytest
+from stellar_sdk import Account, Asset, Keypair, Network, TransactionBuilder, TransactionEnvelope, exceptions
+from stellar_sdk.client.response import Response
+from app.core.emulator import HorizonEmulator
+from app.core.models import OperationType, TransactionData
+from app.core.services import TransactionProcessor
+from app.core.fees import FeePolicy
+from app.core.submission import (
+    SubmissionPending,
+    SubmitErrorKind,
+    TransactionSubmitter,
+    classify_error,
+)
+
+
+def horizon_error(error_class, status: int, transaction_code: str = "") -> exceptions.BaseHorizonError:
+    body = {"status": status, "title": "erro"}
+    if transaction_code:
+        body["extras"] = {"result_codes": {"transaction": transaction_code}}
+    return error_class(Response(status, json.dumps(body), {}, "http://horizon/transactions"))
+
+
+def payment(emulator: HorizonEmulator, source: Keypair, destination: str, amount: str) -> TransactionEnvelope:
+    account = Account(source.public_key, emulator.accounts[source.public_key].sequence)
+    envelope = (
+        TransactionBuilder(account, Network.PUBLIC_NETWORK_PASSPHRASE, base_fee=emulator.base_fee)
+        .append_payment_op(destination, Asset.native(), amount)
+        .set_timeout(30)
+        .build()
+    )
+    envelope.sign(source)
+    return envelope
+
+
+def funded(emulator: HorizonEmulator, count: int, balance: str = "100"):
+    keypairs = [Keypair.random() for _ in range(count)]
+    for keypair in keypairs:
+        emulator.fund(keypair.public_key, balance)
+    return keypairs
+
+
+@pytest.mark.parametrize("error, kind", [
+    (asyncio.TimeoutError(), SubmitErrorKind.UNKNOWN),
+    (horizon_error(exceptions.BadResponseError, 504), SubmitErrorKind.UNKNOWN),
+    (horizon_error(exceptions.BadResponseError, 503), SubmitErrorKind.RETRYABLE),
+    (horizon_error(exceptions.BadRequestError, 429), SubmitErrorKind.RETRYABLE),
+    (horizon_error(exceptions.BadRequestError, 400, "tx_bad_seq"), SubmitErrorKind.REBUILD),
+    (horizon_error(exceptions.BadRequestError, 400, "tx_insufficient_fee"), SubmitErrorKind.REBUILD),
+    (horizon_error(exceptions.BadRequestError, 400, "tx_failed"), SubmitErrorKind.FATAL),
+    (ValueError("envelope inválido"), SubmitErrorKind.FATAL),
+])
+def test_classify_error(error, kind):
+    assert classify_error(error) is kind
+
+
+def test_timeout_after_apply_is_resolved_by_hash(horizon):
+    async def scenario():
+        async with horizon(submit_timeout_rate=1.0) as (emulator, client):
+            source, destination = funded(emulator, 2)
+            envelope = payment(emulator, source, destination.public_key, "5")
+            submitter = TransactionSubmitter(client, delay=0.01)
+
+            record = await submitter.submit(envelope)
+
+            assert record["hash"] == envelope.hash_hex()
+            assert emulator.accounts[destination.public_key].balance == 105 * 10 ** 7
+            assert client.metrics.snapshot()["counters"]["submit.already_applied"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_lookup_keeps_submission_pending(horizon):
+    async def scenario():
+        async with horizon(submit_timeout_rate=1.0) as (emulator, client):
+            source, destination = funded(emulator, 2)
+            envelope = payment(emulator, source, destination.public_key, "5")
+            submitter = TransactionSubmitter(client, delay=0.01)
+            apply = emulator.submit
+
+            def apply_then_fail(envelope_xdr):
+                # A transação entra, mas a consulta pelo hash só recebe 503
+                result = apply(envelope_xdr)
+                emulator.error_rate = 1.0
+                return result
+
+            emulator.submit = apply_then_fail
+            assert submitter.claim(envelope)
+
+            with pytest.raises(SubmissionPending) as raised:
+                await submitter.submit(envelope)
+
+            assert raised.value.hash == envelope.hash_hex()
+            # O envelope pode ter entrado: o hash continua reservado
+            assert not submitter.claim(envelope)
+
+    asyncio.run(scenario())
+
+
+def test_late_rejection_after_timeout_checks_the_hash_first(horizon):
+    async def scenario():
+        async with horizon(submit_timeout_rate=1.0) as (emulator, client):
+            source, destination = funded(emulator, 2)
+            envelope = payment(emulator, source, destination.public_key, "5")
+            transaction_hash = envelope.hash_hex()
+            submitter = TransactionSubmitter(client, delay=0.01)
+            apply = emulator.submit
+            hidden = {}
+
+            def lagging_ledger(envelope_xdr):
+                # 1º envio: aplica, responde 504 e o hash ainda não aparece na consulta.
+                # 2º envio: o envelope já expirou e o core recusa com tx_too_late
+                if not hidden:
+                    result = apply(envelope_xdr)
+                    hidden[transaction_hash] = emulator.transactions.pop(transaction_hash)
+                    return result
+                emulator.transactions.update(hidden)
+                return 400, emulator._failed(envelope_xdr, {"transaction": "tx_too_late"})
+
+            emulator.submit = lagging_ledger
+
+            record = await submitter.submit(envelope)
+
+            assert record["hash"] == transaction_hash
+            assert client.metrics.snapshot()["counters"]["submit.already_applied"] == 1
+            assert emulator.accounts[destination.public_key].balance == 105 * 10 ** 7
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_submit_keeps_the_claim(horizon):
+    async def scenario():
+        async with horizon(latency=0.2) as (emulator, client):
+            source, destination = funded(emulator, 2)
+            envelope = payment(emulator, source, destination.public_key, "5")
+            submitter = TransactionSubmitter(client, delay=0.01)
+            assert submitter.claim(envelope)
+
+            task = asyncio.create_task(submitter.submit(envelope))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            # O POST pode ter chegado ao Horizon: ninguém mais pode reenviar este hash como novo
+            assert not submitter.claim(envelope)
+
+    asyncio.run(scenario())
+
+
+def test_retryable_errors_are_retried_then_released(horizon):
+    async def scenario():
+        async with horizon(error_rate=1.0) as (emulator, client):
+            source, destination = funded(emulator, 2)
+            envelope = payment(emulator, source, destination.public_key, "5")
+            submitter = TransactionSubmitter(client, retries=2, delay=0.01)
+            assert submitter.claim(envelope)
+
+            with pytest.raises(exceptions.BadResponseError) as raised:
+                await submitter.submit(envelope)
+
+            assert raised.value.status == 503
+            assert client.metrics.snapshot()["counters"]["submit.retries"] == 2
+            assert emulator.accounts[destination.public_key].balance == 100 * 10 ** 7
+            # Recusa certa: o hash fica livre para ser enviado de novo
+            assert submitter.claim(envelope)
+
+    asyncio.run(scenario())
+
+
+def test_fatal_rejection_is_not_retried(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, destination = funded(emulator, 2)
+            envelope = payment(emulator, source, destination.public_key, "500")
+            submitter = TransactionSubmitter(client, delay=0.01)
+
+            with pytest.raises(exceptions.BadRequestError) as raised:
+                await submitter.submit(envelope)
+
+            assert classify_error(raised.value) is SubmitErrorKind.FATAL
+            assert "submit.retries" not in client.metrics.snapshot()["counters"]
+
+    asyncio.run(scenario())
+
+
+def test_stale_sequence_is_rebuilt(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, destination = funded(emulator, 2)
+            processor = TransactionProcessor(client)
+            data = TransactionData(
+                source.secret, destination.public_key, "1", OperationType.TRANSFER, asset_type="XLM (Nativo)"
+            )
+            assert (await processor.process_transaction(data)).success
+            # Outro cliente gasta a sequência que está em cache
+            emulator.accounts[source.public_key].sequence += 1
+
+            result = await processor.process_transaction(data)
+
+            assert result.success
+            assert client.metrics.snapshot()["counters"]["sequence_retries"] == 1
+            assert emulator.accounts[destination.public_key].balance == 102 * 10 ** 7
+
+    asyncio.run(scenario())
+
+
+def test_insufficient_fee_steps_up_the_policy(horizon):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, destination = funded(emulator, 2)
+            processor = TransactionProcessor(client, FeePolicy.BASE)
+            data = TransactionData(
+                source.secret, destination.public_key, "1", OperationType.TRANSFER, asset_type="XLM (Nativo)"
+            )
+            assert (await processor.process_transaction(data)).success
+            # A taxa em cache fica abaixo da nova taxa base da rede
+            emulator.base_fee = 300
+
+            result = await processor.process_transaction(data)
+
+            assert result.success
+            assert client.metrics.snapshot()["counters"]["sequence_retries"] == 1
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("memo, asset_type", [("x" * 29, "XLM (Nativo)"), (None, "USDC")])
+def test_build_failure_hands_the_sequence_back(horizon, memo, asset_type):
+    async def scenario():
+        async with horizon() as (emulator, client):
+            source, destination = funded(emulator, 2)
+            processor = TransactionProcessor(client)
+            broken = TransactionData(
+                source.secret, destination.public_key, "1", OperationType.TRANSFER, memo=memo, asset_type=asset_type
+            )
+            data = TransactionData(
+                source.secret, destination.public_key, "1", OperationType.TRANSFER, asset_type="XLM (Nativo)"
+            )
+            assert (await processor.process_transaction(data)).success
+
+            assert not (await processor.process_transaction(broken)).success
+            result = await processor.process_transaction(data)
+
+            assert result.success
+            assert "sequence_retries" not in client.metrics.snapshot()["counters"]
+            assert emulator.accounts[destination.public_key].balance == 102 * 10 ** 7
+
+    asyncio.run(scenario())